@@ -0,0 +1,157 @@
+import asyncio
+import json
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from alpine_formatter.formatter import AlpineFormatter, get_formatter
+
+# the formatters of a worker process, by their json encoded options and
+# backend, each keeps its snippet cache between requests
+WORKER_FORMATTERS: dict = {}
+
+
+def format_in_worker(
+    content: str, options: Optional[dict], backend: Optional[str], check: bool
+):
+    key = json.dumps([options, backend], sort_keys=True)
+    formatter = WORKER_FORMATTERS.get(key)
+    if formatter is None:
+        formatter = WORKER_FORMATTERS[key] = get_formatter(options, backend)
+    return formatter.check(content) if check else formatter.format(content)
+
+
+# the thread every AsyncFormatter without processes formats in, they all use
+# the process wide snippet cache, which is not thread safe, and threads
+# formatting at the same time would only take turns for the GIL anyway
+THREAD_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def get_thread_executor() -> ThreadPoolExecutor:
+    global THREAD_EXECUTOR
+
+    if THREAD_EXECUTOR is None:
+        THREAD_EXECUTOR = ThreadPoolExecutor(1, thread_name_prefix="alpine-formatter")
+    return THREAD_EXECUTOR
+
+
+def release_threadsafe(
+    loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore
+) -> None:
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:
+        # the loop is closed, nobody waits for the semaphore anymore
+        pass
+
+
+class AsyncFormatter:
+    # formats off the event loop, in a thread using the process wide snippet
+    # cache or with `processes` in `max_workers` worker processes with their
+    # own, at most `concurrency` contents are formatted or queued at once and
+    # a call waits for a slot, `timeout` (in seconds) covers the wait as well
+    def __init__(
+        self,
+        options: Optional[dict] = None,
+        backend: Optional[str] = None,
+        processes: bool = False,
+        max_workers: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.options = options
+        self.backend = backend
+        self.processes = processes
+        self.timeout = timeout
+        # see THREAD_EXECUTOR without processes
+        self.max_workers = (max_workers or os.cpu_count() or 1) if processes else 1
+        self.concurrency = concurrency or self.max_workers
+        self._formatter: Optional[AlpineFormatter] = None
+        self._executor: Optional[Executor] = None
+        # asyncio primitives belong to the loop they are first used in
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.processes:
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            else:
+                self._formatter = get_formatter(self.options, self.backend)
+                self._executor = get_thread_executor()
+        return self._executor
+
+    def _format_in_thread(self, content: str, check: bool):
+        if check:
+            return self._formatter.check(content)
+        return self._formatter.format(content)
+
+    def _submit(self, content: str, check: bool) -> Future:
+        executor = self._get_executor()
+        if self.processes:
+            return executor.submit(
+                format_in_worker, content, self.options, self.backend, check
+            )
+        return executor.submit(self._format_in_thread, content, check)
+
+    async def _run(self, content: str, check: bool, timeout: Optional[float]):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        semaphore = self._semaphore
+
+        async def run():
+            await semaphore.acquire()
+            try:
+                future = self._submit(content, check)
+            except BaseException:
+                semaphore.release()
+                raise
+            # the slot is only free once the work is, a request that timed
+            # out or was cancelled cannot stop it once it started
+            future.add_done_callback(lambda _: release_threadsafe(loop, semaphore))
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+
+        return await asyncio.wait_for(
+            run(), self.timeout if timeout is None else timeout
+        )
+
+    async def format(self, content: str, timeout: Optional[float] = None) -> str:
+        return await self._run(content, False, timeout)
+
+    async def check(self, content: str, timeout: Optional[float] = None) -> bool:
+        return await self._run(content, True, timeout)
+
+    def close(self, wait: bool = True) -> None:
+        # shuts down the worker processes, the thread is shared
+        if self._executor is not None and self.processes:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._executor = None
+
+    async def __aenter__(self) -> "AsyncFormatter":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close(wait=False)
+
+
+# used by format_alpine_async, by their json encoded options
+ASYNC_FORMATTERS: dict = {}
+
+
+async def format_alpine_async(
+    content: str, options: Optional[dict] = None, timeout: Optional[float] = None
+) -> str:
+    # format_alpine without blocking the event loop, in a thread using the
+    # process wide snippet cache, an AsyncFormatter can also limit the
+    # concurrency or use processes
+    key = json.dumps(options, sort_keys=True)
+    formatter = ASYNC_FORMATTERS.get(key)
+    if formatter is None:
+        formatter = ASYNC_FORMATTERS[key] = AsyncFormatter(options)
+    return await formatter.format(content, timeout)
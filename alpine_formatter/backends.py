@@ -0,0 +1,101 @@
+from typing import Optional, Union
+
+from jsbeautifier import Beautifier, BeautifierOptions
+
+from alpine_formatter.expressions import (
+    ExpressionPrinter,
+    UnsupportedExpression,
+    supports_options,
+)
+
+DEFAULT_BACKEND = "jsbeautifier"
+
+
+class ReusableBeautifier:
+    # a single jsbeautifier instance used for many snippets, which saves
+    # building the options, beautifier and output objects for every call
+    def __init__(self, options: Union[BeautifierOptions, dict, None] = None):
+        options = BeautifierOptions(options)
+        # jsbeautifier resolves "auto" line endings in place on each call,
+        # restore it so every snippet detects its own like beautify() does
+        self._eol = options.eol
+        self._beautifier = Beautifier(options)
+
+    def beautify(self, code: str) -> str:
+        self._beautifier._options.eol = self._eol
+        return self._beautifier.beautify(code)
+
+
+class Backend:
+    # turns the stripped code of a directive into its formatted code, every
+    # backend must give the same result as jsbeautifier with the same options
+    name = ""
+
+    def __init__(self, options: Optional[BeautifierOptions] = None):
+        self.options = options
+
+    def beautify(self, code: str) -> str:
+        raise NotImplementedError
+
+
+class JsBeautifierBackend(Backend):
+    name = "jsbeautifier"
+
+    def __init__(self, options: Optional[BeautifierOptions] = None):
+        super().__init__(options)
+        self._beautifier = ReusableBeautifier(options)
+
+    def beautify(self, code: str) -> str:
+        return self._beautifier.beautify(code)
+
+
+class ExpressionBackend(Backend):
+    # prints the expressions and object literals it knows itself, and hands
+    # everything else to jsbeautifier
+    name = "expression"
+
+    def __init__(self, options: Optional[BeautifierOptions] = None):
+        super().__init__(options)
+        self._printer = (
+            ExpressionPrinter(options) if supports_options(options) else None
+        )
+        self._fallback: Optional[JsBeautifierBackend] = None
+        self.printed = 0
+        self.fallbacks = 0
+
+    def beautify(self, code: str) -> str:
+        if self._printer is not None:
+            try:
+                formatted = self._printer.format(code)
+            except UnsupportedExpression:
+                pass
+            else:
+                self.printed += 1
+                return formatted
+
+        self.fallbacks += 1
+        if self._fallback is None:
+            self._fallback = JsBeautifierBackend(self.options)
+        return self._fallback.beautify(code)
+
+
+BACKENDS: dict[str, type[Backend]] = {}
+
+
+def register_backend(backend: type[Backend]) -> type[Backend]:
+    BACKENDS[backend.name] = backend
+    return backend
+
+
+register_backend(JsBeautifierBackend)
+register_backend(ExpressionBackend)
+
+
+def get_backend(
+    name: str = DEFAULT_BACKEND, options: Optional[BeautifierOptions] = None
+) -> Backend:
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown backend {name!r}") from None
+    return backend(options)
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Optional, Union
+
+from alpine_formatter import __version__
+
+if TYPE_CHECKING:
+    from jsbeautifier import BeautifierOptions
+
+CACHE_DIR_ENV = "ALPINE_FORMATTER_CACHE_DIR"
+
+
+def get_cache_dir() -> Path:
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if cache_dir:
+        return Path(cache_dir)
+
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "alpine_formatter" / __version__
+
+
+def get_cache_key(
+    options: Union["BeautifierOptions", dict, None] = None,
+    backend: Optional[str] = None,
+) -> str:
+    # anything that can change the output of format_alpine invalidates the
+    # cache: our version, the beautifier version, its options and the backend
+    import jsbeautifier
+
+    from alpine_formatter.backends import DEFAULT_BACKEND
+    from alpine_formatter.formatter import get_options_key
+
+    key = (__version__, jsbeautifier.__version__, get_options_key(options))
+    if backend and backend != DEFAULT_BACKEND:
+        key += (backend,)
+    key = repr(key)
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+class FileData(NamedTuple):
+    st_mtime: float
+    st_size: int
+    hash: str
+
+
+class Cache:
+    # content hashes of files known to be formatted, stored in one json file
+    # per cache key
+    def __init__(self, cache_file: Path, file_data: Optional[dict] = None):
+        self.cache_file = cache_file
+        self.file_data: dict[str, FileData] = file_data or {}
+
+    @classmethod
+    def read(
+        cls,
+        options: Union["BeautifierOptions", dict, None] = None,
+        cache_dir: Optional[Path] = None,
+        key: Optional[str] = None,
+        backend: Optional[str] = None,
+    ) -> "Cache":
+        # `key` saves computing the cache key when it is known already
+        cache_dir = cache_dir or get_cache_dir()
+        key = key or get_cache_key(options, backend)
+        cache_file = Path(cache_dir) / f"cache.{key}.json"
+        return cls(cache_file, cls._load(cache_file))
+
+    @staticmethod
+    def _load(cache_file: Path) -> dict:
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                raw = json.load(f)
+            return {path: FileData(*data) for path, data in raw.items()}
+        except (OSError, ValueError, TypeError):
+            # a missing or corrupted cache is just an empty one
+            return {}
+
+    @staticmethod
+    def hash_digest(path: Path) -> str:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    @staticmethod
+    def get_file_data(path: Path) -> FileData:
+        stat = path.stat()
+        return FileData(stat.st_mtime, stat.st_size, Cache.hash_digest(path))
+
+    def is_changed(self, source: Path) -> bool:
+        source = Path(source).resolve()
+        old = self.file_data.get(str(source))
+        if old is None:
+            return True
+
+        stat = source.stat()
+        if stat.st_size != old.st_size:
+            return True
+        if stat.st_mtime != old.st_mtime:
+            # touched but possibly identical, e.g. after a git checkout
+            return self.hash_digest(source) != old.hash
+        return False
+
+    def filtered_cached(self, sources: Iterable[Path]) -> tuple[set, set]:
+        changed, done = set(), set()
+        for source in sources:
+            if self.is_changed(source):
+                changed.add(source)
+            else:
+                done.add(source)
+        return changed, done
+
+    def write(self, sources: Iterable[Path]) -> None:
+        for source in sources:
+            source = Path(source).resolve()
+            self.file_data[str(source)] = self.get_file_data(source)
+
+        # other processes may have written the cache since we read it, keep
+        # their entries and replace the file atomically so readers never see
+        # a partial write
+        file_data = {**self._load(self.cache_file), **self.file_data}
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w",
+                dir=self.cache_file.parent,
+                prefix=".cache.",
+                encoding="utf-8",
+                delete=False,
+            ) as f:
+                json.dump({path: list(data) for path, data in file_data.items()}, f)
+            os.replace(f.name, self.cache_file)
+        except OSError:
+            pass
@@ -0,0 +1,593 @@
+import argparse
+import json
+import os
+import sys
+from itertools import chain, islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Sequence
+
+from alpine_formatter import __version__
+from alpine_formatter.discovery import (
+    DEFAULT_EXTENSIONS,
+    DEFAULT_MAX_SIZE,
+    SourceFinder,
+)
+from alpine_formatter.files import read_file, write_file_atomic
+
+if TYPE_CHECKING:
+    from alpine_formatter.daemon import DaemonClient
+    from alpine_formatter.formatter import AlpineFormatter
+    from alpine_formatter.stats import FormatStats
+
+# small files are sent to the workers in chunks so that pickling and
+# scheduling costs are paid per chunk instead of per file
+CHUNK_BYTES = 256 * 1024
+CHUNK_FILES = 64
+
+# what the workers do with each file: format it, return its diff, or
+# minify its directives and return how many bytes that saved
+MODE_FORMAT = "format"
+MODE_DIFF = "diff"
+MODE_MINIFY = "minify"
+
+EXIT_OK = 0
+EXIT_CHANGED = 1
+EXIT_ERROR = 123
+
+
+def chunk_sources(sources: Iterable[Path]) -> Iterator[list]:
+    chunk, chunk_bytes = [], 0
+    for source in sources:
+        try:
+            size = source.stat().st_size
+        except OSError:
+            size = 0
+
+        chunk.append(str(source))
+        chunk_bytes += size
+        if chunk_bytes >= CHUNK_BYTES or len(chunk) >= CHUNK_FILES:
+            yield chunk
+            chunk, chunk_bytes = [], 0
+
+    if chunk:
+        yield chunk
+
+
+def format_chunk(
+    paths: Sequence[str],
+    check: bool = False,
+    options: Optional[dict] = None,
+    backend: Optional[str] = None,
+    lines: Optional[dict] = None,
+    mode: str = MODE_FORMAT,
+) -> list:
+    # runs in the worker processes, errors are reported back per file, the
+    # formatter is imported here so that handing the work to a running daemon
+    # does not pay for importing it
+    from alpine_formatter.formatter import get_formatter
+
+    return format_paths(get_formatter(options, backend), paths, check, lines, mode)
+
+
+def format_chunk_with_stats(
+    paths: Sequence[str],
+    check: bool = False,
+    options: Optional[dict] = None,
+    backend: Optional[str] = None,
+    lines: Optional[dict] = None,
+    mode: str = MODE_FORMAT,
+) -> tuple[list, dict]:
+    # format_chunk, also returning the figures of the chunk as a dict
+    from alpine_formatter.formatter import get_formatter
+    from alpine_formatter.stats import FormatStats
+
+    stats = FormatStats()
+    formatter = get_formatter(options, backend, stats)
+    results = format_paths(formatter, paths, check, lines, mode)
+    return results, stats.to_dict()
+
+
+def format_paths(
+    formatter: "AlpineFormatter",
+    paths: Sequence[str],
+    check: bool = False,
+    lines: Optional[dict] = None,
+    mode: str = MODE_FORMAT,
+) -> list:
+    # `lines` has the line ranges to format by path, see
+    # AlpineFormatter.format_file, the result of each file is whether it
+    # changed, in MODE_DIFF its diff instead (empty when unchanged and the
+    # file is not written) and in MODE_MINIFY the bytes minifying saved
+    if mode == MODE_DIFF:
+        from alpine_formatter.diff import diff_file
+    elif mode == MODE_MINIFY:
+        from alpine_formatter.minify import minify_file
+
+    results = []
+    for path in paths:
+        try:
+            file_lines = lines.get(path) if lines else None
+            if mode == MODE_DIFF:
+                changed = diff_file(formatter, path, file_lines)
+            elif mode == MODE_MINIFY:
+                changed = minify_file(path, check)
+            else:
+                changed = formatter.format_file(path, check=check, lines=file_lines)
+            results.append((path, changed, None))
+        except Exception as e:
+            results.append((path, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def format_chunk_with_daemon(
+    client: "DaemonClient",
+    paths: Sequence[str],
+    check: bool = False,
+    options: Optional[dict] = None,
+    backend: Optional[str] = None,
+) -> list:
+    results = []
+    contents = []
+    readable = []
+    for path in paths:
+        try:
+            contents.append(read_file(path))
+            readable.append(path)
+        except Exception as e:
+            results.append((path, None, f"{type(e).__name__}: {e}"))
+
+    for path, result in zip(readable, client.format(contents, check, options, backend)):
+        if "error" in result:
+            results.append((path, None, result["error"]))
+            continue
+
+        try:
+            if "formatted" in result:
+                write_file_atomic(path, result["formatted"])
+            results.append((path, result["changed"], None))
+        except Exception as e:
+            results.append((path, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+class Report:
+    def __init__(
+        self, quiet: bool = False, check: bool = False, mode: str = MODE_FORMAT
+    ):
+        self.quiet = quiet
+        self.check = check
+        self.mode = mode
+        self.changed = 0
+        self.unchanged = 0
+        self.failed = 0
+        # in MODE_MINIFY
+        self.saved_bytes = 0
+
+    def done(self, path: str, changed) -> None:
+        if not changed:
+            self.unchanged += 1
+            return
+
+        self.changed += 1
+        if self.mode == MODE_MINIFY:
+            self.saved_bytes += changed
+            verb = "would minify" if self.dry_run else "minified"
+            self.out(f"{verb} {path}, {changed} bytes saved")
+        else:
+            self.out(
+                f"would reformat {path}" if self.dry_run else f"reformatted {path}"
+            )
+
+    def failed_file(self, path: str, message: str) -> None:
+        self.failed += 1
+        print(f"error: cannot format {path}: {message}", file=sys.stderr)
+
+    def out(self, message: str) -> None:
+        if not self.quiet:
+            print(message, file=sys.stderr)
+
+    @property
+    def dry_run(self) -> bool:
+        return self.check or self.mode == MODE_DIFF
+
+    @property
+    def return_code(self) -> int:
+        if self.failed:
+            return EXIT_ERROR
+        if self.check and self.changed:
+            return EXIT_CHANGED
+        return EXIT_OK
+
+    def summary(self) -> str:
+        if self.mode == MODE_MINIFY:
+            reformatted = "would be minified" if self.dry_run else "minified"
+        else:
+            reformatted = "would be reformatted" if self.dry_run else "reformatted"
+        unchanged = "would be left unchanged" if self.dry_run else "left unchanged"
+        failed = "would fail to reformat" if self.dry_run else "failed"
+        parts = []
+        if self.changed:
+            parts.append(f"{plural_files(self.changed)} {reformatted}")
+            if self.mode == MODE_MINIFY:
+                parts[-1] += f" ({self.saved_bytes} bytes saved)"
+        if self.unchanged:
+            parts.append(f"{plural_files(self.unchanged)} {unchanged}")
+        if self.failed:
+            parts.append(f"{plural_files(self.failed)} {failed}")
+        return ", ".join(parts) or "No files to format"
+
+
+def write_diff(diff: str) -> None:
+    # bytes of the file that are not UTF-8 are in the diff as they are
+    try:
+        sys.stdout.write(diff)
+    except UnicodeEncodeError:
+        sys.stdout.flush()
+        sys.stdout.buffer.write(diff.encode("utf-8", "surrogateescape"))
+        sys.stdout.buffer.flush()
+
+
+def plural_files(count: int) -> str:
+    return f"{count} file" if count == 1 else f"{count} files"
+
+
+def run(
+    chunks: Iterable[list],
+    jobs: int,
+    report: Report,
+    client: Optional["DaemonClient"] = None,
+    options: Optional[dict] = None,
+    backend: Optional[str] = None,
+    stats: Optional["FormatStats"] = None,
+    lines: Optional[dict] = None,
+) -> list:
+    # returns the paths that are formatted now, for the cache
+    done = []
+    worker = format_chunk if stats is None else format_chunk_with_stats
+
+    def chunk_lines(chunk: list) -> Optional[dict]:
+        # only what the worker needs of `lines`
+        if lines is None:
+            return None
+        return {path: lines[path] for path in chunk}
+
+    def collect(results) -> None:
+        if stats is not None:
+            results, chunk_stats = results
+            stats.merge(chunk_stats)
+        for path, changed, error in results:
+            if error is None:
+                report.done(path, changed)
+                if report.mode == MODE_DIFF and changed:
+                    write_diff(changed)
+                if not (report.dry_run and changed):
+                    done.append(path)
+            else:
+                report.failed_file(path, error)
+
+    # chunks can be a generator still walking the directories, formatting
+    # starts with its first chunk, a single chunk is not worth starting
+    # workers for
+    chunks = iter(chunks)
+    first = list(islice(chunks, 2))
+    chunks = chain(first, chunks)
+    sequential = jobs <= 1 or len(first) <= 1
+
+    # the daemon formats one chunk at a time, the workers are faster for
+    # more than one
+    if client is not None and sequential:
+        for chunk in chunks:
+            try:
+                collect(
+                    format_chunk_with_daemon(
+                        client, chunk, report.check, options, backend
+                    )
+                )
+            except (OSError, ValueError, RuntimeError) as e:
+                report.out(f"daemon failed ({e}), formatting without it")
+                chunks = chain([chunk], chunks)
+                break
+        else:
+            return done
+
+    if sequential:
+        for chunk in chunks:
+            collect(
+                worker(
+                    chunk,
+                    report.check,
+                    options,
+                    backend,
+                    chunk_lines(chunk),
+                    report.mode,
+                )
+            )
+        return done
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                worker,
+                chunk,
+                report.check,
+                options,
+                backend,
+                chunk_lines(chunk),
+                report.mode,
+            )
+            for chunk in chunks
+        ]
+        for future in as_completed(futures):
+            collect(future.result())
+    return done
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="alpine-formatter",
+        description="Format the JavaScript in Alpine.js directives.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="files or directories to format, with --changed or --staged they"
+        " limit the changes (default: the current directory)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of parallel worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="don't write the files back, exit with 1 if any would be reformatted",
+    )
+    parser.add_argument(
+        "--diff",
+        action="store_true",
+        help="don't write the files back, print a unified diff of the changes"
+        " on stdout instead",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="collapse the code of the directives instead, for the html that is"
+        " shipped, reporting the bytes saved per file",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="skip files that are known to be formatted since the last run",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="skip the paths matching this .gitignore style pattern in the"
+        " directories given, can be repeated, .gitignore files are honoured too",
+    )
+    parser.add_argument(
+        "--max-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE,
+        metavar="BYTES",
+        help="skip larger files found in the directories given, 0 for no limit"
+        f" (default: {DEFAULT_MAX_SIZE})",
+    )
+    parser.add_argument(
+        "--changed",
+        action="store_true",
+        help="only format the directives on lines that differ from the --base"
+        " commit in the working tree, and untracked files",
+    )
+    parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="only format the directives on lines that differ from the --base"
+        " commit in the git index, the files must not have unstaged changes",
+    )
+    parser.add_argument(
+        "--base",
+        metavar="REF",
+        help="the commit --changed and --staged compare with (default: HEAD)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="format the files, then keep formatting the ones that change"
+        " until interrupted",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="with --watch, look for changes by walking the directories every"
+        " second instead of with inotify",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="format here even when an alpine-formatterd daemon is running",
+    )
+    parser.add_argument(
+        "--indent-size",
+        type=int,
+        help="spaces per indentation level of the code (default: 4)",
+    )
+    parser.add_argument(
+        "--brace-style",
+        choices=["collapse", "expand", "end-expand", "none"],
+        help="placement of braces in the code (default: collapse)",
+    )
+    parser.add_argument(
+        "--backend",
+        help="formatting backend: jsbeautifier (default) or expression, a faster"
+        " printer for common alpine expressions falling back to jsbeautifier",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="report where the time went, per phase, directive type, file and snippet",
+    )
+    parser.add_argument(
+        "--stats-json",
+        action="store_true",
+        help="print the --stats figures as json on stdout",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true")
+    parser.add_argument("--version", action="version", version=__version__)
+    return parser
+
+
+def get_beautifier_options(args: argparse.Namespace) -> Optional[dict]:
+    # a plain dict, unlike BeautifierOptions it can be sent to the workers
+    # and the daemon
+    options = {}
+    if args.indent_size is not None:
+        options["indent_size"] = args.indent_size
+    if args.brace_style is not None:
+        options["brace_style"] = args.brace_style
+    return options or None
+
+
+def watch(args: argparse.Namespace, report: Report, options: Optional[dict]) -> int:
+    # runs until interrupted, in this process so that the snippet cache stays
+    # warm between passes
+    from alpine_formatter.formatter import get_formatter
+    from alpine_formatter.watch import Watcher
+
+    def collect(results: list) -> None:
+        for path, changed, error in results:
+            if error is None:
+                report.done(path, changed)
+            else:
+                report.failed_file(path, error)
+
+    finder = SourceFinder(excludes=args.exclude, max_size=args.max_size or None)
+    formatter = get_formatter(options, args.backend)
+    with Watcher(args.paths, finder, formatter, poll=args.poll) as watcher:
+        collect(watcher.start())
+        report.out(report.summary())
+        report.out("watching for changes, press ctrl-c to stop")
+        try:
+            while True:
+                collect(watcher.wait())
+        except KeyboardInterrupt:
+            pass
+    return report.return_code
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    if args.backend is not None:
+        from alpine_formatter.backends import BACKENDS
+
+        if args.backend not in BACKENDS:
+            parser.error(f"unknown backend {args.backend!r}")
+    git_mode = args.changed or args.staged
+    if not args.paths and not git_mode:
+        parser.error("the following arguments are required: paths")
+    if args.base is not None and not git_mode:
+        parser.error("--base needs --changed or --staged")
+    if args.cache and git_mode:
+        parser.error("--cache cannot be used with --changed or --staged")
+    if args.diff and args.stats_json:
+        parser.error("--diff and --stats-json both print on stdout")
+    if args.minify:
+        for flag in ("diff", "cache", "changed", "staged", "stats", "stats_json"):
+            if getattr(args, flag):
+                parser.error(f"--minify cannot be used with --{flag.replace('_', '-')}")
+    if args.watch:
+        for flag in ("check", "diff", "minify", "cache", "changed", "staged", "stats"):
+            if getattr(args, flag):
+                parser.error(f"--watch cannot be used with --{flag}")
+    elif args.poll:
+        parser.error("--poll needs --watch")
+    mode = MODE_FORMAT
+    if args.diff:
+        mode = MODE_DIFF
+    elif args.minify:
+        mode = MODE_MINIFY
+    report = Report(quiet=args.quiet, check=args.check, mode=mode)
+    options = get_beautifier_options(args)
+    if args.watch:
+        return watch(args, report, options)
+
+    stats = None
+    if args.stats or args.stats_json:
+        from alpine_formatter.stats import FormatStats
+
+        stats = FormatStats()
+
+    lines = None
+    if git_mode:
+        from alpine_formatter.git import GitError, get_changed_files
+
+        try:
+            changed = get_changed_files(args.paths or ["."], args.base, args.staged)
+        except GitError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return EXIT_ERROR
+        lines = {
+            str(path): ranges
+            for path, ranges in sorted(changed.items())
+            if path.name.endswith(DEFAULT_EXTENSIONS)
+        }
+
+    client = None
+    # the figures are collected here and in the workers, and the daemon
+    # formats whole files only, without their diffs or minifying them
+    if not args.no_daemon and stats is None and lines is None and mode == MODE_FORMAT:
+        from alpine_formatter.daemon import find_daemon
+
+        client = find_daemon()
+
+    try:
+        finder = SourceFinder(excludes=args.exclude, max_size=args.max_size or None)
+        if lines is None:
+            sources = finder.iter_sources(args.paths)
+        else:
+            sources = map(Path, lines)
+        cache = None
+        if args.cache:
+            from alpine_formatter.cache import Cache
+
+            # the daemon only knows the key of the default options and backend
+            default = not (options or args.backend)
+            key = client.info.get("cache_key") if client and default else None
+            cache = Cache.read(options, key=key, backend=args.backend)
+            sources, cached = cache.filtered_cached(list(sources))
+            sources = sorted(sources)
+            report.unchanged += len(cached)
+
+        done = run(
+            chunk_sources(sources),
+            args.jobs,
+            report,
+            client,
+            options,
+            args.backend,
+            stats,
+            lines,
+        )
+    finally:
+        if client is not None:
+            client.close()
+
+    if cache is not None and done:
+        cache.write(done)
+
+    for path in finder.too_large:
+        report.out(f"skipped {path}, larger than {args.max_size} bytes")
+    report.out(report.summary())
+    if args.stats:
+        print(stats.report(), file=sys.stderr)
+    if args.stats_json:
+        print(json.dumps(stats.to_dict(), indent=2))
+    return report.return_code
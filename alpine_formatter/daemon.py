@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from pathlib import Path
+from typing import Optional, Sequence
+
+from alpine_formatter import __version__
+from alpine_formatter.cache import get_cache_dir
+
+SOCKET_ENV = "ALPINE_FORMATTER_SOCKET"
+PING_TIMEOUT = 0.5
+
+# requests and responses are json objects, one per line:
+#
+#   {"request": "ping"}
+#   -> {"version": "0.1.0", "cache_key": "..."}
+#   {"request": "format", "contents": ["<div ...>", ...], "check": false,
+#    "options": {"indent_size": 2}, "backend": "expression"}
+#   -> {"results": [{"changed": true, "formatted": "<div ...>"}, ...]}
+#
+# a result is {"error": "..."} when its content could not be formatted, and
+# has no "formatted" in check mode or when the content is unchanged, the
+# beautifier "options" and the "backend" are optional
+
+# the formatters built so far, by their json encoded options and backend
+FORMATTERS: dict = {}
+
+
+def get_socket_path() -> Path:
+    socket_path = os.environ.get(SOCKET_ENV)
+    if socket_path:
+        return Path(socket_path)
+    return get_cache_dir() / "daemon.sock"
+
+
+def get_formatter(options: Optional[dict], backend: Optional[str] = None):
+    from alpine_formatter.formatter import get_formatter
+
+    key = json.dumps([options, backend], sort_keys=True)
+    formatter = FORMATTERS.get(key)
+    if formatter is None:
+        formatter = FORMATTERS[key] = get_formatter(options, backend)
+    return formatter
+
+
+def handle_request(request: dict) -> dict:
+    from alpine_formatter.cache import get_cache_key
+
+    kind = request.get("request")
+    if kind == "ping":
+        return {"version": __version__, "cache_key": get_cache_key()}
+
+    if kind != "format":
+        return {"error": f"unknown request {kind!r}"}
+
+    check = request.get("check", False)
+    try:
+        formatter = get_formatter(request.get("options"), request.get("backend"))
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+    results = []
+    for content in request.get("contents", []):
+        try:
+            if check:
+                results.append({"changed": not formatter.check(content)})
+                continue
+
+            formatted = formatter.format(content)
+            if formatted == content:
+                results.append({"changed": False})
+            else:
+                results.append({"changed": True, "formatted": formatted})
+        except Exception as e:
+            results.append({"error": f"{type(e).__name__}: {e}"})
+    return {"results": results}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {"error": "invalid request"}
+            else:
+                # the snippet cache is shared and not thread safe
+                with self.server.format_lock:
+                    response = handle_request(request)
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path):
+        self.format_lock = threading.Lock()
+        super().__init__(str(socket_path), RequestHandler)
+
+
+class DaemonClient:
+    def __init__(self, socket_path: Path, timeout: Optional[float] = None):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(str(socket_path))
+        self._file = self._socket.makefile("rwb")
+        self.info: dict = {}
+
+    def set_timeout(self, timeout: Optional[float]) -> None:
+        self._socket.settimeout(timeout)
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def request(self, request: dict) -> dict:
+        self._file.write(json.dumps(request).encode() + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("the daemon closed the connection")
+        return json.loads(line)
+
+    def ping(self) -> dict:
+        self.info = self.request({"request": "ping"})
+        return self.info
+
+    def format(
+        self,
+        contents: Sequence[str],
+        check: bool = False,
+        options: Optional[dict] = None,
+        backend: Optional[str] = None,
+    ) -> list:
+        request = {"request": "format", "contents": list(contents), "check": check}
+        if options:
+            request["options"] = options
+        if backend:
+            request["backend"] = backend
+        response = self.request(request)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["results"]
+
+
+def find_daemon(socket_path: Optional[Path] = None) -> Optional[DaemonClient]:
+    # a connected client when a daemon of this version is listening
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+
+    socket_path = socket_path or get_socket_path()
+    if not socket_path.exists():
+        return None
+
+    try:
+        client = DaemonClient(socket_path, timeout=PING_TIMEOUT)
+    except OSError:
+        return None
+
+    try:
+        info = client.ping()
+    except (OSError, ValueError):
+        client.close()
+        return None
+
+    if info.get("version") != __version__:
+        client.close()
+        return None
+
+    client.set_timeout(None)
+    return client
+
+
+def serve(socket_path: Optional[Path] = None) -> None:
+    socket_path = socket_path or get_socket_path()
+    if socket_path.exists():
+        client = find_daemon(socket_path)
+        if client is not None:
+            client.close()
+            raise RuntimeError(f"a daemon is already listening on {socket_path}")
+        # left behind by a daemon that did not shut down cleanly
+        socket_path.unlink()
+
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    with DaemonServer(socket_path) as server:
+        try:
+            server.serve_forever()
+        finally:
+            socket_path.unlink(missing_ok=True)
+
+
+def raise_keyboard_interrupt(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="alpine-formatterd",
+        description="Keep a formatter with warm caches running for alpine-formatter.",
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        help=f"unix socket to listen on (default: ${SOCKET_ENV} or the cache dir)",
+    )
+    args = parser.parse_args(argv)
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("error: unix sockets are not supported here", file=sys.stderr)
+        return 1
+
+    # import the formatter before the first request instead of during it
+    import alpine_formatter.formatter  # noqa: F401
+
+    # shut down cleanly, removing the socket, when terminated
+    signal.signal(signal.SIGTERM, raise_keyboard_interrupt)
+
+    socket_path = args.socket or get_socket_path()
+    print(f"listening on {socket_path}", file=sys.stderr)
+    try:
+        serve(socket_path)
+    except RuntimeError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
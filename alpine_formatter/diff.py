@@ -0,0 +1,170 @@
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence, Union
+
+from alpine_formatter.files import read_file
+from alpine_formatter.formatter import (
+    AlpineFormatter,
+    LineIndex,
+    Options,
+    TextEdit,
+    get_formatter,
+)
+
+DEFAULT_CONTEXT = 3
+
+# lines like LineIndex sees them, splitlines() would also split at "\r",
+# form feeds and the like
+RE_LINE = re.compile(r"[^\n]*\n|[^\n]+")
+
+NO_NEWLINE = "\\ No newline at end of file\n"
+
+
+class Change:
+    # lines first to last (inclusive) of the original replaced by `lines`
+    __slots__ = ("first", "last", "lines")
+
+    def __init__(self, first: int, last: int, lines: list[str]):
+        self.first = first
+        self.last = last
+        self.lines = lines
+
+
+def format_range(start: int, length: int) -> str:
+    # like difflib, `start` is 1-based and the line before an empty range
+    if length == 1:
+        return str(start + 1)
+    if not length:
+        return f"{start},0"
+    return f"{start + 1},{length}"
+
+
+def get_changes(
+    content: str, edits: Sequence[TextEdit], line_index: LineIndex
+) -> list[Change]:
+    # the lines touched by the sorted, non overlapping `edits`, those on the
+    # same lines are merged into one change
+    changes: list[Change] = []
+    groups: list[list[TextEdit]] = []
+    for edit in edits:
+        first = line_index.line(edit.offset)
+        last = line_index.line(edit.offset + max(edit.length, 1) - 1)
+        if changes and first <= changes[-1].last:
+            changes[-1].last = max(changes[-1].last, last)
+            groups[-1].append(edit)
+        else:
+            changes.append(Change(first, last, []))
+            groups.append([edit])
+
+    for change, group in zip(changes, groups):
+        start = line_index.offset(change.first)
+        end = get_line_end(content, line_index, change.last)
+        parts = []
+        for edit in group:
+            parts.append(content[start : edit.offset])
+            parts.append(edit.replacement)
+            start = edit.offset + edit.length
+        parts.append(content[start:end])
+        change.lines = RE_LINE.findall("".join(parts))
+    return changes
+
+
+def get_line_end(content: str, line_index: LineIndex, line: int) -> int:
+    # the offset after the line and its line break
+    if line + 1 < len(line_index.line_starts):
+        return line_index.line_starts[line + 1]
+    return len(content)
+
+
+def get_line(content: str, line_index: LineIndex, line: int) -> str:
+    return content[line_index.offset(line) : get_line_end(content, line_index, line)]
+
+
+def with_marker(line: str) -> str:
+    return line if line.endswith("\n") else line + "\n" + NO_NEWLINE
+
+
+def unified_diff(
+    content: str,
+    edits: Sequence[TextEdit],
+    fromfile: str = "",
+    tofile: str = "",
+    context: int = DEFAULT_CONTEXT,
+    line_index: Optional[LineIndex] = None,
+) -> Iterator[str]:
+    # the lines of a unified diff of `content` and `content` with the
+    # `edits` applied, only looking at the lines around the edits, so it
+    # costs as much as the edits rather than the size of the content
+    if not edits:
+        return
+
+    line_index = line_index or LineIndex(content)
+    changes = get_changes(content, sorted(edits), line_index)
+    # a trailing newline starts a line that is not there
+    line_count = len(line_index.line_starts)
+    if content.endswith("\n") or not content:
+        line_count -= 1
+
+    # changes closer than twice the context share a hunk
+    hunks: list[list[Change]] = [[changes[0]]]
+    for change in changes[1:]:
+        if change.first - hunks[-1][-1].last - 1 <= 2 * context:
+            hunks[-1].append(change)
+        else:
+            hunks.append([change])
+
+    yield f"--- {fromfile}\n"
+    yield f"+++ {tofile}\n"
+    # how many lines the changes before the hunk added
+    offset = 0
+    for hunk in hunks:
+        start = max(hunk[0].first - context, 0)
+        end = min(hunk[-1].last + context + 1, line_count)
+        old_length = end - start
+        new_length = old_length + sum(
+            len(change.lines) - (change.last - change.first + 1) for change in hunk
+        )
+        yield (
+            f"@@ -{format_range(start, old_length)}"
+            f" +{format_range(start + offset, new_length)} @@\n"
+        )
+        offset += new_length - old_length
+
+        line = start
+        for change in hunk:
+            for line in range(line, change.first):
+                yield " " + with_marker(get_line(content, line_index, line))
+            for line in range(change.first, change.last + 1):
+                yield "-" + with_marker(get_line(content, line_index, line))
+            for new_line in change.lines:
+                yield "+" + with_marker(new_line)
+            line = change.last + 1
+        for line in range(line, end):
+            yield " " + with_marker(get_line(content, line_index, line))
+
+
+def diff_file(
+    formatter: AlpineFormatter,
+    path: Union[str, Path],
+    lines: Optional[Iterable[tuple[int, int]]] = None,
+    context: int = DEFAULT_CONTEXT,
+) -> str:
+    # the diff format_file would apply to the file, empty when it is
+    # formatted, with `lines` only for the directives on these line ranges
+    content = read_file(Path(path))
+    if lines is None:
+        edits = formatter.get_edits(content)
+    else:
+        edits = formatter.format_ranges(content, lines, lines=True)
+    return "".join(unified_diff(content, edits, str(path), str(path), context))
+
+
+def diff_alpine(
+    content: str,
+    options: Options = None,
+    fromfile: str = "",
+    tofile: str = "",
+    context: int = DEFAULT_CONTEXT,
+) -> str:
+    edits = get_formatter(options).get_edits(content)
+    return "".join(unified_diff(content, edits, fromfile, tofile, context))
@@ -0,0 +1,248 @@
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional, Sequence
+
+DEFAULT_EXTENSIONS = (".html", ".jinja", ".twig", ".blade.php")
+
+# never worth walking into, whatever the ignore files say
+DEFAULT_EXCLUDES = (".git", ".hg", ".svn", "node_modules", "__pycache__")
+
+# larger files are most likely generated or minified
+DEFAULT_MAX_SIZE = 2 * 1024 * 1024
+
+
+class Rule(NamedTuple):
+    regex: re.Pattern
+    negated: bool
+    directory_only: bool
+    # whether the pattern is matched against the path relative to the base
+    # of its rules, otherwise against the name alone
+    anchored: bool
+
+
+def translate_glob(glob: str) -> str:
+    # a regex for a gitignore glob, where `*` and `?` do not match `/` and
+    # `**` between slashes matches any number of directories
+    parts = []
+    i = 0
+    while i < len(glob):
+        char = glob[i]
+        at_segment_start = i == 0 or glob[i - 1] == "/"
+        if at_segment_start and glob.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif glob.startswith("/**", i) and i + 3 == len(glob):
+            parts.append("/.*")
+            i += 3
+        elif char == "*":
+            parts.append("[^/]*")
+            while i + 1 < len(glob) and glob[i + 1] == "*":
+                i += 1
+            i += 1
+        elif char == "?":
+            parts.append("[^/]")
+            i += 1
+        elif char == "[" and "]" in glob[i + 2 :]:
+            end = glob.index("]", i + 2)
+            chars = glob[i + 1 : end]
+            if chars[0] in "!^":
+                chars = "^" + chars[1:]
+            parts.append("[" + chars.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif char == "\\" and i + 1 < len(glob):
+            parts.append(re.escape(glob[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(char))
+            i += 1
+    return "".join(parts)
+
+
+def parse_rule(line: str) -> Optional[Rule]:
+    # a line of a gitignore file, None for blank lines and comments
+    if line.endswith("\\ "):
+        line = line.rstrip() + " "
+    else:
+        line = line.rstrip()
+    if not line or line.startswith("#"):
+        return None
+
+    negated = line.startswith("!")
+    if negated or line.startswith("\\!") or line.startswith("\\#"):
+        line = line[1:]
+    directory_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    anchored = "/" in line
+    line = line.lstrip("/")
+    regex = re.compile(translate_glob(line), re.DOTALL)
+    return Rule(regex, negated, directory_only, anchored)
+
+
+class Rules:
+    # the rules of an ignore file, matched against "/" separated paths
+    # relative to the directory walked: `strip` is the length of the path of
+    # the ignore file's directory in them, and `prefix` the path of that
+    # directory relative to the ignore file's one when it is above it
+    def __init__(self, lines: Iterable[str], strip: int = 0, prefix: str = ""):
+        self.rules = [rule for rule in map(parse_rule, lines) if rule is not None]
+        self.strip = strip
+        self.prefix = prefix
+
+    @classmethod
+    def read(cls, path: Path, strip: int = 0, prefix: str = "") -> Optional["Rules"]:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                rules = cls(f.read().splitlines(), strip, prefix)
+        except OSError:
+            return None
+        return rules if rules.rules else None
+
+    def match(self, relative: str, name: str, is_dir: bool) -> Optional[bool]:
+        # whether the path is ignored, None when no rule decides it, the last
+        # matching rule wins
+        for rule in reversed(self.rules):
+            if rule.directory_only and not is_dir:
+                continue
+            if rule.anchored:
+                matched = rule.regex.fullmatch(self.prefix + relative[self.strip :])
+            else:
+                matched = rule.regex.fullmatch(name)
+            if matched:
+                return not rule.negated
+        return None
+
+
+def is_ignored(rules: Sequence[Rules], relative: str, name: str, is_dir: bool) -> bool:
+    # deeper ignore files take precedence over the ones above them
+    for ruleset in reversed(rules):
+        ignored = ruleset.match(relative, name, is_dir)
+        if ignored is not None:
+            return ignored
+    return False
+
+
+def get_parent_rules(directory: Path) -> list[Rules]:
+    # the ignore files above `directory` up to the root of its git
+    # repository, outermost first, none outside of a repository
+    if (directory / ".git").exists():
+        return []
+
+    directory = directory.resolve()
+    parents = []
+    for parent in directory.parents:
+        parents.append(parent)
+        if (parent / ".git").exists():
+            break
+    else:
+        return []
+
+    repository = parents[-1]
+    files = [(repository, repository / ".git" / "info" / "exclude")]
+    files += [(parent, parent / ".gitignore") for parent in reversed(parents)]
+    rules = []
+    for base, path in files:
+        prefix = directory.relative_to(base).as_posix() + "/"
+        ignore = Rules.read(path, prefix=prefix)
+        if ignore is not None:
+            rules.append(ignore)
+    return rules
+
+
+class SourceFinder:
+    # walks directories with os.scandir, yielding the templates that are
+    # not ignored, by .gitignore files or `excludes` (gitignore patterns
+    # relative to each directory walked), as they are found
+    def __init__(
+        self,
+        extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+        excludes: Sequence[str] = (),
+        max_size: Optional[int] = DEFAULT_MAX_SIZE,
+        gitignore: bool = True,
+    ):
+        self.extensions = tuple(extensions)
+        self.excludes = [*DEFAULT_EXCLUDES, *excludes]
+        self.max_size = max_size
+        self.gitignore = gitignore
+        # the files left out for being larger than `max_size`
+        self.too_large: list[Path] = []
+        # when a list, the directories walked are appended to it
+        self.directories: Optional[list[str]] = None
+
+    def iter_sources(self, paths: Iterable[str]) -> Iterator[Path]:
+        # files given explicitly are always yielded
+        for path in map(Path, paths):
+            if path.is_dir():
+                yield from self.walk(path)
+            else:
+                yield path
+
+    def walk(self, directory: Path) -> Iterator[Path]:
+        rules = [Rules(self.excludes)]
+        if self.gitignore:
+            rules = get_parent_rules(directory) + rules
+        yield from self._walk(str(directory), "", rules)
+
+    def _walk(
+        self, directory: str, relative: str, rules: list[Rules]
+    ) -> Iterator[Path]:
+        # `relative` is the path of `directory` in the walk, ending with "/"
+        # unless empty
+        files = []
+        directories = []
+        has_gitignore = False
+        try:
+            with os.scandir(directory) as it:
+                # only the templates and directories are sorted, most
+                # entries are neither
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    if is_dir:
+                        # like os.walk, symlinks to directories are not followed
+                        if not entry.is_symlink():
+                            directories.append((entry.name, entry.path))
+                    elif entry.name.endswith(self.extensions):
+                        files.append((entry.name, entry))
+                    elif entry.name == ".gitignore":
+                        has_gitignore = True
+        except OSError:
+            return
+
+        if self.directories is not None:
+            self.directories.append(directory)
+        if has_gitignore and self.gitignore:
+            ignore = Rules.read(Path(directory, ".gitignore"), strip=len(relative))
+            if ignore is not None:
+                # before the excludes, which always apply
+                rules = [*rules[:-1], ignore, rules[-1]]
+
+        for name, entry in sorted(files):
+            if is_ignored(rules, relative + name, name, False):
+                continue
+            if self.max_size is not None:
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    size = 0
+                if size > self.max_size:
+                    self.too_large.append(Path(entry.path))
+                    continue
+            yield Path(entry.path)
+
+        for name, path in sorted(directories):
+            if not is_ignored(rules, relative + name, name, True):
+                yield from self._walk(path, f"{relative}{name}/", rules)
+
+
+def iter_sources(
+    paths: Iterable[str],
+    excludes: Sequence[str] = (),
+    max_size: Optional[int] = DEFAULT_MAX_SIZE,
+) -> Iterator[Path]:
+    return SourceFinder(excludes=excludes, max_size=max_size).iter_sources(paths)
@@ -0,0 +1,547 @@
+import re
+from typing import Optional, Union
+
+from jsbeautifier import BeautifierOptions
+
+# prints the subset of javascript found in alpine directives, expressions,
+# object literals with methods and arrow functions, exactly as jsbeautifier
+# does, raising UnsupportedExpression for anything else so the caller can
+# hand it to jsbeautifier instead
+
+RE_TOKEN = re.compile(
+    r"""
+    (?P<space>[ \t\n]+)
+    | (?P<name>[a-zA-Z_$][a-zA-Z0-9_$]*)
+    | (?P<number>
+        0[xX][0-9a-fA-F]+
+        | (?:[0-9]+(?:\.[0-9]+)?|\.[0-9]+)(?:[eE][-+]?[0-9]+)?
+    )
+    | (?P<string>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")
+    | (?P<punct>
+        ===|!==|==|!=|<=|>=|&&|\|\||\?\?|=>|\+=|-=|\*=|/=|%=
+        | [-+*/%<>=!?:,.()\[\]{};]
+    )
+    """,
+    re.VERBOSE,
+)
+
+# punctuation that starts a longer operator than we know, or a comment
+RE_UNSUPPORTED_PUNCT = re.compile(r"\+\+|--|\*\*|\?\.|\.\.|//|/\*")
+
+BINARY_OPERATORS = frozenset(
+    ["??", "||", "&&", "==", "!=", "===", "!==", "<", ">", "<=", ">="]
+    + ["+", "-", "*", "/", "%"]
+)
+ASSIGNMENT_OPERATORS = frozenset(["=", "+=", "-=", "*=", "/=", "%="])
+# names that are statements or operators to the beautifier
+RESERVED_NAMES = frozenset(
+    [
+        "async",
+        "await",
+        "break",
+        "case",
+        "catch",
+        "class",
+        "const",
+        "continue",
+        "debugger",
+        "default",
+        "delete",
+        "do",
+        "else",
+        "export",
+        "extends",
+        "finally",
+        "for",
+        "function",
+        "if",
+        "import",
+        "in",
+        "instanceof",
+        "let",
+        "new",
+        "of",
+        "return",
+        "static",
+        "super",
+        "switch",
+        "throw",
+        "try",
+        "typeof",
+        "var",
+        "void",
+        "while",
+        "with",
+        "yield",
+    ]
+)
+
+# the options, other than the indentation and line endings, that the printer
+# lays code out for
+SUPPORTED_OPTIONS = {
+    "disabled": False,
+    "end_with_newline": False,
+    "indent_level": 0,
+    "preserve_newlines": True,
+    "wrap_line_length": 0,
+    "indent_empty_lines": False,
+    "brace_style": "collapse",
+    "brace_preserve_inline": False,
+    "unindent_chained_methods": False,
+    "break_chained_methods": False,
+    "space_in_paren": False,
+    "space_in_empty_paren": False,
+    "jslint_happy": False,
+    "space_after_anon_function": False,
+    "space_after_named_function": False,
+    "keep_array_indentation": False,
+    "unescape_strings": False,
+    "e4x": False,
+    "comma_first": False,
+    "operator_position": "before-newline",
+    "test_output_raw": False,
+    "eval_code": False,
+}
+
+
+class UnsupportedExpression(ValueError):
+    pass
+
+
+class Token:
+    __slots__ = ("kind", "text", "newlines")
+
+    def __init__(self, kind: str, text: str, newlines: int):
+        self.kind = kind
+        self.text = text
+        # the line breaks in the whitespace before the token
+        self.newlines = newlines
+
+
+def tokenize(code: str) -> list[Token]:
+    tokens = []
+    newlines = 0
+    position = 0
+    while position < len(code):
+        match = RE_TOKEN.match(code, position)
+        if match is None:
+            raise UnsupportedExpression(f"unexpected {code[position]!r}")
+        position = match.end()
+
+        kind = match.lastgroup
+        if kind == "space":
+            newlines = match.group().count("\n")
+            continue
+        if kind == "punct" and RE_UNSUPPORTED_PUNCT.match(code, match.start()):
+            raise UnsupportedExpression(f"unsupported operator at {match.start()}")
+
+        tokens.append(Token(kind, match.group(), newlines))
+        newlines = 0
+    tokens.append(Token("end", "", newlines))
+    return tokens
+
+
+def supports_options(options: Union[BeautifierOptions, dict, None]) -> bool:
+    if options is None:
+        return True
+    if isinstance(options, dict):
+        options = BeautifierOptions(options)
+    return all(
+        getattr(options, name) == value for name, value in SUPPORTED_OPTIONS.items()
+    ) and options.eol in ("auto", "\n", "\r\n")
+
+
+class ExpressionPrinter:
+    def __init__(self, options: Union[BeautifierOptions, dict, None] = None):
+        options = BeautifierOptions(options)
+        if not supports_options(options):
+            raise UnsupportedExpression("unsupported beautifier options")
+
+        if options.indent_with_tabs:
+            self.indent = "\t"
+        else:
+            self.indent = options.indent_char * options.indent_size
+        # "auto" line endings follow the code, which never has any but "\n"
+        self.eol = "\n" if options.eol == "auto" else options.eol
+        self.max_newlines = options.max_preserve_newlines
+
+        self._tokens: list[Token] = []
+        self._position = 0
+        # the position of the first token of the current expression statement
+        self._statement_start = -1
+
+    def format(self, code: str) -> str:
+        if "\r" in code or "\u2028" in code or "\u2029" in code:
+            raise UnsupportedExpression("line endings other than \\n")
+
+        self._tokens = tokenize(code)
+        self._position = 0
+        try:
+            lines = self._statements(0, None)
+            self._take(line_break=True)
+        finally:
+            self._tokens = []
+        return self._join_lines(lines, 0, first=True)
+
+    # tokens
+
+    def _peek(self, offset: int = 0) -> Token:
+        return self._tokens[min(self._position + offset, len(self._tokens) - 1)]
+
+    def _at(self, text: Optional[str]) -> bool:
+        # `None` is the end of the code
+        token = self._tokens[self._position]
+        if text is None:
+            return token.kind == "end"
+        return token.text == text and token.kind == "punct"
+
+    def _take(self, text: Optional[str] = None, line_break: bool = False) -> Token:
+        # a token that is not at the start of a line we print must not have
+        # been at the start of one in the code, jsbeautifier would keep it
+        token = self._tokens[self._position]
+        if text is not None and token.text != text:
+            raise UnsupportedExpression(f"expected {text!r}, got {token.text!r}")
+        if token.newlines and not line_break:
+            raise UnsupportedExpression(f"line break before {token.text!r}")
+        self._position += 1
+        return token
+
+    def _break(self, newlines: int) -> str:
+        # the line break before a token at the start of a line, keeping the
+        # empty lines before it
+        if self.max_newlines:
+            newlines = min(newlines, self.max_newlines)
+        return self.eol * max(newlines, 1)
+
+    def _join_lines(self, lines: list, depth: int, first: bool = False) -> str:
+        indent = self.indent * depth
+        parts = []
+        for index, (newlines, text) in enumerate(lines):
+            if index or not first:
+                parts.append(self._break(newlines))
+            parts.append(indent + text)
+        return "".join(parts)
+
+    # statements
+
+    def _statements(self, depth: int, closing: Optional[str]) -> list:
+        # (line breaks before, text) of each statement up to `closing`
+        outer_statement_start = self._statement_start
+        lines = []
+        separated = True
+        while not self._at(closing):
+            token = self._peek()
+            if not separated:
+                # without a semicolon the beautifier may take the next line
+                # as a continuation, unless it starts with a name
+                if not token.newlines or token.kind != "name":
+                    raise UnsupportedExpression("statements without semicolon")
+            if token.text in ("+", "-", "function"):
+                # laid out as declarations or continuations of the line before
+                raise UnsupportedExpression(f"statement starting with {token.text}")
+
+            text = self._statement(depth, token, top_level=closing is None)
+            separated = self._at(";")
+            if separated:
+                self._take(";")
+                text += ";"
+            lines.append((token.newlines, text))
+        self._statement_start = outer_statement_start
+        return lines
+
+    def _statement(self, depth: int, token: Token, top_level: bool) -> str:
+        if token.kind == "name" and token.text == "return":
+            self._take(line_break=True)
+            following = self._peek()
+            if following.newlines:
+                raise UnsupportedExpression("line break after return")
+            if self._at(";") or self._at("}") or self._at(None):
+                return "return"
+            return "return " + self._expression(depth)
+
+        self._tokens[self._position] = Token(token.kind, token.text, 0)
+        self._statement_start = self._position
+        if token.kind == "punct" and token.text == "{":
+            # the beautifier takes a statement starting with `{` for a block,
+            # unless it is the whole code and starts like an object literal
+            if not top_level or not (
+                self._peek(1).text == "}"
+                or self._peek(1).kind in ("name", "string", "number")
+                and self._peek(2).text == ":"
+            ):
+                raise UnsupportedExpression("block statement")
+        return self._expression(depth)
+
+    def _block(self, depth: int) -> str:
+        self._take("{")
+        lines = self._statements(depth + 1, "}")
+        closing = self._take("}", line_break=True)
+        if not lines:
+            if closing.newlines > 1:
+                raise UnsupportedExpression("empty lines in an empty block")
+            return "{}"
+        return (
+            "{"
+            + self._join_lines(lines, depth + 1)
+            + self._break(closing.newlines)
+            + self.indent * depth
+            + "}"
+        )
+
+    # expressions
+
+    def _expression(self, depth: int) -> str:
+        left = self._ternary(depth)
+        if self._peek().kind == "punct" and self._peek().text in ASSIGNMENT_OPERATORS:
+            self._check_operand(left)
+            operator = self._take().text
+            return f"{left} {operator} {self._expression(depth)}"
+        return left
+
+    def _ternary(self, depth: int) -> str:
+        start = self._position
+        condition = self._binary(depth)
+        if not self._at("?"):
+            return condition
+        self._check_operand(condition)
+        if condition.lstrip("!")[0] in "([\"'" and (
+            start == self._statement_start or self._is_bracketed_statement()
+        ):
+            # the beautifier misses the `:` after such a condition at the
+            # start of a statement, or anywhere in one starting with a bracket
+            raise UnsupportedExpression("condition starting with a bracket")
+        self._take("?")
+        consequent = self._expression(depth)
+        self._take(":")
+        return f"{condition} ? {consequent} : {self._expression(depth)}"
+
+    def _is_bracketed_statement(self) -> bool:
+        if self._statement_start < 0:
+            return False
+        first = self._tokens[self._statement_start]
+        return first.kind == "string" or first.text in ("(", "[")
+
+    def _binary(self, depth: int) -> str:
+        # the layout does not depend on the precedence of the operators
+        parts = [self._unary(depth)]
+        while self._peek().kind == "punct" and self._peek().text in BINARY_OPERATORS:
+            self._check_operand(parts[-1])
+            parts.append(self._take().text)
+            parts.append(self._unary(depth))
+        return " ".join(parts)
+
+    def _check_operand(self, text: str) -> None:
+        # an operator after an object or function is taken for the start of
+        # a new statement or a regular expression
+        if text.endswith("}"):
+            raise UnsupportedExpression("operator after a block")
+
+    def _unary(self, depth: int) -> str:
+        token = self._peek()
+        if token.kind == "punct" and token.text in ("!", "-", "+"):
+            self._take()
+            operand = self._unary(depth)
+            if operand[0] in "-+" and token.text != "!":
+                raise UnsupportedExpression("repeated sign")
+        elif token.kind == "name" and token.text == "typeof":
+            self._take()
+            operand = self._unary(depth)
+            # the beautifier spaces `typeof` like a call before a parenthesis
+            if not (operand[0].isalnum() or operand[0] in "_$"):
+                raise UnsupportedExpression("typeof of an operator")
+        else:
+            return self._postfix(depth)
+
+        if operand.startswith("function"):
+            raise UnsupportedExpression("unary operator on a function")
+        if token.text == "typeof":
+            return "typeof " + operand
+        return token.text + operand
+
+    def _postfix(self, depth: int) -> str:
+        literal = self._peek().kind in ("number", "string")
+        text = self._primary(depth)
+        # objects, functions and arrow functions with a body end in `}`
+        literal = literal or text.endswith("}")
+        if literal and (self._at(".") or self._at("(") or self._at("[")):
+            # spaced out, or confusing the beautifier about what follows
+            raise UnsupportedExpression("member of a literal")
+        while True:
+            if self._at("."):
+                self._take(".")
+                name = self._take()
+                if name.kind != "name":
+                    raise UnsupportedExpression(f"unexpected {name.text!r}")
+                text += "." + name.text
+            elif self._at("("):
+                text += self._arguments(depth)
+            elif self._at("["):
+                self._take("[")
+                if self._at("["):
+                    raise UnsupportedExpression("nested array")
+                text += "[" + self._expression(depth) + "]"
+                self._take("]")
+            else:
+                return text
+
+    def _arguments(self, depth: int) -> str:
+        self._take("(")
+        arguments = []
+        while not self._at(")"):
+            if arguments:
+                self._take(",")
+            arguments.append(self._expression(depth))
+        self._take(")")
+        return "(" + ", ".join(arguments) + ")"
+
+    def _primary(self, depth: int) -> str:
+        token = self._peek()
+        if token.kind in ("number", "string"):
+            return self._take().text
+
+        if token.kind == "name":
+            if self._peek(1).text == "=>":
+                return self._arrow_function(depth)
+            if token.text == "function":
+                self._take()
+                return "function" + self._function_rest(depth)
+            if token.text in RESERVED_NAMES or token.text in ("get", "set"):
+                # `get` and `set` start accessors to the beautifier
+                raise UnsupportedExpression(f"unsupported {token.text!r}")
+            return self._take().text
+
+        if token.kind == "punct":
+            if token.text == "(":
+                if self._is_arrow_function():
+                    return self._arrow_function(depth)
+                self._take("(")
+                text = "(" + self._expression(depth) + ")"
+                self._take(")")
+                return text
+            if token.text == "[":
+                return self._array(depth)
+            if token.text == "{":
+                return self._object(depth)
+
+        raise UnsupportedExpression(f"unexpected {token.text!r}")
+
+    def _is_arrow_function(self) -> bool:
+        # `(` followed by names separated by commas, `)` and `=>`
+        offset = 1
+        while True:
+            token = self._peek(offset)
+            if token.text == ")":
+                return self._peek(offset + 1).text == "=>"
+            if token.kind != "name" or token.text in RESERVED_NAMES:
+                return False
+            token = self._peek(offset + 1)
+            if token.text == ",":
+                offset += 2
+            elif token.text == ")":
+                offset += 1
+            else:
+                return False
+
+    def _parameters(self) -> str:
+        self._take("(")
+        parameters = []
+        while not self._at(")"):
+            if parameters:
+                self._take(",")
+            name = self._take()
+            if name.kind != "name" or name.text in RESERVED_NAMES:
+                raise UnsupportedExpression(f"unsupported parameter {name.text!r}")
+            parameters.append(name.text)
+        self._take(")")
+        return "(" + ", ".join(parameters) + ")"
+
+    def _arrow_function(self, depth: int) -> str:
+        if self._at("("):
+            parameters = self._parameters()
+        else:
+            parameters = self._take().text
+        self._take("=>")
+        if self._at("{"):
+            return f"{parameters} => {self._block(depth)}"
+        # the beautifier often takes the body for the start of a statement,
+        # see _ternary()
+        statement_start = self._statement_start
+        self._statement_start = self._position
+        body = self._expression(depth)
+        self._statement_start = statement_start
+        return f"{parameters} => {body}"
+
+    def _function_rest(self, depth: int) -> str:
+        # the parameters and body of a method or function
+        parameters = self._parameters()
+        if not self._at("{"):
+            raise UnsupportedExpression("expected a function body")
+        return f"{parameters} {self._block(depth)}"
+
+    def _array(self, depth: int) -> str:
+        self._take("[")
+        elements = []
+        while not self._at("]"):
+            if elements:
+                self._take(",")
+            if self._at("["):
+                # the beautifier puts nested arrays on lines of their own
+                raise UnsupportedExpression("nested array")
+            elements.append(self._expression(depth))
+        self._take("]")
+        return "[" + ", ".join(elements) + "]"
+
+    def _object(self, depth: int) -> str:
+        self._take("{")
+        lines = []
+        while not self._at("}"):
+            if lines:
+                self._take(",")
+                lines[-1] = (lines[-1][0], lines[-1][1] + ",")
+                if self._at("}"):
+                    break
+            token = self._peek()
+            self._tokens[self._position] = Token(token.kind, token.text, 0)
+            lines.append((token.newlines, self._property(depth + 1)))
+
+        closing = self._take("}", line_break=True)
+        if not lines:
+            if closing.newlines > 1:
+                raise UnsupportedExpression("empty lines in an empty object")
+            return "{}"
+        return (
+            "{"
+            + self._join_lines(lines, depth + 1)
+            + self._break(closing.newlines)
+            + self.indent * depth
+            + "}"
+        )
+
+    def _property(self, depth: int) -> str:
+        token = self._peek()
+        if token.kind == "name":
+            if (
+                token.text in ("get", "set")
+                and self._peek(1).kind == "name"
+                and self._peek(2).text == "("
+            ):
+                self._take()
+                name = self._take().text
+                return f"{token.text} {name}{self._function_rest(depth)}"
+
+            self._take()
+            if self._at("("):
+                if token.text in RESERVED_NAMES:
+                    raise UnsupportedExpression(f"unsupported method {token.text!r}")
+                return token.text + self._function_rest(depth)
+            if self._at(",") or self._at("}"):
+                if token.text in RESERVED_NAMES or token.text in ("get", "set"):
+                    raise UnsupportedExpression(f"unsupported {token.text!r}")
+                return token.text
+        elif token.kind in ("string", "number"):
+            self._take()
+        else:
+            raise UnsupportedExpression(f"unsupported property {token.text!r}")
+
+        self._take(":")
+        return f"{token.text}: {self._expression(depth)}"
@@ -0,0 +1,83 @@
+import re
+from typing import Union
+
+from jsbeautifier import BeautifierOptions
+
+# expressions that jsbeautifier prints exactly as they are written, once
+# stripped: an identifier or member path, possibly negated, a number or an
+# array of plain strings, e.g. `open`, `!form.valid`, `$refs.input`, `1.5`
+# or `['tab', 'panel']`
+RE_TRIVIAL = re.compile(
+    r"""
+    !?[a-zA-Z_$][a-zA-Z0-9_$]*(?:\.[a-zA-Z_$][a-zA-Z0-9_$]*)*
+    | [0-9]+(?:\.[0-9]+)?
+    | \[(?:(?:'[a-zA-Z0-9_$ .:/-]*'|"[a-zA-Z0-9_$ .:/-]*")
+           (?:,\ (?:'[a-zA-Z0-9_$ .:/-]*'|"[a-zA-Z0-9_$ .:/-]*"))*)?\]
+    """,
+    re.VERBOSE,
+)
+
+# words the beautifier lays out as statements or operators rather than as
+# plain names, an expression starting with one is never trivial
+KEYWORDS = frozenset(
+    [
+        "async",
+        "await",
+        "break",
+        "case",
+        "catch",
+        "class",
+        "const",
+        "continue",
+        "debugger",
+        "default",
+        "delete",
+        "do",
+        "else",
+        "export",
+        "finally",
+        "for",
+        "function",
+        "if",
+        "import",
+        "in",
+        "instanceof",
+        "let",
+        "new",
+        "return",
+        "switch",
+        "throw",
+        "try",
+        "typeof",
+        "var",
+        "void",
+        "while",
+        "with",
+        "yield",
+    ]
+)
+
+
+def is_trivial_expression(code: str) -> bool:
+    if not code:
+        return True
+    if RE_TRIVIAL.fullmatch(code) is None:
+        return False
+    head = code.lstrip("!").split(".", 1)[0]
+    return head not in KEYWORDS
+
+
+def supports_fast_path(options: Union[BeautifierOptions, dict, None]) -> bool:
+    # the options under which trivial expressions still come out unchanged,
+    # others add indentation, a newline or spaces inside the brackets
+    if options is None:
+        return True
+    if isinstance(options, dict):
+        options = BeautifierOptions(options)
+    return (
+        not options.end_with_newline
+        and not options.indent_level
+        and not options.space_in_paren
+        and not options.wrap_line_length
+        and not options.eval_code
+    )
@@ -0,0 +1,59 @@
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Callable, Iterable, Iterator, Union
+
+from alpine_formatter.scanner import Buffer
+
+
+def read_file(path: Union[str, Path]) -> str:
+    # newline="" keeps the line endings of the template as they are, bytes
+    # that are not UTF-8 are kept too, as lone surrogates that
+    # write_file_atomic turns back into the same bytes
+    with open(path, encoding="utf-8", errors="surrogateescape", newline="") as f:
+        return f.read()
+
+
+@contextmanager
+def map_file(path: Union[str, Path]) -> Iterator[Buffer]:
+    # the raw content of the file, memory mapped so that nothing is read
+    # until it is used, empty files cannot be mapped and a mapped file
+    # cannot be replaced on windows, those are read instead
+    with open(path, "rb") as f:
+        if os.name == "nt" or os.fstat(f.fileno()).st_size == 0:
+            yield f.read()
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def replace_file_atomic(
+    path: Union[str, Path], write: Callable[[IO], None], mode: str = "w"
+) -> None:
+    # write next to the target and rename over it, so an interrupted run
+    # never leaves a truncated template behind
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        if "b" in mode:
+            f = open(fd, mode)
+        else:
+            f = open(fd, mode, encoding="utf-8", errors="surrogateescape", newline="")
+        with f:
+            write(f)
+        os.chmod(tmp_path, path.stat().st_mode & 0o7777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_file_atomic(path: Union[str, Path], content: str) -> None:
+    replace_file_atomic(path, lambda f: f.write(content))
+
+
+def write_parts_atomic(path: Union[str, Path], parts: Iterable[bytes]) -> None:
+    replace_file_atomic(path, lambda f: f.writelines(parts), "wb")
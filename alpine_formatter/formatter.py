@@ -1,6 +1,43 @@
 import re
+import time
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+from functools import partial
+from pathlib import Path
 from re import Match
-from jsbeautifier import beautify
+from typing import (
+    Hashable,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    TextIO,
+    Union,
+)
+
+from jsbeautifier import BeautifierOptions, beautify
+
+from alpine_formatter.backends import (
+    DEFAULT_BACKEND,
+    Backend,
+    get_backend,
+)
+from alpine_formatter.fastpath import is_trivial_expression, supports_fast_path
+from alpine_formatter.files import (
+    map_file,
+    read_file,
+    write_file_atomic,
+    write_parts_atomic,
+)
+from alpine_formatter.scanner import (
+    DIRECTIVE_CHARS,
+    MAX_VALUE_SIZE,
+    Buffer,
+    DirectiveMatch,
+    DirectiveScanner,
+    find_region_end,
+)
+from alpine_formatter.stats import FormatStats
 
 MODIFIERS = r"(\.[a-zA-Z0-9.-]+)*"
 X_DATA = r"x-data"
@@ -46,38 +83,882 @@ RE_PATTERN = re.compile(
     rf"(?<=\s)({DIRECTIVE}\s*=\s*{OPENING_QUOTE}{CODE}{CLOSING_QUOTE}",
     flags=re.DOTALL | re.IGNORECASE,
 )
+RE_NEWLINE = re.compile(r"\n")
+
+
+class PrefilterStats:
+    def __init__(self):
+        self.files_scanned = 0
+        self.files_skipped = 0
+        self.chars_skipped = 0
+
+    def record(self, size: int, skipped: bool) -> None:
+        # `size` is in bytes for UTF-8 encoded content
+        self.files_scanned += 1
+        if skipped:
+            self.files_skipped += 1
+            self.chars_skipped += size
+
+    def reset(self) -> None:
+        self.__init__()
+
+
+PREFILTER_STATS = PrefilterStats()
+
+
+class FastPathStats:
+    # per directive name, without modifiers: how many values were trivial
+    # and returned as they are, and how many went to the beautifier (or its
+    # cache)
+    def __init__(self):
+        self.trivial: Counter = Counter()
+        self.beautified: Counter = Counter()
+
+    @property
+    def avoided(self) -> int:
+        return sum(self.trivial.values())
+
+    def record(self, directive: str, trivial: bool) -> None:
+        name = directive.lower().split(".", 1)[0]
+        if trivial:
+            self.trivial[name] += 1
+        else:
+            self.beautified[name] += 1
+
+    def reset(self) -> None:
+        self.__init__()
+
+
+FAST_PATH_STATS = FastPathStats()
+
+
+def might_contain_directives(content: str) -> bool:
+    # plain substring searches, much cheaper than any regex scan
+    return "x-" in content or ":" in content or "@" in content or "X-" in content
+
+
+class TextEdit(NamedTuple):
+    offset: int
+    length: int
+    replacement: Union[str, bytes]
+
+
+def might_contain_directive_bytes(data: Buffer) -> bool:
+    # `in` does not search for a substring in a memory map
+    return (
+        data.find(b"x-") != -1
+        or data.find(b":") != -1
+        or data.find(b"@") != -1
+        or data.find(b"X-") != -1
+    )
+
+
+def get_byte_column(data: Buffer, offset: int) -> int:
+    # the column, in characters, of a byte offset in UTF-8 encoded data,
+    # like get_indentation_level matches on the first line are at 0
+    line_start = data.rfind(b"\n", 0, offset)
+    if line_start == -1:
+        return 0
+    return len(data[line_start + 1 : offset].decode(errors="surrogateescape"))
+
+
+def iter_edited(data: Buffer, edits: Iterable[TextEdit]) -> Iterator[bytes]:
+    # the pieces of `data` with the byte offset `edits` applied
+    last_end = 0
+    for edit in edits:
+        yield data[last_end : edit.offset]
+        yield edit.replacement
+        last_end = edit.offset + edit.length
+    yield data[last_end:]
+
+
+def iter_matches(content: str) -> Iterator[DirectiveMatch]:
+    # the same matches as RE_PATTERN.finditer, in linear time
+    return DirectiveScanner(content).scan()
+
+
+class LineIndex:
+    # offsets where each line of `content` starts, so any offset can be
+    # mapped to its line and column with a binary search instead of
+    # rescanning (or copying) the text before it
+    def __init__(self, content: str):
+        self.line_starts = [0]
+        self.line_starts.extend(m.end() for m in RE_NEWLINE.finditer(content))
+
+    def line(self, offset: int) -> int:
+        return bisect_right(self.line_starts, offset) - 1
+
+    def column(self, offset: int) -> int:
+        return offset - self.line_starts[self.line(offset)]
+
+    def position(self, offset: int) -> tuple[int, int]:
+        line = self.line(offset)
+        return line, offset - self.line_starts[line]
+
+    def offset(self, line: int, column: int = 0) -> int:
+        return self.line_starts[line] + column
+
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+class SnippetCache:
+    # least recently used cache of beautified snippets, a `maxsize` of 0
+    # disables it
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: str) -> None:
+        if self.maxsize <= 0:
+            return
+
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def resize(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        while len(self._entries) > max(maxsize, 0):
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# shared by every format_alpine call in the process
+SNIPPET_CACHE = SnippetCache()
+
+
+Options = Union[BeautifierOptions, dict, None]
+
+
+def get_options_key(options: Options) -> tuple:
+    if options is None:
+        return ()
+    if isinstance(options, dict):
+        options = BeautifierOptions(options)
+
+    # raw_options only holds what was passed in, the resolved values are
+    # the other attributes
+    return tuple(
+        (name, repr(value))
+        for name, value in sorted(vars(options).items())
+        if name != "raw_options"
+    )
+
+
+def beautify_code(
+    code: str,
+    options: Options = None,
+    options_key: Optional[tuple] = None,
+    cache: SnippetCache = SNIPPET_CACHE,
+) -> str:
+    if options_key is None:
+        options_key = get_options_key(options)
+
+    key = (code, options_key)
+    formatted = cache.get(key)
+    if formatted is None:
+        if options is None:
+            formatted = beautify(code)
+        else:
+            formatted = beautify(code, options)
+        cache.put(key, formatted)
+
+    return formatted
+
+
+class SnippetBeautifier:
+    # beautifies snippets through the cache, creating the backend only once
+    # a snippet misses it
+    def __init__(
+        self,
+        options: Options = None,
+        options_key: Optional[tuple] = None,
+        cache: SnippetCache = SNIPPET_CACHE,
+        backend: str = DEFAULT_BACKEND,
+    ):
+        self.options = options
+        self.options_key = (
+            get_options_key(options) if options_key is None else options_key
+        )
+        if backend != DEFAULT_BACKEND:
+            # backends agree on the output, this only keeps their cached
+            # snippets apart
+            self.options_key += (("backend", backend),)
+        self.cache = cache
+        self.backend_name = backend
+        self.fast_path = supports_fast_path(options)
+        self._backend: Optional[Backend] = None
+
+    @property
+    def backend(self) -> Backend:
+        if self._backend is None:
+            self._backend = get_backend(self.backend_name, self.options)
+        return self._backend
+
+    def beautify(self, code: str) -> str:
+        key = (code, self.options_key)
+        formatted = self.cache.get(key)
+        if formatted is None:
+            formatted = self.backend.beautify(code)
+            self.cache.put(key, formatted)
+        return formatted
+
+    def beautify_match(self, match: Match) -> str:
+        return self.beautify_value(match.group("directive"), match.group("code"))
+
+    def beautify_value(self, directive: str, code: str) -> str:
+        code = code.strip()
+        trivial = self.fast_path and is_trivial_expression(code)
+        FAST_PATH_STATS.record(directive, trivial)
+        return code if trivial else self.beautify(code)
+
+    def beautify_matches(self, matches: Iterable[Match]) -> dict[str, str]:
+        # the formatted code of every distinct value, by its stripped code
+        results = {}
+        for match in matches:
+            code = match.group("code").strip()
+            trivial = self.fast_path and is_trivial_expression(code)
+            FAST_PATH_STATS.record(match.group("directive"), trivial)
+            if code not in results:
+                results[code] = code if trivial else self.beautify(code)
+        return results
+
+
+def get_indentation_level(match: Match, line_index: Optional[LineIndex] = None) -> int:
+    # matches on the first line are not indented, whatever precedes them
+    if line_index is not None:
+        line, column = line_index.position(match.start())
+        return column if line else 0
+
+    line_start = match.string.rfind("\n", 0, match.start())
+    if line_start == -1:
+        return 0
+    return match.start() - line_start - 1
+
+
+def replace_func(
+    match: Match,
+    line_index: Optional[LineIndex] = None,
+    options: Options = None,
+    options_key: Optional[tuple] = None,
+    cache: SnippetCache = SNIPPET_CACHE,
+) -> str:
+    code = match.group("code").strip()
+    trivial = supports_fast_path(options) and is_trivial_expression(code)
+    FAST_PATH_STATS.record(match.group("directive"), trivial)
+    formatted = code if trivial else beautify_code(code, options, options_key, cache)
+    return render_match(match, formatted, line_index)
+
+
+def render_match(
+    match: Match, formatted: str, line_index: Optional[LineIndex] = None
+) -> str:
+    indentation = 0
+    if "\n" in formatted:
+        indentation = get_indentation_level(match, line_index)
+
+    return render_directive(
+        match.group("directive"), match.group("quote"), formatted, indentation
+    )
+
+
+def render_directive(
+    directive: str, quote: str, formatted: str, indentation_level: int
+) -> str:
+    if "\n" not in formatted:
+        return f"{directive}={quote}{formatted}{quote}"
+
+    # every line on a line of its own, indented, in a single replace instead
+    # of concatenating line by line
+    newline = "\n" + " " * indentation_level
+    indented = formatted.replace("\n", newline)
+    return f"{directive}={quote}{newline}{indented}{newline}{quote}"
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def get_partial_directive_start(buffer: str, start: int) -> int:
+    # where the end of the buffer could be the beginning of a directive that
+    # continues in the next chunk, e.g. `@click.prevent =`
+    end = len(buffer)
+    position = end
+    while position > start and buffer[position - 1].isspace():
+        position -= 1
+    if position > start and buffer[position - 1] == "=":
+        position -= 1
+        while position > start and buffer[position - 1].isspace():
+            position -= 1
+
+    name_end = position
+    while position > start and buffer[position - 1] in DIRECTIVE_CHARS:
+        position -= 1
+    return position if position < name_end else end
+
+
+# the openings of the regions the scanner skips, see RE_REGION
+REGION_OPENINGS = ("<script", "<style", "<!--", "{{", "{%", "{#")
+# the longest of the closings of REGION_ENDS
+REGION_CLOSING_SIZE = len("</script")
+
+
+def get_partial_region_start(buffer: str, start: int) -> int:
+    # where the end of the buffer could be the opening of a region that
+    # continues in the next chunk, e.g. `<scr`, `{` or `<script src="a.js"`
+    end = len(buffer)
+    if buffer.endswith("{") and end - 1 >= start:
+        return end - 1
+    position = buffer.rfind("<", start)
+    if position == -1:
+        return end
+
+    tail = buffer[position : position + 8].lower()
+    if any(opening.startswith(tail) for opening in REGION_OPENINGS):
+        return position
+    # an opening tag whose `>` is still to come
+    if (
+        tail.startswith(REGION_OPENINGS[:2])
+        and buffer.find(">", position) == -1
+        and end - position <= MAX_VALUE_SIZE
+    ):
+        return position
+    return end
+
+
+class AlpineFormatter:
+    # built once and reused: holds the resolved beautifier options, their
+    # cache key, a beautifier and the snippet cache, which would otherwise be
+    # set up again on every call
+    def __init__(
+        self,
+        options: Options = None,
+        cache: Optional[SnippetCache] = None,
+        backend: str = DEFAULT_BACKEND,
+        stats: Optional[FormatStats] = None,
+        **beautifier_options,
+    ):
+        if beautifier_options:
+            if isinstance(options, BeautifierOptions):
+                raise TypeError("pass either BeautifierOptions or keyword options")
+            options = {**(options or {}), **beautifier_options}
+        if isinstance(options, dict):
+            options = BeautifierOptions(options)
+
+        self.options: Optional[BeautifierOptions] = options
+        self.options_key = get_options_key(options)
+        self.cache = SnippetCache() if cache is None else cache
+        self.backend = backend
+        self.beautifier = SnippetBeautifier(
+            options, self.options_key, self.cache, backend
+        )
+        # timings are only taken with a stats object, so that a formatter
+        # without one runs the same code as before
+        self.stats = stats
+
+    def format(self, content: str, batch: bool = True) -> str:
+        if self.stats is not None:
+            start = time.perf_counter()
+            result = self._format_with_stats(content)
+            self.stats.add_file("<string>", len(content), time.perf_counter() - start)
+            return result
+
+        return "".join(self.iter_parts(content, batch))
+
+    def format_to(self, content: str, writable: TextIO, batch: bool = True) -> None:
+        # writes the formatted content without ever joining it into one
+        # string
+        if self.stats is not None:
+            writable.write(self.format(content))
+        else:
+            writable.writelines(self.iter_parts(content, batch))
+
+    def _might_contain_directives(self, content: str) -> bool:
+        skipped = not might_contain_directives(content)
+        PREFILTER_STATS.record(len(content), skipped)
+        return not skipped
+
+    def iter_parts(self, content: str, batch: bool = True) -> Iterator[str]:
+        # the formatted content as the slices of `content` between the
+        # directives and their replacements, each slice is only taken when
+        # it is needed
+        if not self._might_contain_directives(content):
+            yield content
+            return
+
+        matches = list(iter_matches(content))
+        if not matches:
+            yield content
+            return
+
+        line_index = LineIndex(content)
+        if batch:
+            # beautify every distinct snippet of the file with one
+            # beautifier, then splice the results back in
+            formatted = self.beautifier.beautify_matches(matches)
+            func = lambda match: render_match(  # noqa: E731
+                match, formatted[match.group("code").strip()], line_index
+            )
+        elif self.backend != DEFAULT_BACKEND:
+            func = lambda match: render_match(  # noqa: E731
+                match, self.beautifier.beautify_match(match), line_index
+            )
+        else:
+            func = partial(
+                replace_func,
+                line_index=line_index,
+                options=self.options,
+                options_key=self.options_key,
+                cache=self.cache,
+            )
+
+        last_end = 0
+        for match in matches:
+            yield content[last_end : match.start()]
+            yield func(match)
+            last_end = match.end()
+        yield content[last_end:]
+
+    def _format_with_stats(self, content: str) -> str:
+        # format() recording each phase, every directive is beautified on its
+        # own (through the snippet cache) so that it can be timed
+        stats = self.stats
+        timer = time.perf_counter
+        start = timer()
+        if not self._might_contain_directives(content):
+            stats.add_phase("prefilter", len(content), timer() - start)
+            return content
+        stats.add_phase("prefilter", len(content), timer() - start)
+
+        start = timer()
+        matches = list(iter_matches(content))
+        stats.add_phase("scan", len(content), timer() - start)
+        if not matches:
+            return content
+
+        start = timer()
+        line_index = LineIndex(content)
+        stats.add_phase("line_index", len(content), timer() - start)
+
+        parts = []
+        last_end = 0
+        for match in matches:
+            start = timer()
+            formatted = self.beautifier.beautify_match(match)
+            beautified = timer()
+            indentation = 0
+            if "\n" in formatted:
+                indentation = get_indentation_level(match, line_index)
+            indented = timer()
+            parts.append(content[last_end : match.start()])
+            parts.append(
+                render_directive(
+                    match.group("directive"),
+                    match.group("quote"),
+                    formatted,
+                    indentation,
+                )
+            )
+            last_end = match.end()
+            stats.add_snippet(
+                match.group("directive"),
+                match.group("code"),
+                beautified - start,
+                indented - beautified,
+                timer() - indented,
+            )
+        parts.append(content[last_end:])
+
+        start = timer()
+        result = "".join(parts)
+        stats.add_phase("join", len(result), timer() - start)
+        return result
+
+    def iter_byte_edits(self, data: Buffer) -> Iterator[TextEdit]:
+        # the edits, in byte offsets and with encoded replacements, that
+        # format the UTF-8 encoded `data`, only the directives are decoded,
+        # so the rest of it is never copied or checked to be valid UTF-8,
+        # like read_file bytes that are not keep their place
+        skipped = not might_contain_directive_bytes(data)
+        PREFILTER_STATS.record(len(data), skipped)
+        if skipped:
+            return
+
+        for match in DirectiveScanner(data).scan():
+            directive = match.group("directive").decode("ascii")
+            formatted = self.beautifier.beautify_value(
+                directive, match.group("code").decode(errors="surrogateescape")
+            )
+            indentation = 0
+            if "\n" in formatted:
+                indentation = get_byte_column(data, match.start())
+            replacement = render_directive(
+                directive, match.group("quote").decode(), formatted, indentation
+            ).encode(errors="surrogateescape")
+            if replacement != match.group(0):
+                yield TextEdit(match.start(), match.end() - match.start(), replacement)
+
+    def format_bytes(self, data: Buffer) -> bytes:
+        # format() for UTF-8 encoded content
+        edits = list(self.iter_byte_edits(data))
+        if not edits and isinstance(data, bytes):
+            return data
+        return b"".join(iter_edited(data, edits))
+
+    def get_edits(self, content: str) -> list[TextEdit]:
+        # the directives format() rewrites, as edits of `content`
+        if not self._might_contain_directives(content):
+            return []
+        matches = list(iter_matches(content))
+        if not matches:
+            return []
+
+        formatted = self.beautifier.beautify_matches(matches)
+        line_index = LineIndex(content)
+        edits = []
+        for match in matches:
+            replacement = render_match(
+                match, formatted[match.group("code").strip()], line_index
+            )
+            if replacement != match.group(0):
+                edits.append(
+                    TextEdit(match.start(), match.end() - match.start(), replacement)
+                )
+        return edits
+
+    def check(self, content: str) -> bool:
+        # whether format() would leave `content` unchanged, stopping at the
+        # first directive that would be rewritten
+        if not self._might_contain_directives(content):
+            return True
+
+        line_index = None
+        for match in iter_matches(content):
+            formatted = self.beautifier.beautify_match(match)
+            if "\n" in formatted and line_index is None:
+                line_index = LineIndex(content)
+            if render_match(match, formatted, line_index) != match.group(0):
+                return False
+        return True
+
+    def format_ranges(
+        self, content: str, ranges: Iterable[tuple[int, int]], lines: bool = False
+    ) -> list[TextEdit]:
+        # the edits that format the directives overlapping the half-open
+        # `ranges` of offsets, or of 0-based line numbers with `lines`, an
+        # empty range selects the directive around it
+        line_index = LineIndex(content)
+        spans = []
+        for start, end in ranges:
+            if lines:
+                start = line_index.offset(min(start, len(line_index.line_starts) - 1))
+                end = (
+                    line_index.offset(end)
+                    if end < len(line_index.line_starts)
+                    else len(content)
+                )
+            spans.append((start, max(end, start + 1)))
+        if not spans or not self._might_contain_directives(content):
+            return []
+
+        spans.sort()
+        last_end = max(end for _, end in spans)
+        edits = []
+        span = 0
+        for match in iter_matches(content):
+            if match.start() >= last_end:
+                break
+            while spans[span][1] <= match.start():
+                span += 1
+            if spans[span][0] >= match.end():
+                continue
+
+            formatted = self.beautifier.beautify_match(match)
+            replacement = render_match(match, formatted, line_index)
+            if replacement != match.group(0):
+                edits.append(
+                    TextEdit(match.start(), match.end() - match.start(), replacement)
+                )
+        return edits
+
+    def format_chunks(
+        self, readable: TextIO, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> Iterator[str]:
+        # yields the formatted content of `readable` in pieces, only holding
+        # the text read since the last complete directive, so memory is
+        # bounded by the chunk size plus the largest directive rather than
+        # the file size
+        buffer = ""
+        # buffer[:start] was already yielded, it is kept so the scanner can
+        # see the character before the first unprocessed one
+        start = 0
+        # the column of buffer[0], None while still on the first line
+        buffer_column: Optional[int] = None
+        # what closes the script, style or comment element the stream is in,
+        # its content is passed through as it is until then
+        closing = None
+        eof = False
+
+        while not eof:
+            # at least as much as is held back, so that what is held back is
+            # only scanned again a few times, however far its end is
+            data = readable.read(max(chunk_size, len(buffer) - start))
+            eof = not data
+            buffer += data
+
+            scan_from = start
+            matches = []
+            if closing is not None:
+                region_end = find_region_end(buffer, closing, start, len(buffer))
+                if region_end != -1:
+                    closing = None
+                    scan_from = region_end
+                elif eof:
+                    end = len(buffer)
+                else:
+                    # all but what could be the start of the closing
+                    end = max(len(buffer) - REGION_CLOSING_SIZE + 1, start)
+
+            if closing is None:
+                # a directive without its closing quote yet is held back
+                # until more content arrives, as are a directive name cut by
+                # the chunk boundary and a template tag (or the opening of a
+                # region) that is not closed yet, so that chunks find the
+                # same directives as a whole file
+                endpos = None if eof else get_partial_region_start(buffer, scan_from)
+                scanner = DirectiveScanner(buffer, endpos)
+                matches = list(scanner.scan(scan_from, stop_at_unterminated=not eof))
+                if eof:
+                    end = len(buffer)
+                elif scanner.open_region is not None:
+                    end = scanner.open_region.content_start
+                    closing = scanner.open_region.closing
+                elif scanner.unterminated is not None:
+                    # a `{{` can start with the character kept from before
+                    end = max(scanner.unterminated, start)
+                else:
+                    end = min(
+                        scanner.endpos, get_partial_directive_start(buffer, scan_from)
+                    )
+
+            formatted = self.beautifier.beautify_matches(matches)
+
+            parts = []
+            last_end = start
+            for match in matches:
+                parts.append(buffer[last_end : match.start()])
+                code = match.group("code").strip()
+                indentation = 0
+                if "\n" in formatted[code]:
+                    line_start = buffer.rfind("\n", 0, match.start())
+                    if line_start != -1:
+                        indentation = match.start() - line_start - 1
+                    elif buffer_column is not None:
+                        indentation = buffer_column + match.start()
+                parts.append(
+                    render_directive(
+                        match.group("directive"),
+                        match.group("quote"),
+                        formatted[code],
+                        indentation,
+                    )
+                )
+                last_end = match.end()
+            # text before `end` is never held back after it was yielded
+            assert end >= last_end
+            parts.append(buffer[last_end:end])
+
+            output = "".join(parts)
+            if output:
+                yield output
+
+            if end > start:
+                keep = end - 1
+                line_start = buffer.rfind("\n", 0, keep)
+                if line_start != -1:
+                    buffer_column = keep - line_start - 1
+                elif buffer_column is not None:
+                    buffer_column += keep
+                buffer = buffer[keep:]
+                start = 1
+
+    def format_stream(
+        self,
+        readable: TextIO,
+        writable: TextIO,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> None:
+        for output in self.format_chunks(readable, chunk_size):
+            writable.write(output)
+
+    def format_file(
+        self,
+        path: Union[str, Path],
+        cache=None,
+        check: bool = False,
+        lines: Optional[Iterable[tuple[int, int]]] = None,
+    ) -> bool:
+        # returns whether the file was (or with `check`, would be)
+        # rewritten, files the on-disk cache knows to be formatted are not
+        # even read, others are memory mapped and only their directives are
+        # decoded, a file without edits is neither copied nor written, with
+        # `lines` only the directives overlapping these line ranges (see
+        # format_ranges) are formatted
+        path = Path(path)
+        if cache is not None and not cache.is_changed(path):
+            return False
+        if lines is not None:
+            return self._format_file_lines(path, lines, check)
+        if self.stats is not None:
+            return self._format_file_with_stats(path, check)
+
+        with map_file(path) as data:
+            edits = self.iter_byte_edits(data)
+            if check:
+                return next(edits, None) is not None
+
+            edits = list(edits)
+            if not edits:
+                return False
+            write_parts_atomic(path, iter_edited(data, edits))
+        return True
+
+    def _format_file_lines(
+        self, path: Path, lines: Iterable[tuple[int, int]], check: bool
+    ) -> bool:
+        content = read_file(path)
+        edits = self.format_ranges(content, lines, lines=True)
+        if check or not edits:
+            return bool(edits)
+
+        write_file_atomic(path, apply_edits(content, edits))
+        return True
+
+    def _format_file_with_stats(self, path: Path, check: bool) -> bool:
+        stats = self.stats
+        timer = time.perf_counter
+        file_start = timer()
+        content = read_file(path)
+        stats.add_phase("read", len(content), timer() - file_start)
+
+        if check:
+            start = timer()
+            changed = not self.check(content)
+            stats.add_phase("check", len(content), timer() - start)
+        else:
+            result = self._format_with_stats(content)
+            changed = result != content
+            if changed:
+                start = timer()
+                write_file_atomic(path, result)
+                stats.add_phase("write", len(result), timer() - start)
+
+        stats.add_file(str(path), len(content), timer() - file_start)
+        return changed
+
+
+# used by the module level functions, with the process wide snippet cache
+DEFAULT_FORMATTER = AlpineFormatter(cache=SNIPPET_CACHE)
+
+
+def get_formatter(
+    options: Options = None,
+    backend: Optional[str] = None,
+    stats: Optional[FormatStats] = None,
+) -> AlpineFormatter:
+    backend = backend or DEFAULT_BACKEND
+    if options is None and backend == DEFAULT_BACKEND and stats is None:
+        return DEFAULT_FORMATTER
+    return AlpineFormatter(options, cache=SNIPPET_CACHE, backend=backend, stats=stats)
+
+
+def format_alpine(
+    content: str,
+    options: Options = None,
+    batch: bool = True,
+    stats: Optional[FormatStats] = None,
+    minify: bool = False,
+) -> str:
+    # with `minify` the code of the directives is collapsed instead, see
+    # minify_alpine
+    if minify:
+        from alpine_formatter.minify import minify_alpine
+
+        return minify_alpine(content)
+    return get_formatter(options, stats=stats).format(content, batch)
+
+
+def format_alpine_to(
+    content: str, writable: TextIO, options: Options = None, batch: bool = True
+) -> None:
+    get_formatter(options).format_to(content, writable, batch)
 
 
-def get_indentation_level(match: Match) -> int:
-    before_match = match.string[: match.start()]
-    reverse = before_match[::-1]
+def check_alpine(content: str, options: Options = None) -> bool:
+    return get_formatter(options).check(content)
 
-    if "\n" in reverse:
-        return reverse.index("\n")
-    return 0
 
+def format_alpine_ranges(
+    content: str,
+    ranges: Iterable[tuple[int, int]],
+    options: Options = None,
+    lines: bool = False,
+) -> list[TextEdit]:
+    return get_formatter(options).format_ranges(content, ranges, lines)
 
-def replace_func(match: Match) -> str:
-    formatted = beautify(match.group("code").strip())
-    directive = match.group("directive")
-    quote = match.group("quote")
-    before_closing = ""
 
-    is_multiline = "\n" in formatted
+def apply_edits(content: str, edits: Iterable[TextEdit]) -> str:
+    parts = []
+    last_end = 0
+    for edit in sorted(edits):
+        parts.append(content[last_end : edit.offset])
+        parts.append(edit.replacement)
+        last_end = edit.offset + edit.length
+    parts.append(content[last_end:])
+    return "".join(parts)
 
-    if is_multiline:
-        indentation = " " * get_indentation_level(match)
 
-        indented_formatted = ""
-        for line in formatted.split("\n"):
-            indented_formatted += f"\n{indentation}{line}"
+def format_alpine_chunks(
+    readable: TextIO, options: Options = None, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[str]:
+    return get_formatter(options).format_chunks(readable, chunk_size)
 
-        formatted = indented_formatted
-        before_closing = "\n" + indentation
 
-    return f"{directive}={quote}{formatted}{before_closing}{quote}"
+def format_alpine_stream(
+    readable: TextIO,
+    writable: TextIO,
+    options: Options = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> None:
+    get_formatter(options).format_stream(readable, writable, chunk_size)
 
 
-def format_alpine(content: str) -> str:
-    result = RE_PATTERN.sub(replace_func, content)
-    return result
+def format_file(
+    path: Union[str, Path],
+    options: Options = None,
+    cache=None,
+    check: bool = False,
+    stats: Optional[FormatStats] = None,
+    lines: Optional[Iterable[tuple[int, int]]] = None,
+) -> bool:
+    return get_formatter(options, stats=stats).format_file(path, cache, check, lines)
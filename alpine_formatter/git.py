@@ -0,0 +1,122 @@
+import os
+import re
+import subprocess
+from pathlib import Path
+from typing import Optional, Sequence
+
+# `@@ -1,2 +3,4 @@`, the start and length of the new lines, a missing length
+# is 1
+RE_HUNK = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+# 0-based half-open line ranges by file, None for the whole file
+ChangedFiles = dict[Path, Optional[list[tuple[int, int]]]]
+
+
+class GitError(Exception):
+    pass
+
+
+def git(*args: str, cwd: Optional[Path] = None) -> str:
+    try:
+        process = subprocess.run(
+            ["git", *args],
+            cwd=cwd,
+            capture_output=True,
+            encoding="utf-8",
+            errors="surrogateescape",
+        )
+    except OSError as e:
+        raise GitError(f"cannot run git: {e}") from None
+    if process.returncode:
+        raise GitError(process.stderr.strip() or f"git {args[0]} failed")
+    return process.stdout
+
+
+def parse_diff(diff: str, root: Path) -> ChangedFiles:
+    # the added or changed lines of each file of a `--unified=0` diff, a
+    # hunk that only removes lines is the empty range where they were
+    changed: ChangedFiles = {}
+    ranges: Optional[list] = None
+    # added lines can start with "+++" too, names are only in the headers
+    header = False
+    # splitlines() would also split at form feeds and the like in the content
+    for line in diff.split("\n"):
+        if line.startswith("diff "):
+            header = True
+        elif header and line.startswith("+++ "):
+            name = line[4:]
+            if name == "/dev/null":
+                ranges = None
+                continue
+
+            # quotePath is off, only names with control characters or
+            # quotes are still quoted, and names with spaces are followed by
+            # a tab
+            if name.startswith('"'):
+                name = (
+                    name[1:-1]
+                    .encode("latin-1", "backslashreplace")
+                    .decode("unicode_escape")
+                )
+            else:
+                name = name.removesuffix("\t")
+            ranges = changed.setdefault(root / name[2:], [])
+        elif line.startswith("@@"):
+            header = False
+            hunk = RE_HUNK.match(line)
+            if hunk is None or ranges is None:
+                continue
+            start = int(hunk.group(1))
+            length = 1 if hunk.group(2) is None else int(hunk.group(2))
+            if length:
+                ranges.append((start - 1, start - 1 + length))
+            else:
+                # the lines were removed after line `start`
+                ranges.append((start, start))
+    return changed
+
+
+def get_changed_files(
+    paths: Sequence[str] = (),
+    base: Optional[str] = None,
+    staged: bool = False,
+    cwd: Optional[Path] = None,
+) -> ChangedFiles:
+    # the files under `paths` that differ from `base` (HEAD by default) in
+    # the working tree, or with `staged` in the index, with their changed
+    # lines, untracked files count as changed as a whole unless `staged`,
+    # the paths are relative to `cwd`
+    cwd = Path(cwd or ".").resolve()
+    root = Path(git("rev-parse", "--show-toplevel", cwd=cwd).strip())
+    args = ["-c", "core.quotePath=false", "diff", "--unified=0", "--no-color"]
+    # whatever diff.noprefix and diff.mnemonicPrefix say
+    args += ["--no-ext-diff", "--diff-filter=d", "--src-prefix=a/", "--dst-prefix=b/"]
+    if staged:
+        args.append("--cached")
+    args += [base or "HEAD", "--", *paths]
+    changed = parse_diff(git(*args, cwd=cwd), root)
+
+    if staged and changed:
+        # the lines are those of the index, but the files in the working
+        # tree are formatted
+        unstaged = git(
+            "diff", "--name-only", "-z", "--no-ext-diff", "--", *paths, cwd=cwd
+        )
+        conflicts = sorted(
+            name
+            for name in filter(None, unstaged.split("\0"))
+            if root / name in changed
+        )
+        if conflicts:
+            raise GitError(
+                "unstaged changes in files with staged changes, stage or stash"
+                f" them first: {', '.join(conflicts)}"
+            )
+
+    if not staged:
+        untracked = git(
+            "ls-files", "--others", "--exclude-standard", "-z", "--", *paths, cwd=cwd
+        )
+        for name in filter(None, untracked.split("\0")):
+            changed[cwd / name] = None
+    return {Path(os.path.relpath(path, cwd)): lines for path, lines in changed.items()}
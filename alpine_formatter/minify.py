@@ -0,0 +1,249 @@
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from alpine_formatter.files import read_file, write_file_atomic
+from alpine_formatter.formatter import (
+    DEFAULT_CACHE_SIZE,
+    iter_matches,
+    might_contain_directives,
+)
+
+# the tokens whitespace can be dropped around, anything the tokenizer does
+# not know leaves the code as it is
+RE_MINIFY_TOKEN = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<comment>//[^\n\r\u2028\u2029]*|/\*.*?\*/)
+    | (?P<string>'(?:[^'\\\n\r]|\\.)*'|"(?:[^"\\\n\r]|\\.)*")
+    | (?P<name>[\w$\u0080-\uffff]+)
+    | (?P<template>`)
+    | (?P<punct>
+        >>>=|\.\.\.|===|!==|\*\*=|<<=|>>=|>>>|\?\?=|&&=|\|\|=
+        | =>|==|!=|<=|>=|&&|\|\||\?\?|\?\.|\+\+|--|\+=|-=|\*=|/=|%=|&=|\|=|\^=
+        | \*\*|<<|>>|[-+*/%<>=!?:,.()\[\]{};~&|^@\#]
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+RE_REGEX = re.compile(r"/(?:[^/\\\[\n\r]|\\.|\[(?:[^\]\\\n\r]|\\.)*\])+/[\w$]*")
+RE_LINE_TERMINATOR = re.compile(r"[\n\r\u2028\u2029]")
+
+# after these a `/` starts a regex rather than a division
+REGEX_KEYWORDS = frozenset(
+    ["return", "typeof", "instanceof", "in", "of", "new", "delete", "void"]
+    + ["throw", "case", "do", "else", "yield", "await"]
+)
+# a line break after these ends the statement
+RESTRICTED_KEYWORDS = frozenset(
+    ["return", "break", "continue", "throw", "yield", "async"]
+)
+# punctuation that can end an expression, a line break after it may end the
+# statement
+CLOSING_PUNCT = frozenset([")", "]", "}", "++", "--"])
+# punctuation that starts a new statement after a line break, where that
+# line break matters
+OPENING_PUNCT = frozenset(["{", "!", "~", "++", "--", "...", "@", "#"])
+
+
+class MinifyError(ValueError):
+    pass
+
+
+def skip_template(code: str, position: int) -> int:
+    # the end of the template literal whose backtick is at `position`, the
+    # code of its substitutions is tokenized to find where they end
+    position += 1
+    while position < len(code):
+        char = code[position]
+        if char == "\\":
+            position += 2
+        elif char == "`":
+            return position + 1
+        elif code.startswith("${", position):
+            for _, _, position in iter_tokens(code, position + 2, True):
+                pass
+        else:
+            position += 1
+    raise MinifyError("unterminated template literal")
+
+
+def next_token(code: str, position: int, regex_allowed: bool) -> tuple[str, str, int]:
+    if (
+        regex_allowed
+        and code[position] == "/"
+        and code[position + 1 : position + 2] not in ("/", "*")
+    ):
+        match = RE_REGEX.match(code, position)
+        if match is not None:
+            return "regex", match.group(), match.end()
+
+    match = RE_MINIFY_TOKEN.match(code, position)
+    if match is None:
+        raise MinifyError(f"unexpected {code[position]!r}")
+    kind = match.lastgroup
+    if kind == "template":
+        end = skip_template(code, position)
+        return kind, code[position:end], end
+    return kind, match.group(), match.end()
+
+
+def is_regex_allowed(previous: Optional[tuple[str, str]]) -> bool:
+    # whether a `/` after the token starts a regex rather than a division
+    if previous is None:
+        return True
+    kind, text = previous
+    if kind == "name":
+        return text in REGEX_KEYWORDS
+    return kind == "punct" and text not in CLOSING_PUNCT
+
+
+def iter_tokens(
+    code: str, position: int = 0, substitution: bool = False
+) -> Iterator[tuple[str, str, int]]:
+    # the kind, text and end of the tokens from `position`, with
+    # `substitution` up to the brace closing a template substitution
+    previous: Optional[tuple[str, str]] = None
+    depth = 0
+    while position < len(code):
+        kind, text, position = next_token(code, position, is_regex_allowed(previous))
+        yield kind, text, position
+        if kind in ("space", "comment"):
+            continue
+        previous = (kind, text)
+        if substitution and kind == "punct":
+            if text == "{":
+                depth += 1
+            elif text == "}":
+                if not depth:
+                    return
+                depth -= 1
+    if substitution:
+        raise MinifyError("unterminated template literal")
+
+
+def is_word_char(char: str) -> bool:
+    return char.isalnum() or char in "_$\\" or char > "\x7f"
+
+
+def needs_space(before: str, after: str) -> bool:
+    # whether the tokens would read differently without the space between
+    last, first = before[-1], after[0]
+    if is_word_char(last) and is_word_char(first):
+        return True
+    if last in "+-" and first == last:
+        return True
+    if last == "/" and first in "/*":
+        return True
+    # `-->` starts a comment in scripts, see spells_html_comment for `<!--`
+    if before.endswith("--") and first == ">":
+        return True
+    # `1 .toString()`
+    return before[0].isdigit() and first == "."
+
+
+def spells_html_comment(tokens: list, index: int) -> bool:
+    # whether dropping the space before the token at `index` would spell
+    # `<!--`, which starts a comment in scripts, `!` and `--` are tokens of
+    # their own so this takes the tokens around it
+    def text(at: int) -> str:
+        return tokens[at][1] if 0 <= at < len(tokens) else ""
+
+    if text(index) == "!":
+        return text(index - 1).endswith("<") and text(index + 1).startswith("--")
+    # with a space before `!` the `<` is already apart
+    return (
+        text(index).startswith("--")
+        and text(index - 1) == "!"
+        and not tokens[index - 1][2]
+        and text(index - 2).endswith("<")
+    )
+
+
+def can_drop_line_break(before: tuple[str, str], after: tuple[str, str]) -> bool:
+    # whether automatic semicolon insertion is sure not to happen at a line
+    # break between the tokens: it happens after `return` and the like, and
+    # when the next token cannot continue the statement
+    before_kind, before_text = before
+    after_kind, after_text = after
+    if before_kind == "name" and before_text in RESTRICTED_KEYWORDS:
+        return False
+    if before_kind == "punct" and before_text not in CLOSING_PUNCT:
+        return True
+    return after_kind == "punct" and after_text not in OPENING_PUNCT
+
+
+@lru_cache(maxsize=DEFAULT_CACHE_SIZE)
+def minify_code(code: str) -> str:
+    # the code without comments and without any whitespace that does not
+    # change its meaning, a line break is only kept where it may end a
+    # statement, code that cannot be tokenized is only stripped
+    try:
+        return "".join(iter_minified(code))
+    except MinifyError:
+        return code.strip()
+
+
+def iter_minified(code: str) -> Iterator[str]:
+    # the kind and text of the tokens, with whether there was whitespace or
+    # a comment before them and whether it had a line break
+    tokens = []
+    gap = line_break = False
+    for kind, text, _ in iter_tokens(code):
+        if kind in ("space", "comment"):
+            gap = True
+            line_break = line_break or RE_LINE_TERMINATOR.search(text) is not None
+            continue
+
+        tokens.append((kind, text, gap, line_break))
+        gap = line_break = False
+
+    for index, (kind, text, gap, line_break) in enumerate(tokens):
+        if index and gap:
+            previous = tokens[index - 1][:2]
+            if line_break and not can_drop_line_break(previous, (kind, text)):
+                yield "\n"
+            elif needs_space(previous[1], text) or spells_html_comment(tokens, index):
+                yield " "
+        yield text
+
+
+def iter_minified_parts(content: str) -> Iterator[str]:
+    # the content with the code of every directive minified, the same
+    # directives as format_alpine with the same quotes
+    if not might_contain_directives(content):
+        yield content
+        return
+
+    last_end = 0
+    for match in iter_matches(content):
+        yield content[last_end : match.start()]
+        yield (
+            f"{match.group('directive')}={match.group('quote')}"
+            f"{minify_code(match.group('code'))}{match.group('quote')}"
+        )
+        last_end = match.end()
+    yield content[last_end:]
+
+
+def minify_alpine(content: str) -> str:
+    return "".join(iter_minified_parts(content))
+
+
+def get_saved_bytes(content: str, minified: str) -> int:
+    return len(content.encode("utf-8", "surrogateescape")) - len(
+        minified.encode("utf-8", "surrogateescape")
+    )
+
+
+def minify_file(path: Union[str, Path], check: bool = False) -> int:
+    # returns how many bytes minifying saves, the file is only written when
+    # that is any and not with `check`
+    content = read_file(path)
+    minified = minify_alpine(content)
+    if minified == content:
+        return 0
+    if not check:
+        write_file_atomic(path, minified)
+    return get_saved_bytes(content, minified)
@@ -0,0 +1,393 @@
+import re
+from functools import lru_cache
+from mmap import mmap
+from re import Pattern
+from typing import Iterator, NamedTuple, Optional, Union
+
+Buffer = Union[bytes, mmap]
+
+# every directive starts with `x-`, `:` or `@` right after a whitespace, this
+# matches such a candidate up to the opening quote of its value: the name is
+# a run of DIRECTIVE_CHARS, which can neither contain whitespace nor `=`, so this only
+# ever backtracks one step per character and never across candidates
+RE_HEAD = re.compile(r"\s((?:[xX]-|[:@])[-a-zA-Z0-9:@.]*)\s*=\s*(['\"])")
+
+# the characters \s matches in a str, UTF-8 encoded: a bytes \s only matches
+# ASCII whitespace
+WHITESPACE_BYTES = (
+    rb"(?:[\s\x1c-\x1f]|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]"
+    rb"|\xe2\x81\x9f|\xe3\x80\x80)"
+)
+RE_WHITESPACE_BYTES = re.compile(WHITESPACE_BYTES)
+# RE_HEAD for UTF-8 encoded content, with the same offsets in bytes: an
+# alternation in front makes every search much slower, so it only matches
+# the last byte of the whitespace, and a candidate after a non-ASCII byte
+# is checked with ends_with_whitespace()
+RE_HEAD_BYTES = re.compile(
+    rb"[\s\x1c-\x1f\x80-\x8a\x9f\xa0\xa8\xa9\xaf]"
+    + rb"((?:[xX]-|[:@])[-a-zA-Z0-9:@.]*)"
+    + WHITESPACE_BYTES
+    + rb"*="
+    + WHITESPACE_BYTES
+    + rb"*(['\"])"
+)
+
+# where regions start that are not markup: the content of `<script>` and
+# `<style>` elements (after their opening tag), HTML comments and Jinja, Twig
+# and Blade tags, directives are never looked for in them
+RE_REGION = re.compile(r"<(?:(script|style)\b|!--)|\{[{%#]", re.IGNORECASE)
+RE_REGION_BYTES = re.compile(rb"<(?:(script|style)\b|!--)|\{[{%#]", re.IGNORECASE)
+# the end of each region, by its opening
+REGION_ENDS = {
+    "script": re.compile(r"</script", re.IGNORECASE),
+    "style": re.compile(r"</style", re.IGNORECASE),
+    "<!--": "-->",
+    "{{": "}}",
+    "{%": "%}",
+    "{#": "#}",
+}
+REGION_ENDS_BYTES = {
+    b"script": re.compile(rb"</script", re.IGNORECASE),
+    b"style": re.compile(rb"</style", re.IGNORECASE),
+    b"<!--": b"-->",
+    b"{{": b"}}",
+    b"{%": b"%}",
+    b"{#": b"#}",
+}
+
+
+def find_region_end(
+    content: Union[str, Buffer],
+    closing: Union[str, bytes, Pattern],
+    position: int,
+    endpos: int,
+) -> int:
+    # where `closing`, one of REGION_ENDS, is first found from `position`
+    if isinstance(closing, Pattern):
+        match = closing.search(content, position, endpos)
+        return -1 if match is None else match.start()
+    return content.find(closing, position, endpos)
+
+
+# how far a closing quote, the end of a template tag or the `>` of an opening
+# tag is looked for, in characters (bytes when scanning bytes): a value that
+# is not closed within this is not one, so a stream never holds back more
+# than this for it
+MAX_VALUE_SIZE = 1 << 20
+
+
+class Region(NamedTuple):
+    # `start` is where the opening starts, `content_start` where the
+    # region does, and `end` where it is closed, -1 while it is not,
+    # `closing` is what closes a region that runs to the end of the content
+    # when it is never closed, like script, style and comment elements
+    start: int
+    content_start: int
+    end: int
+    closing: Union[str, bytes, Pattern, None] = None
+
+
+DIRECTIVE_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-:@."
+)
+NAME_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789-")
+MODIFIER_CHARS = NAME_CHARS | {"."}
+
+# the directives of ALL_DIRECTIVES that take no modifiers, lowercased
+PLAIN_DIRECTIVES = frozenset(
+    [
+        "x-data",
+        "x-init",
+        "x-text",
+        "x-html",
+        "x-modelable",
+        "x-for",
+        "x-effect",
+        "x-ref",
+        "x-if",
+        "x-id",
+    ]
+)
+MODIFIABLE_DIRECTIVES = ("x-show", "x-model")
+
+
+def is_modifiers(text: str) -> bool:
+    # MODIFIERS, zero or more of `.` followed by at least one of [a-z0-9.-]
+    if not text:
+        return True
+    return text[0] == "." and len(text) > 1 and set(text) <= MODIFIER_CHARS
+
+
+@lru_cache(maxsize=1024)
+def is_directive(name: str) -> bool:
+    # the same names as the DIRECTIVE pattern, without any backtracking
+    name = name.lower()
+    if name in PLAIN_DIRECTIVES:
+        return True
+
+    for directive in MODIFIABLE_DIRECTIVES:
+        if name.startswith(directive):
+            return is_modifiers(name[len(directive) :])
+
+    if name.startswith(":") or name.startswith("x-bind:"):
+        attribute = name[name.index(":") + 1 :]
+        return bool(attribute) and set(attribute) <= NAME_CHARS
+
+    if name.startswith("@") or name.startswith("x-on:"):
+        event = name[1:] if name[0] == "@" else name[5:]
+        length = 0
+        while length < len(event) and event[length] in NAME_CHARS:
+            length += 1
+        return length > 0 and is_modifiers(event[length:])
+
+    return False
+
+
+def ends_with_whitespace(data: Buffer, end: int) -> bool:
+    # whether a whitespace character of WHITESPACE_BYTES ends at `end`
+    if data[end - 1] < 0x80:
+        return True
+    return any(
+        size <= end and RE_WHITESPACE_BYTES.fullmatch(data, end - size, end)
+        for size in (2, 3)
+    )
+
+
+@lru_cache(maxsize=1024)
+def is_directive_bytes(name: bytes) -> bool:
+    # directive names are ASCII, anything else is not one
+    return name.isascii() and is_directive(name.decode("ascii"))
+
+
+class DirectiveMatch:
+    # quacks like the re.Match of RE_PATTERN for the groups we use, the
+    # groups are bytes when scanning bytes
+    __slots__ = ("string", "_start", "_end", "_directive_end", "_code_start")
+
+    def __init__(
+        self, string: str, start: int, directive_end: int, code_start: int, end: int
+    ):
+        self.string = string
+        self._start = start
+        self._directive_end = directive_end
+        self._code_start = code_start
+        self._end = end
+
+    def __repr__(self) -> str:
+        return f"<DirectiveMatch span={self.span()!r} match={self.group(0)!r}>"
+
+    def start(self) -> int:
+        return self._start
+
+    def end(self) -> int:
+        return self._end
+
+    def span(self) -> tuple[int, int]:
+        return self._start, self._end
+
+    def group(self, name=0) -> str:
+        if name == 0:
+            return self.string[self._start : self._end]
+        if name == "directive":
+            return self.string[self._start : self._directive_end]
+        if name == "quote":
+            return self.string[self._code_start - 1 : self._code_start]
+        if name == "code":
+            return self.string[self._code_start : self._end - 1]
+        raise IndexError("no such group")
+
+
+class DirectiveScanner:
+    # finds the same directives as RE_PATTERN in a single pass: a directive
+    # whose value is never closed costs one search for its quote, instead of
+    # a scan to the end of the content for every later candidate, `content`
+    # can also be UTF-8 encoded bytes or a memory map of them, with `skip`
+    # the regions of RE_REGION are jumped over
+    def __init__(
+        self,
+        content: Union[str, Buffer],
+        endpos: Optional[int] = None,
+        skip: bool = True,
+    ):
+        self.content = content
+        if isinstance(content, str):
+            self._head = RE_HEAD
+            self._is_directive = is_directive
+            self._backslash = "\\"
+            self._region = RE_REGION
+            self._region_ends = REGION_ENDS
+            self._tag_end = ">"
+        else:
+            self._head = RE_HEAD_BYTES
+            self._is_directive = is_directive_bytes
+            self._backslash = b"\\"
+            self._region = RE_REGION_BYTES
+            self._region_ends = REGION_ENDS_BYTES
+            self._tag_end = b">"
+        self.endpos = len(content) if endpos is None else endpos
+        self.skip = skip
+        # the regions found so far, in order, each is only searched for once
+        # however many candidates come before it
+        self.regions: list[Region] = []
+        # where the search for the next region starts
+        self._region_position = 0
+        # candidates before this offset are in no region
+        self._no_region_before = 0
+        # where the last search for each closing quote started, if it failed
+        self._unclosed: dict[str, int] = {}
+        # the start of the first directive left open, see scan()
+        self.unterminated: Optional[int] = None
+        # the region left open there, if its content is known to start
+        self.open_region: Optional[Region] = None
+
+    def scan(
+        self, position: int = 0, stop_at_unterminated: bool = False
+    ) -> Iterator[DirectiveMatch]:
+        # directives starting at or after `position`, which may be preceded by
+        # the whitespace right before it
+        content = self.content
+        endpos = self.endpos
+        head_search = self._head.search
+        is_directive = self._is_directive
+        check_whitespace = self._head is RE_HEAD_BYTES
+        skip = self.skip
+        # candidates before this offset need no region lookup
+        no_region_before = self._no_region_before if skip else endpos + 1
+        position = max(position - 1, 0)
+        while True:
+            head = head_search(content, position, endpos)
+            if head is None:
+                if skip and stop_at_unterminated:
+                    # a region left open hides what comes after it as well
+                    region = self._get_region(position, endpos, True)
+                    if region is not None and region.end == -1:
+                        self._stop_at_region(region)
+                return
+
+            start = head.start(1)
+            if start >= no_region_before:
+                region = self._get_region(position, start, stop_at_unterminated)
+                no_region_before = self._no_region_before
+                if region is not None:
+                    if region.end == -1:
+                        # its end may be in content that is not there yet
+                        self._stop_at_region(region)
+                        return
+                    position = region.end
+                    continue
+
+            position = start
+            if not is_directive(head.group(1)):
+                continue
+            if check_whitespace and not ends_with_whitespace(content, start):
+                continue
+
+            opening = head.start(2)
+            closing = self._find_closing(head.group(2), opening + 1)
+            if closing == -1:
+                if stop_at_unterminated and opening + 1 + MAX_VALUE_SIZE > endpos:
+                    self.unterminated = start
+                    return
+                continue
+
+            regions = self.regions
+            if regions and start < regions[-1].start < closing:
+                # an opening in the value of the directive is not one
+                regions.pop()
+                self._region_position = closing + 1
+                self._no_region_before = no_region_before = closing + 1
+
+            yield DirectiveMatch(content, start, head.end(1), opening + 1, closing + 1)
+            position = closing + 1
+
+    def _get_region(
+        self, position: int, start: int, stop_at_unterminated: bool
+    ) -> Optional[Region]:
+        # the region a candidate starting at `start` is in, if any, where
+        # the scan is at `position`
+        regions = self.regions
+        while True:
+            # the last region found is the only one the candidate can be in
+            # unless the scan went past it, e.g. it was in a directive value
+            if regions and regions[-1].content_start >= position:
+                region = regions[-1]
+                if start < region.content_start:
+                    self._no_region_before = region.content_start
+                    return None
+                if region.end == -1 or start < region.end:
+                    return region
+                self._region_position = region.end
+            else:
+                self._region_position = max(self._region_position, position)
+
+            region = self._find_region(stop_at_unterminated)
+            if region is None:
+                self._no_region_before = self.endpos + 1
+                return None
+            regions.append(region)
+
+    def _find_region(self, stop_at_unterminated: bool) -> Optional[Region]:
+        # the next region from _region_position, a script, style or comment
+        # never closed runs to the end of the content, a template tag or an
+        # opening tag not closed within MAX_VALUE_SIZE is not a region, unless
+        # the rest of the content may still close it
+        content = self.content
+        endpos = self.endpos
+        while True:
+            opening = self._region.search(content, self._region_position, endpos)
+            if opening is None:
+                self._region_position = endpos
+                return None
+
+            element = opening.group(1)
+            limit = min(opening.end() + MAX_VALUE_SIZE, endpos)
+            if element is None:
+                closing = self._region_ends[opening.group(0)]
+                content_start = opening.end()
+                runs_to_end = opening.group(0) in ("<!--", b"<!--")
+                end = find_region_end(
+                    content, closing, content_start, endpos if runs_to_end else limit
+                )
+            else:
+                closing = self._region_ends[element.lower()]
+                # the attributes of the element are still markup
+                content_start = content.find(self._tag_end, opening.end(), limit) + 1
+                runs_to_end = content_start > 0
+                if runs_to_end:
+                    end = find_region_end(content, closing, content_start, endpos)
+                else:
+                    content_start = opening.end()
+                    end = -1
+
+            if not runs_to_end:
+                closing = None
+            elif end == -1 and not stop_at_unterminated:
+                end = endpos
+            if end != -1 or (
+                stop_at_unterminated
+                and (runs_to_end or opening.end() + MAX_VALUE_SIZE > endpos)
+            ):
+                return Region(opening.start(), content_start, end, closing)
+            self._region_position = opening.start() + 1
+
+    def _stop_at_region(self, region: Region) -> None:
+        self.unterminated = region.start
+        if region.closing is not None:
+            self.open_region = region
+
+    def _find_closing(self, quote: str, position: int) -> int:
+        # a quote preceded by a backslash does not close the value, and once
+        # a quote is missing from some offset to the end, it is missing after
+        # it too
+        unclosed = self._unclosed.get(quote)
+        if unclosed is not None and position >= unclosed:
+            return -1
+
+        limit = min(position + MAX_VALUE_SIZE, self.endpos)
+        closing = self.content.find(quote, position, limit)
+        while closing != -1 and self.content[closing - 1 : closing] == self._backslash:
+            closing = self.content.find(quote, closing + 1, limit)
+
+        if closing == -1 and limit == self.endpos:
+            self._unclosed[quote] = position
+        return closing
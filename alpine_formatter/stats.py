@@ -0,0 +1,172 @@
+import heapq
+from typing import Union
+
+# the longest code of a snippet kept for the report
+SNIPPET_PREVIEW = 60
+
+
+def get_directive_type(directive: str) -> str:
+    # the directive without its argument and modifiers, `@click.prevent`
+    # is x-on and `:class` is x-bind
+    directive = directive.lower()
+    if directive.startswith(("@", "x-on:")):
+        return "x-on"
+    if directive.startswith((":", "x-bind:")):
+        return "x-bind"
+    return directive.split(".", 1)[0]
+
+
+class Timing:
+    __slots__ = ("count", "chars", "seconds")
+
+    def __init__(self, count: int = 0, chars: int = 0, seconds: float = 0.0):
+        self.count = count
+        self.chars = chars
+        self.seconds = seconds
+
+    def add(self, chars: int, seconds: float, count: int = 1) -> None:
+        self.count += count
+        self.chars += chars
+        self.seconds += seconds
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "chars": self.chars, "seconds": self.seconds}
+
+
+def get_timing(timings: dict, name: str) -> Timing:
+    timing = timings.get(name)
+    if timing is None:
+        timing = timings[name] = Timing()
+    return timing
+
+
+class FormatStats:
+    # counts, sizes in characters and cumulative time of a formatting run,
+    # per phase and per directive type, with the slowest files and snippets,
+    # filled in by a formatter given one
+    def __init__(self, top: int = 10):
+        self.top = top
+        self.files = Timing()
+        self.phases: dict[str, Timing] = {}
+        self.directives: dict[str, Timing] = {}
+        # min-heaps of the `top` slowest, by seconds
+        self._slowest_files: list = []
+        self._slowest_snippets: list = []
+
+    def add_phase(self, phase: str, chars: int, seconds: float, count: int = 1) -> None:
+        get_timing(self.phases, phase).add(chars, seconds, count)
+
+    def add_file(self, path: str, chars: int, seconds: float) -> None:
+        self.files.add(chars, seconds)
+        self._push(self._slowest_files, (seconds, path))
+
+    def add_snippet(
+        self,
+        directive: str,
+        code: str,
+        beautify: float,
+        indentation: float,
+        render: float,
+    ) -> None:
+        self.add_phase("beautify", len(code), beautify)
+        self.add_phase("indentation", 0, indentation)
+        self.add_phase("render", 0, render)
+
+        seconds = beautify + indentation + render
+        directive_type = get_directive_type(directive)
+        get_timing(self.directives, directive_type).add(len(code), seconds)
+        self._push(self._slowest_snippets, (seconds, directive, code.strip()))
+
+    def _push(self, heap: list, item: tuple) -> None:
+        if len(heap) < self.top:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    @property
+    def slowest_files(self) -> list[tuple[float, str]]:
+        return sorted(self._slowest_files, reverse=True)
+
+    @property
+    def slowest_snippets(self) -> list[tuple[float, str, str]]:
+        return sorted(self._slowest_snippets, reverse=True)
+
+    def merge(self, other: Union["FormatStats", dict]) -> None:
+        # adds the figures of another run, e.g. of a worker process
+        if isinstance(other, FormatStats):
+            other = other.to_dict()
+
+        self.files.add(
+            other["files"]["chars"], other["files"]["seconds"], other["files"]["count"]
+        )
+        for phase, timing in other["phases"].items():
+            self.add_phase(phase, timing["chars"], timing["seconds"], timing["count"])
+        for directive_type, timing in other["directives"].items():
+            get_timing(self.directives, directive_type).add(
+                timing["chars"], timing["seconds"], timing["count"]
+            )
+        for entry in other["slowest_files"]:
+            self._push(self._slowest_files, (entry["seconds"], entry["path"]))
+        for entry in other["slowest_snippets"]:
+            self._push(
+                self._slowest_snippets,
+                (entry["seconds"], entry["directive"], entry["code"]),
+            )
+
+    def to_dict(self) -> dict:
+        return {
+            "files": self.files.to_dict(),
+            "phases": {name: timing.to_dict() for name, timing in self.phases.items()},
+            "directives": {
+                name: timing.to_dict()
+                for name, timing in sorted(self.directives.items())
+            },
+            "slowest_files": [
+                {"path": path, "seconds": seconds}
+                for seconds, path in self.slowest_files
+            ],
+            "slowest_snippets": [
+                {"directive": directive, "code": code, "seconds": seconds}
+                for seconds, directive, code in self.slowest_snippets
+            ],
+        }
+
+    def report(self) -> str:
+        # a plain text table of the figures
+        lines = [
+            f"files: {self.files.count}, chars: {self.files.chars},"
+            f" ms: {self.files.seconds * 1000:.1f}"
+        ]
+        for title, timings in (
+            ("phase", self.phases),
+            ("directive", dict(sorted(self.directives.items()))),
+        ):
+            if not timings:
+                continue
+            lines.append("")
+            lines.append(f"{title:14} {'count':>8} {'chars':>10} {'ms':>10}")
+            for name, timing in timings.items():
+                lines.append(
+                    f"{name:14} {timing.count:8} {timing.chars:10}"
+                    f" {timing.seconds * 1000:10.2f}"
+                )
+
+        if self._slowest_files:
+            lines.extend(["", "slowest files"])
+            for seconds, path in self.slowest_files:
+                lines.append(f"{seconds * 1000:10.2f} ms  {path}")
+        if self._slowest_snippets:
+            lines.extend(["", "slowest snippets"])
+            for seconds, directive, code in self.slowest_snippets:
+                lines.append(
+                    f"{seconds * 1000:10.2f} ms  {directive}"
+                    f"  {preview(code, SNIPPET_PREVIEW)}"
+                )
+        return "\n".join(lines)
+
+
+def preview(code: str, length: int) -> str:
+    code = " ".join(code.split())
+    if len(code) > length:
+        code = code[: length - 3] + "..."
+    return code
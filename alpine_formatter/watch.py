@@ -0,0 +1,282 @@
+import ctypes
+import ctypes.util
+import errno
+import hashlib
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Union
+
+from alpine_formatter.discovery import SourceFinder
+from alpine_formatter.files import write_file_atomic
+from alpine_formatter.formatter import AlpineFormatter, get_formatter
+
+# how long a burst of saves has to be over before its files are formatted
+DEFAULT_DEBOUNCE = 0.2
+
+# how often the tree is walked without inotify
+DEFAULT_POLL_INTERVAL = 1.0
+
+# from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x1000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+# a file is only reported once it is closed or moved in place, not on
+# every write
+WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+)
+
+# struct inotify_event, followed by its `len` bytes long name
+EVENT = struct.Struct("iIII")
+EVENT_BUFFER_SIZE = 64 * 1024
+
+
+class InotifyBackend:
+    # the events of the directories watched, waiting for them costs nothing
+    # however large the tree is, linux only
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on linux")
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise self._error("inotify_init1")
+        # the directory of each watch descriptor
+        self.directories: dict[int, str] = {}
+
+    def _error(self, function: str) -> OSError:
+        code = ctypes.get_errno()
+        return OSError(code, f"{function}: {os.strerror(code)}")
+
+    def watch(self, directory: str) -> None:
+        # watching a directory again keeps its descriptor
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise self._error("inotify_add_watch")
+        self.directories[wd] = directory
+
+    def wait(self, timeout: Optional[float]) -> tuple[set[Path], bool]:
+        # the paths that changed within `timeout` seconds, and whether the
+        # tree has to be walked again because directories came or events
+        # were lost
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        changed: set[Path] = set()
+        rescan = False
+        while ready:
+            try:
+                data = os.read(self.fd, EVENT_BUFFER_SIZE)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True
+                elif mask & IN_IGNORED:
+                    self.directories.pop(wd, None)
+                elif mask & IN_ISDIR:
+                    rescan = rescan or bool(mask & (IN_CREATE | IN_MOVED_TO))
+                elif wd in self.directories and name:
+                    changed.add(Path(self.directories[wd], os.fsdecode(name)))
+        return changed, rescan
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingBackend:
+    # no events, the tree is walked every `interval` seconds instead
+    def __init__(self, interval: float = DEFAULT_POLL_INTERVAL):
+        self.interval = interval
+
+    def watch(self, directory: str) -> None:
+        pass
+
+    def wait(self, timeout: Optional[float]) -> tuple[set[Path], bool]:
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        return set(), True
+
+    def close(self) -> None:
+        pass
+
+
+Backend = Union[InotifyBackend, PollingBackend]
+
+
+def get_backend(poll: bool = False) -> Backend:
+    if not poll:
+        try:
+            return InotifyBackend()
+        except (OSError, AttributeError):
+            # not linux, or a libc without inotify
+            pass
+    return PollingBackend()
+
+
+def hash_content(data: bytes) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+class Watcher:
+    # formats the templates under `paths` once, then the ones that change,
+    # a burst of saves is formatted once it is `debounce` seconds over, and
+    # files whose content is the same as after the last pass (such as the
+    # ones just written) are skipped, the formatter keeps its snippet cache
+    # between passes
+    def __init__(
+        self,
+        paths: Sequence[str],
+        finder: Optional[SourceFinder] = None,
+        formatter: Optional[AlpineFormatter] = None,
+        debounce: float = DEFAULT_DEBOUNCE,
+        poll: bool = False,
+    ):
+        self.paths = paths
+        self.finder = finder or SourceFinder()
+        self.formatter = formatter or get_formatter()
+        self.debounce = debounce
+        self.backend = get_backend(poll)
+        # the size and modification time of the templates, by path
+        self.snapshot: dict[Path, tuple[int, int]] = {}
+        # the hash of the content of each template after the last pass
+        self.hashes: dict[Path, bytes] = {}
+
+    def start(self) -> list:
+        # formats every template, the results are like the ones of wait()
+        try:
+            sources = self.rescan()
+        except OSError:
+            # most likely out of inotify watches
+            self.backend.close()
+            self.backend = PollingBackend()
+            sources = self.rescan()
+        return self.format_files(sorted(sources))
+
+    def rescan(self) -> set[Path]:
+        # walks the tree again, watching its directories, and returns the
+        # templates that are new or whose size or modification time changed
+        self.finder.directories = []
+        snapshot = {}
+        changed = set()
+        for path in self.finder.iter_sources(self.paths):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+            if self.snapshot.get(path) != snapshot[path]:
+                changed.add(path)
+
+        directories = self.finder.directories
+        # files given explicitly are watched through their directory
+        for path in map(Path, self.paths):
+            if not path.is_dir():
+                directories.append(str(path.parent))
+        for directory in directories:
+            self.backend.watch(directory)
+
+        for path in self.snapshot.keys() - snapshot.keys():
+            self.hashes.pop(path, None)
+        self.snapshot = snapshot
+        return changed
+
+    def wait(self, timeout: Optional[float] = None) -> list:
+        # waits up to `timeout` seconds (forever by default) for changes and
+        # formats them once no more came for `debounce` seconds, returns
+        # the (path, changed, error) of the templates formatted, empty when
+        # nothing changed
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pending: set[Path] = set()
+        while True:
+            if pending:
+                wait_for = self.debounce
+            elif deadline is not None:
+                wait_for = max(deadline - time.monotonic(), 0)
+            else:
+                wait_for = None
+
+            changed, rescan = self.backend.wait(wait_for)
+            new = {path for path in changed if path not in self.snapshot}
+            if new and any(path.name.endswith(self.finder.extensions) for path in new):
+                # a new template, whether it is ignored is up to the finder
+                rescan = True
+            changed -= new
+            if rescan:
+                changed |= self.rescan()
+
+            if changed:
+                pending |= changed
+                continue
+            if pending:
+                # nothing to report when only the files just written came
+                results = self.format_files(sorted(pending))
+                if results:
+                    return results
+                pending = set()
+            if deadline is not None and time.monotonic() >= deadline:
+                return []
+
+    def format_files(self, paths: Iterable[Path]) -> list:
+        results = []
+        for path in paths:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                # deleted or moved away
+                self.hashes.pop(path, None)
+                continue
+            except OSError as e:
+                results.append((str(path), None, f"{type(e).__name__}: {e}"))
+                continue
+
+            digest = hash_content(data)
+            if self.hashes.get(path) == digest:
+                continue
+            try:
+                # like read_file, keeping the line endings
+                content = data.decode("utf-8")
+                formatted = self.formatter.format(content)
+                changed = formatted != content
+                if changed:
+                    write_file_atomic(path, formatted)
+                    digest = hash_content(formatted.encode("utf-8"))
+                    # so that polling does not take the write for a change
+                    stat = path.stat()
+                    self.snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+            except Exception as e:
+                results.append((str(path), None, f"{type(e).__name__}: {e}"))
+                continue
+
+            self.hashes[path] = digest
+            results.append((str(path), changed, None))
+        return results
+
+    def close(self) -> None:
+        self.backend.close()
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,77 @@
+# Compares the formatting backends on the distinct snippets of a template
+# with many typical directives, checking that they give the same output:
+#
+#     poetry run python benchmarks/bench_backends.py [directives]
+import sys
+import timeit
+
+from alpine_formatter.backends import BACKENDS, ExpressionBackend, get_backend
+from alpine_formatter.formatter import iter_matches
+
+SNIPPETS = [
+    "{{ open: false, tab: {i}, toggle() {{ this.open = !this.open }} }}",
+    "{{\n    items: [],\n    query: '',\n    get filtered() {{\n"
+    "        return this.items.filter(item => item.name.includes(this.query))\n"
+    "    }},\n    init() {{\n        this.$watch('query', value => this.page = {i})\n"
+    "    }}\n}}",
+    "open{i} = !open{i}",
+    "{{ 'bg-blue-500 text-white': tab === {i}, 'hidden': !visible{i} }}",
+    "$dispatch('notify', {{ id: {i}, message: 'Saved' }})",
+    "count{i} > 0 ? count{i} + ' items' : 'empty'",
+    "selected.includes({i}) && remove({i})",
+    "form.email = '';\nform.errors = []",
+    "fetch('/api/items/{i}').then(response => response.json())",
+    "new Date().getFullYear() + {i}",
+    "for (let i = 0; i < {i}; i++) {{ total += i }}",
+]
+
+
+def make_template(directives: int) -> str:
+    lines = ["<div>"]
+    for i in range(directives):
+        snippet = SNIPPETS[i % len(SNIPPETS)].format(i=i)
+        lines.append(f'    <div x-data="{snippet}"></div>')
+    lines.append("</div>")
+    return "\n".join(lines)
+
+
+def bench(name: str, snippets: list, repeat: int = 5) -> float:
+    def run():
+        backend = get_backend(name)
+        for snippet in snippets:
+            backend.beautify(snippet)
+
+    return min(timeit.repeat(run, number=1, repeat=repeat))
+
+
+def main() -> None:
+    directives = int(sys.argv[1]) if len(sys.argv) > 1 else 1100
+    content = make_template(directives)
+    snippets = list(
+        dict.fromkeys(match.group("code").strip() for match in iter_matches(content))
+    )
+
+    reference = get_backend("jsbeautifier")
+    expected = [reference.beautify(snippet) for snippet in snippets]
+
+    print(f"{len(snippets)} distinct snippets")
+    baseline = None
+    for name in BACKENDS:
+        backend = get_backend(name)
+        same = sum(
+            backend.beautify(snippet) == formatted
+            for snippet, formatted in zip(snippets, expected)
+        )
+        seconds = bench(name, snippets)
+        baseline = baseline or seconds
+        line = (
+            f"{name:14} {len(snippets) / seconds:10.0f} snippets/s"
+            f" ({baseline / seconds:.2f}x), {same}/{len(snippets)} identical"
+        )
+        if isinstance(backend, ExpressionBackend):
+            line += f", {backend.fallbacks} fell back to jsbeautifier"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
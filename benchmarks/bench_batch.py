@@ -0,0 +1,44 @@
+# Compares the batched and per-snippet beautifier paths of format_alpine on
+# a template with many small, distinct directives:
+#
+#     poetry run python benchmarks/bench_batch.py [directives]
+import sys
+import timeit
+
+from alpine_formatter.formatter import SNIPPET_CACHE, format_alpine
+
+
+def make_template(directives: int) -> str:
+    lines = ["<div>"]
+    for i in range(directives // 4):
+        lines.append(
+            f'    <button @click="open{i} = !open{i}" :class="{{ active: tab === {i} }}"'
+            f' x-show="visible{i}" x-text=" label{i} "></button>'
+        )
+    lines.append("</div>")
+    return "\n".join(lines)
+
+
+def bench(content: str, batch: bool, repeat: int = 5) -> float:
+    def run():
+        SNIPPET_CACHE.clear()
+        format_alpine(content, batch=batch)
+
+    return min(timeit.repeat(run, number=1, repeat=repeat))
+
+
+def main() -> None:
+    directives = int(sys.argv[1]) if len(sys.argv) > 1 else 800
+    content = make_template(directives)
+
+    assert format_alpine(content, batch=True) == format_alpine(content, batch=False)
+
+    per_snippet = bench(content, batch=False)
+    batched = bench(content, batch=True)
+    print(f"{directives} directives")
+    print(f"per-snippet: {per_snippet * 1000:8.1f} ms")
+    print(f"batched:     {batched * 1000:8.1f} ms ({per_snippet / batched:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Peak memory and time of assembling the formatted output of templates with
+# large multiline x-data components, with the snippets already cached so
+# that only the assembly is measured:
+#
+#     poetry run python benchmarks/bench_memory.py [components] [lines]
+#
+# "concat" renders multiline directives line by line with +=, as it used to,
+# "join" is format_alpine and "writelines" format_alpine_to a file
+import os
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+from alpine_formatter import formatter
+from alpine_formatter.formatter import format_alpine, format_alpine_to
+
+
+def render_directive_concat(
+    directive: str, quote: str, formatted: str, indentation_level: int
+) -> str:
+    before_closing = ""
+    if "\n" in formatted:
+        indentation = " " * indentation_level
+        indented_formatted = ""
+        for line in formatted.split("\n"):
+            indented_formatted += f"\n{indentation}{line}"
+        formatted = indented_formatted
+        before_closing = "\n" + indentation
+    return f"{directive}={quote}{formatted}{before_closing}{quote}"
+
+
+def make_template(components: int, lines: int) -> str:
+    parts = ["<main>"]
+    for i in range(components):
+        fields = " ".join(f"field{i}_{n}: {n}," for n in range(lines))
+        parts.append(f'    <div x-data="{{ {fields} }}">')
+        parts.append("        <p>" + "static text " * 20 + "</p>")
+        parts.append("    </div>")
+    parts.append("</main>")
+    return "\n".join(parts)
+
+
+def measure(run) -> tuple[float, int]:
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    components = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    content = make_template(components, lines)
+    formatter.SNIPPET_CACHE.resize(max(components, formatter.DEFAULT_CACHE_SIZE))
+    format_alpine(content)
+
+    def concat():
+        with mock.patch.object(formatter, "render_directive", render_directive_concat):
+            format_alpine(content)
+
+    def writelines():
+        with open(os.devnull, "w", encoding="utf-8") as f:
+            format_alpine_to(content, f)
+
+    print(f"{len(content) / 1024:.0f} KB, {components} components of {lines} lines")
+    for name, run in (
+        ("concat", concat),
+        ("join", lambda: format_alpine(content)),
+        ("writelines", writelines),
+    ):
+        elapsed, peak = measure(run)
+        print(f"{name:12} {elapsed * 1000:8.1f} ms {peak / 1024:10.0f} KB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Worst cases for directive matching, RE_PATTERN against the linear
+# DirectiveScanner:
+#
+#     poetry run python benchmarks/bench_scanner.py
+#
+# - modifier chains that end in an invalid character make the nested
+#   quantifier of MODIFIERS backtrack exponentially
+# - a value whose closing quote never comes is scanned to the end of the
+#   content, by the scanner at most once per quote character
+# - a page that is mostly inline scripts and styles, with markup in their
+#   strings, which the scanner jumps over (and without `skip` does not)
+import sys
+import timeit
+from pathlib import Path
+
+from alpine_formatter.formatter import RE_PATTERN
+from alpine_formatter.scanner import DirectiveScanner
+
+sys.path.insert(0, str(Path(__file__).parent))
+from corpus import CorpusParams, make_template  # noqa: E402
+
+CASES = [
+    (
+        "invalid modifier chain",
+        (14, 16, 18, 20),
+        lambda n: " <a @click" + ".a" * n + "!>",
+    ),
+    (
+        "stray x-data at the top",
+        (1000, 2000, 4000),
+        lambda n: ' <div x-data="{\n' + " <span x-text='label'></span>\n" * n,
+    ),
+    (
+        "well formed",
+        (1000, 2000, 4000),
+        lambda n: ' <div x-data="{ open: false }" @click="go()">\n' * n,
+    ),
+    (
+        "script heavy",
+        (64, 256, 1024),
+        lambda n: make_template(CorpusParams(size=n * 1024, script_share=0.8)),
+    ),
+]
+
+
+def bench(func, repeat: int = 3) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main() -> None:
+    for name, sizes, make in CASES:
+        print(name)
+        for n in sizes:
+            content = make(n)
+            regex = bench(lambda: list(RE_PATTERN.finditer(content)))
+            scanner = bench(lambda: list(DirectiveScanner(content).scan()))
+            no_skip = bench(lambda: list(DirectiveScanner(content, skip=False).scan()))
+            print(
+                f"  n={n:<5d} regex {regex * 1000:9.2f} ms, "
+                f"scanner {scanner * 1000:7.2f} ms, "
+                f"without skipping {no_skip * 1000:7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# Formats synthetic templates (see corpus.py) and compares throughput,
+# latency and peak memory of format_alpine with a stored baseline:
+#
+#     poetry run python benchmarks/bench_suite.py [--save-baseline]
+#
+# every file is formatted with an empty snippet cache, exits with 1 when a
+# metric is worse than the baseline by more than --threshold
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from corpus import CorpusParams, make_template
+
+from alpine_formatter.formatter import SNIPPET_CACHE, format_alpine, iter_matches
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+SCENARIOS = {
+    "default": CorpusParams(),
+    "large": CorpusParams(size=256 * 1024),
+    "dense": CorpusParams(density=0.9),
+    "sparse": CorpusParams(density=0.1),
+    "multiline": CorpusParams(multiline_share=1.0),
+    "nested": CorpusParams(nesting=16),
+    "malformed": CorpusParams(malformed_rate=0.05),
+    "script_heavy": CorpusParams(script_share=0.5),
+}
+
+# for each metric, whether higher is better
+METRICS = {
+    "mb_per_s": True,
+    "directives_per_s": True,
+    "p50_ms": False,
+    "p90_ms": False,
+    "p99_ms": False,
+    "peak_kb": False,
+}
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run_scenario(params: CorpusParams, files: int, repeat: int) -> dict:
+    templates = [make_template(params._replace(seed=seed)) for seed in range(files)]
+    size = sum(len(template.encode()) for template in templates)
+    directives = sum(len(list(iter_matches(template))) for template in templates)
+
+    # the best of `repeat` runs for each file, the rest is noise
+    latencies = [float("inf")] * len(templates)
+    for _ in range(repeat):
+        for index, template in enumerate(templates):
+            SNIPPET_CACHE.clear()
+            start = time.perf_counter()
+            format_alpine(template)
+            elapsed = time.perf_counter() - start
+            latencies[index] = min(latencies[index], elapsed)
+    best = sum(latencies)
+
+    # measured apart, tracing slows everything down
+    peak = 0
+    for template in templates:
+        SNIPPET_CACHE.clear()
+        tracemalloc.start()
+        format_alpine(template)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    result = {
+        "mb_per_s": size / best / 1e6,
+        "directives_per_s": directives / best,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p90_ms": percentile(latencies, 0.9) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_kb": peak / 1024,
+    }
+    return {metric: round(value, 3) for metric, value in result.items()}
+
+
+def compare(name: str, result: dict, baseline: dict, threshold: float) -> list:
+    # prints the metrics of a scenario, returns the ones that regressed
+    regressions = []
+    for metric, higher_is_better in METRICS.items():
+        line = f"  {metric:17} {result[metric]:12.2f}"
+        if metric in baseline:
+            ratio = result[metric] / baseline[metric] if baseline[metric] else 1.0
+            change = ratio - 1 if higher_is_better else 1 - ratio
+            line += f"  baseline {baseline[metric]:12.2f}  {change:+7.1%}"
+            if change < -threshold:
+                line += "  REGRESSION"
+                regressions.append(f"{name}.{metric}")
+        print(line)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scenarios", nargs="*", help=", ".join(SCENARIOS))
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.15)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}")
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+
+    results = {}
+    regressions = []
+    for name in args.scenarios or SCENARIOS:
+        print(name)
+        results[name] = run_scenario(SCENARIOS[name], args.files, args.repeat)
+        regressions += compare(
+            name, results[name], baseline.get(name, {}), args.threshold
+        )
+
+    if args.save_baseline:
+        # scenarios that did not run keep their baseline
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"saved the baseline to {args.baseline}")
+    elif regressions:
+        print(f"regressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
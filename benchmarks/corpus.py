@@ -0,0 +1,130 @@
+# Deterministic synthetic templates for the benchmarks: the same parameters
+# and seed always give the same template.
+import random
+from typing import NamedTuple
+
+NAMES = ["open", "tab", "count", "query", "items", "selected", "busy", "form"]
+
+INLINE_DIRECTIVES = [
+    ("x-show", lambda r: r.choice(["open", "!busy", "tab === {n}", " visible "])),
+    ("x-text", lambda r: r.choice(["label", "count + ' items'", "form.name "])),
+    ("x-model", lambda r: r.choice(["query", "form.email", " selected "])),
+    ("@click", lambda r: r.choice(["open = !open", "tab = {n}", "toggle({n})"])),
+    ("@keydown.enter.prevent", lambda r: "submit({n})"),
+    (":class", lambda r: "{ 'active': tab === {n}, 'hidden' : !open }"),
+    (":disabled", lambda r: r.choice(["busy", "!form.valid"])),
+    ("x-init", lambda r: "$watch('query', value => page = {n})"),
+]
+
+PLAIN_ATTRIBUTES = ['class="p-4 flex gap-2"', 'id="item-{n}"', 'data-index="{n}"']
+
+TAGS = ["div", "section", "span", "button", "li", "label"]
+
+
+class CorpusParams(NamedTuple):
+    # the approximate size of the template in bytes
+    size: int = 16 * 1024
+    # the share of elements with directives
+    density: float = 0.5
+    # the share of x-data directives that span several lines
+    multiline_share: float = 0.3
+    # how deep elements are nested
+    nesting: int = 4
+    # the share of directives whose closing quote is missing
+    malformed_rate: float = 0.0
+    # the share of subtrees followed by an inline script, a style or a
+    # comment, each some kilobytes long
+    script_share: float = 0.0
+    seed: int = 0
+
+
+def make_x_data(rng: random.Random, n: int, multiline: bool, indent: str) -> str:
+    if not multiline:
+        return f"{{ open: false, tab: {n} }}"
+    inner = indent + "    "
+    return (
+        "{\n"
+        f"{inner}open: false,\n"
+        f"{inner}items: [{n}, {n + 1}],\n"
+        f"{inner}toggle() {{\n"
+        f"{inner}    this.open = !this.open\n"
+        f"{inner}}},\n"
+        f"{inner}get count() {{ return this.items.length }}\n"
+        f"{indent}}}"
+    )
+
+
+def make_attributes(
+    rng: random.Random, params: CorpusParams, n: int, indent: str
+) -> str:
+    if rng.random() >= params.density:
+        return rng.choice(PLAIN_ATTRIBUTES).format(n=n)
+
+    attributes = []
+    if rng.random() < 0.3:
+        multiline = rng.random() < params.multiline_share
+        attributes.append(("x-data", make_x_data(rng, n, multiline, indent)))
+    for _ in range(rng.randint(1, 3)):
+        name, make_value = rng.choice(INLINE_DIRECTIVES)
+        attributes.append((name, make_value(rng).replace("{n}", str(n))))
+
+    parts = []
+    for name, value in attributes:
+        closing = '"' if rng.random() >= params.malformed_rate else ""
+        parts.append(f'{name}="{value}{closing}')
+    return " ".join(parts)
+
+
+# inline scripts building markup in strings, as found in real pages
+SCRIPT_LINES = [
+    'const row{n} = \'<div x-show="open" :class="{{ active: tab === {n} }}">\';',
+    "el.insertAdjacentHTML('beforeend', ` <button @click=\"toggle({n})\">`);",
+    "function update{n}(items) {{ return items.map(i => i * {n}).filter(Boolean) }}",
+    '// @click="select({n})" is added by the template',
+    "window.state{n} = {{ open: false, count: {n}, label: 'item {n}' }};",
+]
+
+STYLE_LINES = [
+    ".item-{n}:hover {{ color: #{n:03x}; }}",
+    ".panel-{n} > :first-child {{ margin: {n}px 0 }}",
+]
+
+
+def make_region(rng: random.Random, n: int) -> list:
+    kind = rng.choice(["script", "script", "style", "comment"])
+    pool = STYLE_LINES if kind == "style" else SCRIPT_LINES
+    lines = [
+        "        " + rng.choice(pool).format(n=n + i)
+        for i in range(rng.randint(20, 60))
+    ]
+    if kind == "comment":
+        return ["    <!--", *lines, "    -->"]
+    return [f"    <{kind}>", *lines, f"    </{kind}>"]
+
+
+def make_template(params: CorpusParams = CorpusParams()) -> str:
+    rng = random.Random(params.seed)
+    lines = ["<!DOCTYPE html>", "<html>", "<body>"]
+    size = sum(len(line) + 1 for line in lines)
+    n = 0
+    while size < params.size:
+        # a subtree of nested elements, as deep as `nesting`
+        depth = rng.randint(1, max(params.nesting, 1))
+        tags = [rng.choice(TAGS) for _ in range(depth)]
+        for level, tag in enumerate(tags):
+            indent = "    " * (level + 1)
+            attributes = make_attributes(rng, params, n, indent)
+            lines.append(f"{indent}<{tag} {attributes}>")
+            size += len(lines[-1]) + 1
+            n += 1
+        lines.append("    " * (depth + 1) + rng.choice(NAMES))
+        size += len(lines[-1]) + 1
+        for level in reversed(range(depth)):
+            lines.append("    " * (level + 1) + f"</{tags[level]}>")
+            size += len(lines[-1]) + 1
+        if params.script_share and rng.random() < params.script_share:
+            region = make_region(rng, n)
+            lines.extend(region)
+            size += sum(len(line) + 1 for line in region)
+    lines.extend(["</body>", "</html>", ""])
+    return "\n".join(lines)
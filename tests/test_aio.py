@@ -0,0 +1,93 @@
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase, mock
+
+from alpine_formatter.aio import AsyncFormatter, format_alpine_async
+from alpine_formatter.formatter import SNIPPET_CACHE, AlpineFormatter, format_alpine
+
+CONTENT = """<div x-data="{ open: false, toggle() { this.open = !this.open } }">
+    <button @click=" toggle() "></button>
+</div>
+"""
+
+
+class TestFormatAlpineAsync(IsolatedAsyncioTestCase):
+    async def test_same_as_format_alpine(self):
+        self.assertEqual(await format_alpine_async(CONTENT), format_alpine(CONTENT))
+        options = {"indent_size": 2}
+        self.assertEqual(
+            await format_alpine_async(CONTENT, options), format_alpine(CONTENT, options)
+        )
+
+    async def test_shares_snippet_cache(self):
+        SNIPPET_CACHE.clear()
+        format_alpine(CONTENT)
+        await format_alpine_async(CONTENT)
+        self.assertEqual(SNIPPET_CACHE.misses, 2)
+        self.assertEqual(SNIPPET_CACHE.hits, 2)
+
+
+class TestAsyncFormatter(IsolatedAsyncioTestCase):
+    async def test_format_and_check(self):
+        async with AsyncFormatter() as formatter:
+            formatted = await formatter.format(CONTENT)
+            self.assertEqual(formatted, format_alpine(CONTENT))
+            self.assertFalse(await formatter.check(CONTENT))
+            self.assertTrue(await formatter.check(formatted))
+
+    async def test_processes(self):
+        async with AsyncFormatter({"indent_size": 2}, processes=True) as formatter:
+            results = await asyncio.gather(*[formatter.format(CONTENT)] * 4)
+        self.assertEqual(results, [format_alpine(CONTENT, {"indent_size": 2})] * 4)
+
+    async def test_timeout(self):
+        release = threading.Event()
+
+        def format(formatter, content, batch=True):
+            release.wait(5)
+            return content
+
+        formatter = AsyncFormatter(timeout=0.05)
+        with mock.patch.object(AlpineFormatter, "format", format):
+            with self.assertRaises(asyncio.TimeoutError):
+                await formatter.format(CONTENT)
+            # the slot stays taken while the work goes on
+            with self.assertRaises(asyncio.TimeoutError):
+                await formatter.format(CONTENT)
+            release.set()
+            self.assertEqual(await formatter.format(CONTENT, timeout=5), CONTENT)
+
+    async def test_concurrency_limit(self):
+        running = 0
+        most = 0
+        lock = threading.Lock()
+
+        def format(formatter, content, batch=True):
+            nonlocal running, most
+            with lock:
+                running += 1
+                most = max(most, running)
+            threading.Event().wait(0.01)
+            with lock:
+                running -= 1
+            return content
+
+        formatter = AsyncFormatter(concurrency=1)
+        with mock.patch.object(AlpineFormatter, "format", format):
+            await asyncio.gather(*[formatter.format(CONTENT) for _ in range(5)])
+        self.assertEqual(most, 1)
+
+    async def test_loop_stays_responsive(self):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.001)
+                ticks += 1
+
+        content = "".join(f'<p x-data="{{ a{i}() {{ }} }}"></p>' for i in range(300))
+        ticker = asyncio.create_task(tick())
+        await format_alpine_async(content)
+        ticker.cancel()
+        self.assertGreater(ticks, 0)
@@ -0,0 +1,71 @@
+from unittest import TestCase
+
+from alpine_formatter.backends import (
+    BACKENDS,
+    Backend,
+    ExpressionBackend,
+    get_backend,
+    register_backend,
+)
+from alpine_formatter.formatter import AlpineFormatter, SnippetCache, format_alpine
+
+TEMPLATE = """<div x-data="{ open: false, toggle() { this.open = !this.open } }">
+    <button @click="toggle()" :class="{'active': open, 'disabled': busy}"></button>
+    <span x-text="new Date().getFullYear()"></span>
+    <a @click="() => (open) ? close() : show()" :title="() => a ? b : c"></a>
+    <b @click="[a, b] = (c) ? d : e" x-init="[x][0] = (c) ? 1 : 2"></b>
+    <i @click="[a, b] = c ? d : e"></i>
+    <ul x-show="items.length > 0">
+        <template x-for="item in items"><li @click="remove(item)"></li></template>
+    </ul>
+</div>
+"""
+
+
+class TestBackends(TestCase):
+    def test_get_backend(self):
+        self.assertEqual(get_backend().name, "jsbeautifier")
+        self.assertIsInstance(get_backend("expression"), ExpressionBackend)
+        with self.assertRaises(ValueError):
+            get_backend("missing")
+
+    def test_expression_backend_falls_back(self):
+        backend = get_backend("expression")
+        self.assertEqual(backend.beautify("{open:false}"), "{\n    open: false\n}")
+        self.assertEqual(backend.beautify("new Date()"), "new Date()")
+        self.assertEqual((backend.printed, backend.fallbacks), (1, 1))
+
+    def test_expression_backend_unsupported_options(self):
+        backend = get_backend("expression", {"brace_style": "expand"})
+        self.assertEqual(backend.beautify("f({a: 1})"), "f(\n{\n    a: 1\n})")
+        self.assertEqual((backend.printed, backend.fallbacks), (0, 1))
+
+    def test_same_output_as_jsbeautifier(self):
+        formatter = AlpineFormatter(backend="expression")
+        self.assertEqual(formatter.format(TEMPLATE), format_alpine(TEMPLATE))
+        self.assertEqual(
+            formatter.format(TEMPLATE, batch=False), format_alpine(TEMPLATE)
+        )
+
+    def test_backends_do_not_share_cached_snippets(self):
+        cache = SnippetCache()
+        AlpineFormatter(cache=cache).format(TEMPLATE)
+        size = len(cache)
+        AlpineFormatter(cache=cache, backend="expression").format(TEMPLATE)
+        self.assertEqual(len(cache), size * 2)
+
+    def test_register_backend(self):
+        @register_backend
+        class UpperBackend(Backend):
+            name = "upper"
+
+            def beautify(self, code):
+                return code.upper()
+
+        try:
+            formatter = AlpineFormatter(backend="upper")
+            self.assertEqual(
+                formatter.format('<a @click="go()"></a>'), '<a @click="GO()"></a>'
+            )
+        finally:
+            del BACKENDS["upper"]
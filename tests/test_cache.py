@@ -0,0 +1,80 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from jsbeautifier import default_options
+
+from alpine_formatter.cache import Cache, get_cache_key
+from alpine_formatter.formatter import format_file
+
+
+class TestCache(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.cache_dir = self.root / "cache"
+        self.template = self.root / "template.html"
+        self.template.write_text('<div x-show="open"></div>\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_new_file_is_changed(self):
+        cache = Cache.read(cache_dir=self.cache_dir)
+        self.assertTrue(cache.is_changed(self.template))
+
+    def test_written_file_is_not_changed(self):
+        Cache.read(cache_dir=self.cache_dir).write([self.template])
+        cache = Cache.read(cache_dir=self.cache_dir)
+        self.assertFalse(cache.is_changed(self.template))
+
+    def test_modified_file_is_changed(self):
+        Cache.read(cache_dir=self.cache_dir).write([self.template])
+        self.template.write_text('<div x-show="closed"></div>\n')
+        cache = Cache.read(cache_dir=self.cache_dir)
+        self.assertTrue(cache.is_changed(self.template))
+
+    def test_touched_file_with_same_content_is_not_changed(self):
+        Cache.read(cache_dir=self.cache_dir).write([self.template])
+        stat = self.template.stat()
+        os.utime(self.template, (stat.st_atime, stat.st_mtime + 10))
+        cache = Cache.read(cache_dir=self.cache_dir)
+        self.assertFalse(cache.is_changed(self.template))
+
+    def test_options_change_cache_key(self):
+        options = default_options()
+        options.indent_size = 2
+        self.assertNotEqual(get_cache_key(), get_cache_key(options))
+
+        Cache.read(cache_dir=self.cache_dir).write([self.template])
+        cache = Cache.read(options, cache_dir=self.cache_dir)
+        self.assertTrue(cache.is_changed(self.template))
+
+    def test_write_keeps_entries_from_other_writers(self):
+        other = self.root / "other.html"
+        other.write_text("<div></div>\n")
+        first = Cache.read(cache_dir=self.cache_dir)
+        second = Cache.read(cache_dir=self.cache_dir)
+        first.write([self.template])
+        second.write([other])
+
+        cache = Cache.read(cache_dir=self.cache_dir)
+        self.assertFalse(cache.is_changed(self.template))
+        self.assertFalse(cache.is_changed(other))
+
+    def test_corrupted_cache_is_empty(self):
+        cache = Cache.read(cache_dir=self.cache_dir)
+        cache.write([self.template])
+        cache.cache_file.write_text("{not json")
+        cache = Cache.read(cache_dir=self.cache_dir)
+        self.assertTrue(cache.is_changed(self.template))
+
+    def test_format_file_skips_cached_files(self):
+        self.template.write_text('<div x-show=" open "></div>\n')
+        cache = Cache.read(cache_dir=self.cache_dir)
+        cache.write([self.template])
+        self.assertFalse(format_file(self.template, cache=cache))
+        self.assertEqual(self.template.read_text(), '<div x-show=" open "></div>\n')
+        self.assertTrue(format_file(self.template))
+        self.assertEqual(self.template.read_text(), '<div x-show="open"></div>\n')
@@ -0,0 +1,225 @@
+import json
+import os
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+from io import BytesIO, StringIO, TextIOWrapper
+from pathlib import Path
+from unittest import TestCase, mock
+
+from alpine_formatter import cli
+
+UNFORMATTED = '<div x-show=" open "></div>\n'
+FORMATTED = '<div x-show="open"></div>\n'
+
+
+class TestCli(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        socket_path = str(self.root / "no-daemon.sock")
+        self.env = mock.patch.dict(os.environ, {"ALPINE_FORMATTER_SOCKET": socket_path})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def main(self, *args: str) -> int:
+        with redirect_stderr(StringIO()) as stderr:
+            code = cli.main(list(args))
+        self.stderr = stderr.getvalue()
+        return code
+
+    def test_formats_files_and_directories(self):
+        (self.root / "nested").mkdir()
+        first = self.root / "first.html"
+        second = self.root / "nested" / "second.jinja"
+        ignored = self.root / "nested" / "script.js"
+        for path in (first, second, ignored):
+            path.write_text(UNFORMATTED)
+
+        self.assertEqual(self.main(str(self.root), "-j", "1"), cli.EXIT_OK)
+        self.assertEqual(first.read_text(), FORMATTED)
+        self.assertEqual(second.read_text(), FORMATTED)
+        self.assertEqual(ignored.read_text(), UNFORMATTED)
+        self.assertIn("2 files reformatted", self.stderr)
+
+    def test_formats_in_parallel(self):
+        paths = []
+        for i in range(6):
+            path = self.root / f"{i}.html"
+            path.write_text(UNFORMATTED)
+            paths.append(str(path))
+
+        with mock.patch.object(cli, "CHUNK_FILES", 2):
+            code = self.main("-j", "3", *paths)
+
+        self.assertEqual(code, cli.EXIT_OK)
+        for path in paths:
+            self.assertEqual(Path(path).read_text(), FORMATTED)
+
+    def test_check_does_not_write(self):
+        dirty = self.root / "dirty.html"
+        clean = self.root / "clean.html"
+        dirty.write_text(UNFORMATTED)
+        clean.write_text(FORMATTED)
+
+        self.assertEqual(self.main("--check", str(self.root)), cli.EXIT_CHANGED)
+        self.assertEqual(dirty.read_text(), UNFORMATTED)
+        self.assertIn(f"would reformat {dirty}", self.stderr)
+        self.assertIn("1 file would be left unchanged", self.stderr)
+
+        dirty.write_text(FORMATTED)
+        self.assertEqual(self.main("--check", str(self.root)), cli.EXIT_OK)
+
+    def test_diff_does_not_write(self):
+        dirty = self.root / "dirty.html"
+        clean = self.root / "clean.html"
+        dirty.write_text(UNFORMATTED)
+        clean.write_text(FORMATTED)
+
+        with redirect_stdout(StringIO()) as stdout:
+            self.assertEqual(self.main("--diff", str(self.root)), cli.EXIT_OK)
+        self.assertEqual(dirty.read_text(), UNFORMATTED)
+        self.assertEqual(
+            stdout.getvalue(),
+            f"--- {dirty}\n+++ {dirty}\n@@ -1 +1 @@\n-{UNFORMATTED}+{FORMATTED}",
+        )
+        self.assertIn("1 file would be reformatted", self.stderr)
+
+        with redirect_stdout(StringIO()):
+            code = self.main("--diff", "--check", str(self.root))
+        self.assertEqual(code, cli.EXIT_CHANGED)
+
+    def test_diff_keeps_bytes_that_are_not_utf8(self):
+        path = self.root / "template.html"
+        path.write_bytes(b"<p>\xff</p>\n" + UNFORMATTED.encode())
+
+        stdout = TextIOWrapper(BytesIO(), encoding="utf-8")
+        with redirect_stdout(stdout):
+            self.assertEqual(self.main("--diff", str(path)), cli.EXIT_OK)
+        self.assertEqual(
+            stdout.buffer.getvalue(),
+            f"--- {path}\n+++ {path}\n@@ -1,2 +1,2 @@\n <p>\udcff</p>\n"
+            f"-{UNFORMATTED}+{FORMATTED}".encode("utf-8", "surrogateescape"),
+        )
+
+    def test_watch(self):
+        path = self.root / "template.html"
+        path.write_text(UNFORMATTED)
+
+        passes = []
+
+        def wait(watcher, timeout=None):
+            # one save, then ctrl-c
+            if passes:
+                raise KeyboardInterrupt
+            passes.append(path)
+            path.write_text(UNFORMATTED)
+            return watcher.format_files([path])
+
+        with mock.patch(
+            "alpine_formatter.watch.Watcher.wait", side_effect=wait, autospec=True
+        ):
+            self.assertEqual(self.main("--watch", str(self.root)), cli.EXIT_OK)
+        self.assertEqual(path.read_text(), FORMATTED)
+        self.assertEqual(self.stderr.count(f"reformatted {path}"), 2)
+        self.assertIn("watching for changes", self.stderr)
+
+        with self.assertRaises(SystemExit):
+            self.main("--watch", "--check", str(self.root))
+
+    def test_minify(self):
+        path = self.root / "template.html"
+        path.write_text('<div x-data="{\n    open: false\n}"></div>\n')
+
+        self.assertEqual(self.main("--minify", "--check", str(path)), cli.EXIT_CHANGED)
+        self.assertIn(f"would minify {path}, 7 bytes saved", self.stderr)
+        self.assertEqual(self.main("--minify", str(path)), cli.EXIT_OK)
+        self.assertEqual(path.read_text(), '<div x-data="{open:false}"></div>\n')
+        self.assertIn("1 file minified (7 bytes saved)", self.stderr)
+
+        with self.assertRaises(SystemExit):
+            self.main("--minify", "--diff", str(path))
+
+    def test_missing_file_is_an_error(self):
+        code = self.main(str(self.root / "missing.html"))
+        self.assertEqual(code, cli.EXIT_ERROR)
+        self.assertIn("cannot format", self.stderr)
+
+    def test_keeps_file_mode(self):
+        path = self.root / "template.html"
+        path.write_text(UNFORMATTED)
+        os.chmod(path, 0o640)
+        self.main(str(path))
+        self.assertEqual(path.stat().st_mode & 0o777, 0o640)
+
+    def test_cache_skips_formatted_files(self):
+        path = self.root / "template.html"
+        path.write_text(UNFORMATTED)
+        env = {"ALPINE_FORMATTER_CACHE_DIR": str(self.root / "cache")}
+        with mock.patch.dict(os.environ, env):
+            self.main("--cache", str(path))
+            with mock.patch.object(cli, "format_chunk") as format_chunk:
+                self.assertEqual(self.main("--cache", str(path)), cli.EXIT_OK)
+
+        format_chunk.assert_not_called()
+        self.assertIn("1 file left unchanged", self.stderr)
+
+    def test_beautifier_options(self):
+        path = self.root / "template.html"
+        path.write_text('<div x-data="{ a() { return 1 } }"></div>\n')
+        self.assertEqual(
+            self.main("--indent-size", "2", "--brace-style", "expand", str(path)), 0
+        )
+        self.assertEqual(
+            path.read_text(),
+            '<div x-data="\n{\n  a()\n  {\n    return 1\n  }\n}\n"></div>\n',
+        )
+
+    def test_backend(self):
+        path = self.root / "template.html"
+        path.write_text(UNFORMATTED)
+        self.assertEqual(self.main("--backend", "expression", str(path)), 0)
+        self.assertEqual(path.read_text(), FORMATTED)
+
+        with self.assertRaises(SystemExit):
+            self.main("--backend", "missing", str(path))
+
+    def test_stats(self):
+        path = self.root / "template.html"
+        path.write_text(UNFORMATTED)
+        with redirect_stdout(StringIO()) as stdout:
+            self.assertEqual(self.main("--stats-json", "-j", "1", str(path)), 0)
+        stats = json.loads(stdout.getvalue())
+        self.assertEqual(stats["files"]["count"], 1)
+        self.assertEqual(stats["directives"]["x-show"]["count"], 1)
+        self.assertEqual(stats["slowest_files"][0]["path"], str(path))
+
+        self.assertEqual(self.main("--stats", str(path)), 0)
+        self.assertIn("slowest files", self.stderr)
+
+    def test_exclude_and_max_size(self):
+        for name in ("page.html", "vendor.html", "large.html"):
+            (self.root / name).write_text(UNFORMATTED)
+        (self.root / "large.html").write_text(UNFORMATTED * 10)
+
+        code = self.main(
+            str(self.root), "--exclude", "vendor.html", "--max-size", "100"
+        )
+        self.assertEqual(code, cli.EXIT_OK)
+        self.assertEqual((self.root / "page.html").read_text(), FORMATTED)
+        self.assertEqual((self.root / "vendor.html").read_text(), UNFORMATTED)
+        self.assertIn("skipped", self.stderr)
+        self.assertIn("1 file reformatted", self.stderr)
+
+    def test_chunks_small_files_together(self):
+        paths = []
+        for i in range(5):
+            path = self.root / f"{i}.html"
+            path.write_text(FORMATTED)
+            paths.append(path)
+
+        with mock.patch.object(cli, "CHUNK_FILES", 2):
+            chunks = list(cli.chunk_sources(paths))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
@@ -0,0 +1,98 @@
+import os
+import socket
+import tempfile
+import threading
+from contextlib import redirect_stderr
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase, mock, skipUnless
+
+from alpine_formatter import cli
+from alpine_formatter.daemon import DaemonServer, find_daemon
+
+UNFORMATTED = '<div x-show=" open "></div>\n'
+FORMATTED = '<div x-show="open"></div>\n'
+
+
+@skipUnless(hasattr(socket, "AF_UNIX"), "needs unix sockets")
+class TestDaemon(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.socket_path = self.root / "daemon.sock"
+        self.server = DaemonServer(self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.tmp.cleanup()
+
+    def test_ping(self):
+        client = find_daemon(self.socket_path)
+        self.assertIsNotNone(client)
+        self.assertIn("cache_key", client.info)
+        client.close()
+
+    def test_no_daemon(self):
+        self.assertIsNone(find_daemon(self.root / "missing.sock"))
+
+    def test_batched_format(self):
+        client = find_daemon(self.socket_path)
+        results = client.format([UNFORMATTED, FORMATTED])
+        self.assertEqual(
+            results,
+            [{"changed": True, "formatted": FORMATTED}, {"changed": False}],
+        )
+        self.assertEqual(client.format([UNFORMATTED], check=True), [{"changed": True}])
+        client.close()
+
+    def test_format_with_options(self):
+        client = find_daemon(self.socket_path)
+        content = '<div x-data="{ a() { return 1 } }"></div>'
+        results = client.format([content], options={"indent_size": 2})
+        self.assertEqual(
+            results[0]["formatted"],
+            '<div x-data="\n{\n  a() {\n    return 1\n  }\n}\n"></div>',
+        )
+        client.close()
+
+    def test_cli_uses_running_daemon(self):
+        path = self.root / "template.html"
+        path.write_text(UNFORMATTED)
+        env = {"ALPINE_FORMATTER_SOCKET": str(self.socket_path)}
+        with (
+            mock.patch.dict(os.environ, env),
+            mock.patch.object(cli, "format_chunk") as format_chunk,
+            redirect_stderr(StringIO()),
+        ):
+            self.assertEqual(cli.main([str(path)]), cli.EXIT_OK)
+
+        format_chunk.assert_not_called()
+        self.assertEqual(path.read_text(), FORMATTED)
+
+    def test_cli_uses_workers_for_several_chunks(self):
+        for name in ("a.html", "b.html"):
+            (self.root / name).write_text(UNFORMATTED)
+        env = {"ALPINE_FORMATTER_SOCKET": str(self.socket_path)}
+        with (
+            mock.patch.dict(os.environ, env),
+            mock.patch.object(cli, "CHUNK_FILES", 1),
+            mock.patch.object(cli, "format_chunk_with_daemon") as with_daemon,
+            redirect_stderr(StringIO()),
+        ):
+            self.assertEqual(cli.main([str(self.root), "-j", "2"]), cli.EXIT_OK)
+            self.assertEqual(cli.main([str(self.root), "-j", "1"]), cli.EXIT_OK)
+
+        self.assertEqual(with_daemon.call_count, 2)
+        self.assertEqual((self.root / "a.html").read_text(), FORMATTED)
+
+    def test_cli_formats_undecodable_files_itself(self):
+        path = self.root / "template.html"
+        path.write_bytes(b"<p>\xff</p>" + UNFORMATTED.encode())
+        env = {"ALPINE_FORMATTER_SOCKET": str(self.socket_path)}
+        with mock.patch.dict(os.environ, env), redirect_stderr(StringIO()):
+            self.assertEqual(cli.main([str(path)]), cli.EXIT_OK)
+        self.assertEqual(path.read_bytes(), b"<p>\xff</p>" + FORMATTED.encode())
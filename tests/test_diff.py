@@ -0,0 +1,109 @@
+import difflib
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from alpine_formatter.diff import diff_alpine, diff_file, unified_diff
+from alpine_formatter.formatter import AlpineFormatter, TextEdit, format_alpine
+
+
+def difflib_diff(content: str, context: int = 3) -> str:
+    return "".join(
+        difflib.unified_diff(
+            content.splitlines(keepends=True),
+            format_alpine(content).splitlines(keepends=True),
+            "a.html",
+            "a.html",
+            n=context,
+        )
+    )
+
+
+def apply_diff(content: str, diff: str) -> str:
+    # a minimal patch, enough to check the hunks line up
+    old = content.splitlines(keepends=True)
+    new = []
+    line = 0
+    for row in diff.splitlines(keepends=True)[2:]:
+        if row.startswith("@@"):
+            start = int(row.split()[1][1:].split(",")[0])
+            length = row.split()[1].split(",")
+            start -= 0 if len(length) > 1 and length[1] == "0" else 1
+            new.extend(old[line:start])
+            line = start
+        elif row.startswith("\\"):
+            new[-1] = new[-1].rstrip("\n")
+        elif row.startswith(" "):
+            new.append(old[line])
+            line += 1
+        elif row.startswith("-"):
+            line += 1
+        else:
+            new.append(row[1:])
+    new.extend(old[line:])
+    return "".join(new)
+
+
+class TestUnifiedDiff(TestCase):
+    def test_same_as_difflib(self):
+        lines = [f"<p>{i}</p>\n" for i in range(20)]
+        lines[2] = '<div x-show=" open "></div>\n'
+        lines[7] = '<div x-text="a+b" :class="{ \'a\':b }"></div>\n'
+        lines[17] = '<div @click="open=!open"></div>\n'
+        content = "".join(lines)
+        for context in (0, 1, 3, 5):
+            self.assertEqual(
+                diff_alpine(
+                    content, fromfile="a.html", tofile="a.html", context=context
+                ),
+                difflib_diff(content, context),
+            )
+
+    def test_multiline_directives(self):
+        content = (
+            "<div>\n"
+            '  <div x-data="{ open: false, toggle() { this.open = !this.open } }">\n'
+            "  </div>\n"
+            '  <p x-text="a"></p><p x-text=" b "></p>\n'
+            "</div>"
+        )
+        diff = diff_alpine(content)
+        self.assertEqual(apply_diff(content, diff), format_alpine(content))
+        self.assertTrue(diff.endswith("\\ No newline at end of file\n"))
+
+    def test_no_changes(self):
+        content = '<div x-show="open"></div>\n'
+        self.assertEqual(diff_alpine(content), "")
+        self.assertEqual(list(unified_diff(content, [])), [])
+
+    def test_edits_on_one_line_are_one_change(self):
+        content = "a\nb c d\ne\n"
+        edits = [TextEdit(6, 1, "D\nD"), TextEdit(2, 1, "B")]
+        self.assertEqual(
+            "".join(unified_diff(content, edits, context=0)),
+            "--- \n+++ \n@@ -2 +2,2 @@\n-b c d\n+B c D\n+D\n",
+        )
+
+    def test_diff_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, "a.html")
+            content = '<p>\n<div x-show=" open "></div>\n</p>\n<b x-text=" b "></b>\n'
+            path.write_text(content)
+            formatter = AlpineFormatter()
+            diff = diff_file(formatter, path)
+            self.assertIn(f"--- {path}\n+++ {path}\n", diff)
+            self.assertEqual(apply_diff(content, diff), format_alpine(content))
+            self.assertEqual(path.read_text(), content)
+
+            only_first = diff_file(formatter, path, [(1, 2)])
+            self.assertIn('+<div x-show="open"></div>\n', only_first)
+            self.assertIn(' <b x-text=" b "></b>\n', only_first)
+            self.assertNotIn('+<b x-text="b"></b>\n', only_first)
+
+    def test_diff_file_not_utf8(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, "a.html")
+            path.write_bytes(b'<p>\xff</p>\n<b x-text=" b "></b>\n')
+            diff = diff_file(AlpineFormatter(), path)
+            self.assertIn(" <p>\udcff</p>\n", diff)
+            self.assertIn('+<b x-text="b"></b>\n', diff)
@@ -0,0 +1,128 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from alpine_formatter.discovery import Rules, SourceFinder, parse_rule
+
+
+def ignored(pattern: str, path: str, is_dir: bool = False) -> bool:
+    return bool(Rules([pattern]).match(path, path.rsplit("/", 1)[-1], is_dir))
+
+
+class TestRules(TestCase):
+    def test_comments_and_blank_lines(self):
+        for line in ("", "   ", "# comment", "/"):
+            self.assertIsNone(parse_rule(line))
+        self.assertTrue(ignored("\\#file", "#file"))
+
+    def test_patterns(self):
+        for pattern, path in (
+            ("*.min.html", "a/b/page.min.html"),
+            ("build", "a/build"),
+            ("/build", "build"),
+            ("doc/*.html", "doc/page.html"),
+            ("**/cache", "a/b/cache"),
+            ("**/cache", "cache"),
+            ("a/**/b", "a/b"),
+            ("a/**/b", "a/x/y/b"),
+            ("out/**", "out/x/y.html"),
+            ("page?.html", "page1.html"),
+            ("page[0-9].html", "page5.html"),
+            ("page[!0-9].html", "pagex.html"),
+        ):
+            self.assertTrue(ignored(pattern, path), (pattern, path))
+
+        for pattern, path in (
+            ("/build", "a/build"),
+            ("doc/*.html", "doc/sub/page.html"),
+            ("doc/*.html", "a/doc/page.html"),
+            ("page?.html", "page/.html"),
+            ("page[0-9].html", "pagex.html"),
+            ("build/", "build"),
+        ):
+            self.assertFalse(ignored(pattern, path), (pattern, path))
+        self.assertTrue(ignored("build/", "build", is_dir=True))
+
+    def test_last_rule_wins(self):
+        rules = Rules(["*.html", "!keep.html"])
+        self.assertFalse(rules.match("keep.html", "keep.html", False))
+        self.assertTrue(rules.match("drop.html", "drop.html", False))
+        self.assertIsNone(rules.match("a.jinja", "a.jinja", False))
+
+
+class TestSourceFinder(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make(self, *names: str, content: str = "<p></p>") -> None:
+        for name in names:
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+
+    def find(self, *paths: str, **kwargs) -> list:
+        finder = SourceFinder(**kwargs)
+        return [
+            path.relative_to(self.root).as_posix()
+            for path in finder.iter_sources([str(self.root / p) for p in paths])
+        ]
+
+    def test_extensions_and_order(self):
+        self.make("b.html", "a/c.jinja", "a/d.twig", "e.blade.php", "f.js", "g.php")
+        self.assertEqual(
+            self.find("."), ["b.html", "e.blade.php", "a/c.jinja", "a/d.twig"]
+        )
+
+    def test_gitignore(self):
+        self.make("keep.html", "build/out.html", "a/skip.html", "a/b/keep.html")
+        self.make("node_modules/pkg/page.html", "a/b/drop.html")
+        (self.root / ".gitignore").write_text("build/\n/a/skip.html\n")
+        (self.root / "a" / "b" / ".gitignore").write_text("*.html\n!keep.html\n")
+        self.assertEqual(self.find("."), ["keep.html", "a/b/keep.html"])
+        self.assertEqual(
+            self.find(".", gitignore=False),
+            [
+                "keep.html",
+                "a/skip.html",
+                "a/b/drop.html",
+                "a/b/keep.html",
+                "build/out.html",
+            ],
+        )
+
+    def test_parent_gitignore_in_repository(self):
+        (self.root / ".git").mkdir()
+        self.make("templates/page.html", "templates/dist/page.html")
+        (self.root / ".gitignore").write_text("/templates/dist\n")
+        self.assertEqual(self.find("templates"), ["templates/page.html"])
+
+    def test_excludes(self):
+        self.make("page.html", "vendor/page.html", "a/page.min.html")
+        self.assertEqual(
+            self.find(".", excludes=["vendor/", "*.min.html"]), ["page.html"]
+        )
+
+    def test_max_size(self):
+        self.make("small.html")
+        self.make("large.html", content="x" * 100)
+        finder = SourceFinder(max_size=50)
+        self.assertEqual(
+            list(finder.iter_sources([str(self.root)])), [self.root / "small.html"]
+        )
+        self.assertEqual(finder.too_large, [self.root / "large.html"])
+
+    def test_explicit_files_are_not_filtered(self):
+        self.make("node_modules/page.html", "script.js")
+        self.assertEqual(
+            self.find("node_modules/page.html", "script.js"),
+            ["node_modules/page.html", "script.js"],
+        )
+
+    def test_yields_lazily(self):
+        self.make("a.html", "b.html")
+        sources = SourceFinder().iter_sources([str(self.root)])
+        self.assertEqual(next(sources), self.root / "a.html")
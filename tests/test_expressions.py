@@ -0,0 +1,117 @@
+from unittest import TestCase
+
+from jsbeautifier import BeautifierOptions, beautify
+
+from alpine_formatter.expressions import (
+    ExpressionPrinter,
+    UnsupportedExpression,
+    supports_options,
+    tokenize,
+)
+
+SUPPORTED = [
+    "open = !open",
+    "{open: false}",
+    "{ open: false, toggle() { this.open = !this.open } }",
+    "{\n    items: [],\n\n    get count() {\n        return this.items.length\n    }\n}",
+    "{'bg-blue-500 text-white': tab === 1, 'hidden': !visible}",
+    "$dispatch('notify', {id: 1, message: 'Saved'})",
+    "count > 0 ? count + ' items' : 'empty'",
+    "x ? {a: 1} : {b: 2}",
+    "form.email = ''; form.errors = []",
+    "a()\nb()",
+    "items.filter(item => item.done).length",
+    "() => open ? close() : show()",
+    "[a, b] = c ? d : e",
+    "$watch('query', (value, old) => { this.page = 1 })",
+    "{a: function(b) { return b }, c: [1, {d: 2}], e,}",
+    "typeof a.b === 'undefined' ?? -1",
+    "[]",
+    "{}",
+]
+
+UNSUPPORTED = [
+    "new Date()",
+    "for (let i = 0; i < 3; i++) {}",
+    "if (a) b()",
+    "a++",
+    "a?.b",
+    "[...items]",
+    "`template ${a}`",
+    "a // comment",
+    "/regex/.test(a)",
+    "a\n+b",
+    "a &&\nb",
+    "{a(){}, b: 1}",
+    "(a) ? 1 : 2",
+    "() => (open) ? close() : show()",
+    "a && (b) => 'c' ? d : e",
+    "[a, b] = (c) ? d : e",
+    "x = 1; [x][0] = [c] ? 1 : 2",
+    "[[1], [2]]",
+    "'a'.length",
+    "{} + 1",
+    "a\r\nb",
+]
+
+
+class TestTokenize(TestCase):
+    def test_tokens(self):
+        tokens = tokenize("a.b(1e3, 'x') !== 0x1f\n;")
+        self.assertEqual(
+            [(token.kind, token.text) for token in tokens],
+            [
+                ("name", "a"),
+                ("punct", "."),
+                ("name", "b"),
+                ("punct", "("),
+                ("number", "1e3"),
+                ("punct", ","),
+                ("string", "'x'"),
+                ("punct", ")"),
+                ("punct", "!=="),
+                ("number", "0x1f"),
+                ("punct", ";"),
+                ("end", ""),
+            ],
+        )
+        self.assertEqual(tokens[-2].newlines, 1)
+
+    def test_unsupported_operators(self):
+        for code in ("a++", "a ** 2", "a?.b", "a // b", "a & b", "`a`"):
+            with self.assertRaises(UnsupportedExpression):
+                tokenize(code)
+
+
+class TestExpressionPrinter(TestCase):
+    def test_same_as_jsbeautifier(self):
+        printer = ExpressionPrinter()
+        for code in SUPPORTED:
+            self.assertEqual(printer.format(code), beautify(code), code)
+
+    def test_unsupported(self):
+        printer = ExpressionPrinter()
+        for code in UNSUPPORTED:
+            with self.assertRaises(UnsupportedExpression, msg=code):
+                printer.format(code)
+
+    def test_options(self):
+        for options in [
+            {"indent_size": 2},
+            {"indent_with_tabs": True},
+            {"eol": "\r\n"},
+            {"max_preserve_newlines": 1},
+        ]:
+            printer = ExpressionPrinter(options)
+            for code in SUPPORTED:
+                self.assertEqual(
+                    printer.format(code),
+                    beautify(code, BeautifierOptions(options)),
+                    (code, options),
+                )
+
+    def test_unsupported_options(self):
+        self.assertTrue(supports_options(None))
+        self.assertFalse(supports_options({"brace_style": "expand"}))
+        with self.assertRaises(UnsupportedExpression):
+            ExpressionPrinter({"space_in_paren": True})
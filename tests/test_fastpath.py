@@ -0,0 +1,135 @@
+from unittest import TestCase
+
+from jsbeautifier import BeautifierOptions, beautify
+
+from alpine_formatter.fastpath import is_trivial_expression, supports_fast_path
+from alpine_formatter.formatter import (
+    FAST_PATH_STATS,
+    AlpineFormatter,
+    SnippetCache,
+    format_alpine,
+)
+
+TRIVIAL = [
+    "",
+    "open",
+    "!open",
+    "input",
+    "form.email",
+    "$refs.input",
+    "!$store.modal.visible",
+    "_private$",
+    "a.default",
+    "1",
+    "1.5",
+    "true",
+    "null",
+    "[]",
+    "['tab']",
+    "['tab', 'panel']",
+    '["a b", "x-y", "a:b"]',
+]
+
+NOT_TRIVIAL = [
+    "open = !open",
+    "!!open",
+    "! open",
+    "a .b",
+    "a.",
+    ".a",
+    "a()",
+    "a[0]",
+    "['a','b']",
+    "[ 'a' ]",
+    "['it\\'s']",
+    "-1",
+    "1.",
+    "new",
+    "typeof",
+    "function",
+    "default.a",
+    "{open: false}",
+]
+
+OPTIONS = [
+    None,
+    {"indent_size": 2},
+    {"brace_style": "expand"},
+    {"indent_with_tabs": True},
+    {"comma_first": True},
+    {"jslint_happy": True},
+    {"keep_array_indentation": True},
+    {"preserve_newlines": False},
+    {"unescape_strings": True},
+]
+
+
+class TestIsTrivialExpression(TestCase):
+    def test_trivial(self):
+        for code in TRIVIAL:
+            self.assertTrue(is_trivial_expression(code), code)
+
+    def test_not_trivial(self):
+        for code in NOT_TRIVIAL:
+            self.assertFalse(is_trivial_expression(code), code)
+
+    def test_same_as_beautifier(self):
+        for options in OPTIONS:
+            options = BeautifierOptions(options)
+            self.assertTrue(supports_fast_path(options))
+            for code in TRIVIAL:
+                self.assertEqual(beautify(code, options), code)
+
+    def test_unsupported_options(self):
+        for options in [
+            {"end_with_newline": True},
+            {"indent_level": 1},
+            {"space_in_paren": True},
+            {"wrap_line_length": 10},
+        ]:
+            self.assertFalse(supports_fast_path(options), options)
+            self.assertNotEqual(
+                beautify("['tab', 'panel']", BeautifierOptions(options)),
+                "['tab', 'panel']",
+            )
+
+
+class TestFastPath(TestCase):
+    content = """<div x-data="{ tab: 'one' }" x-id="['tab']">
+    <input x-ref="input" x-model=" form.email ">
+    <div x-show="!open" :class="{ 'active': open }"></div>
+    <button @click.prevent="open = !open" :disabled=" busy "></button>
+</div>
+"""
+
+    def setUp(self):
+        FAST_PATH_STATS.reset()
+
+    def slow_format(self, content: str) -> str:
+        formatter = AlpineFormatter(cache=SnippetCache(maxsize=0))
+        formatter.beautifier.fast_path = False
+        return formatter.format(content)
+
+    def test_same_output_as_slow_path(self):
+        formatted = self.slow_format(self.content)
+        self.assertEqual(format_alpine(self.content), formatted)
+        self.assertEqual(format_alpine(self.content, batch=False), formatted)
+        self.assertEqual(format_alpine(formatted), formatted)
+
+    def test_stats_per_directive(self):
+        format_alpine(self.content)
+        self.assertEqual(FAST_PATH_STATS.avoided, 5)
+        self.assertEqual(
+            dict(FAST_PATH_STATS.trivial),
+            {"x-id": 1, "x-ref": 1, "x-model": 1, "x-show": 1, ":disabled": 1},
+        )
+        self.assertEqual(
+            dict(FAST_PATH_STATS.beautified),
+            {"x-data": 1, ":class": 1, "@click": 1},
+        )
+
+    def test_disabled_by_options(self):
+        formatter = AlpineFormatter(end_with_newline=True)
+        self.assertFalse(formatter.beautifier.fast_path)
+        formatter.format(self.content)
+        self.assertEqual(FAST_PATH_STATS.avoided, 0)
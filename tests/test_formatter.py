@@ -1,5 +1,28 @@
-from unittest import TestCase
-from alpine_formatter.formatter import RE_PATTERN, get_indentation_level, format_alpine
+import random
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase, mock
+from alpine_formatter.formatter import (
+    PREFILTER_STATS,
+    RE_PATTERN,
+    SNIPPET_CACHE,
+    AlpineFormatter,
+    LineIndex,
+    SnippetCache,
+    TextEdit,
+    apply_edits,
+    check_alpine,
+    get_indentation_level,
+    format_alpine,
+    format_alpine_chunks,
+    format_alpine_ranges,
+    format_alpine_stream,
+    format_alpine_to,
+    iter_matches,
+    render_directive,
+)
+from alpine_formatter.stats import FormatStats
 import re
 
 
@@ -653,3 +676,468 @@ class TestFormatAlpine(TestCase):
         """
         self.maxDiff = None
         self.assertEqual(format_alpine(content), expected_result)
+
+
+class TestSkippedRegions(TestCase):
+    def test_script_strings_are_left_alone(self):
+        content = (
+            '<div x-show=" open ">\n'
+            "<script>\n"
+            "  row.innerHTML = '<p :class=\"{a:b}\">'\n"
+            "</script>\n"
+            '<p x-text=" label "></p>\n'
+        )
+        self.assertEqual(
+            format_alpine(content),
+            content.replace('" open "', '"open"').replace('" label "', '"label"'),
+        )
+
+    def test_comments_styles_and_template_tags(self):
+        for region in (
+            '<!-- <p x-show=" a "> -->',
+            "<style> .b :first-child { c: d } </style>",
+            "{% set e = \" :f='g ' \" %}",
+            "{{ \" @click=' h '\" }}",
+            '{# x-text=" i " #}',
+        ):
+            content = f'{region} <p x-show=" j "></p>'
+            self.assertEqual(format_alpine(content), f'{region} <p x-show="j"></p>')
+
+    def test_regions_without_end(self):
+        # like in a browser, a script or comment never closed runs to the
+        # end, a template tag never closed is not one
+        for content in ('<script> <p x-show=" a "></p>', '<!-- <p x-show=" a ">'):
+            self.assertEqual(format_alpine(content), content)
+        content = '{{ <p x-show=" a "></p> <script <p x-show=" b ">'
+        self.assertEqual(
+            format_alpine(content), '{{ <p x-show="a"></p> <script <p x-show="b">'
+        )
+
+    def test_directives_on_script_elements(self):
+        content = '<script x-init=" a() "> x-show=" b " </script>'
+        self.assertEqual(
+            format_alpine(content), '<script x-init="a()"> x-show=" b " </script>'
+        )
+
+
+class TestLineIndex(TestCase):
+    def test_position_of_offsets(self):
+        content = "foo\n  bar\n\n    baz"
+        line_index = LineIndex(content)
+        self.assertEqual(line_index.position(0), (0, 0))
+        self.assertEqual(line_index.position(content.index("bar")), (1, 2))
+        self.assertEqual(line_index.position(content.index("baz")), (3, 4))
+
+    def test_offset_of_position(self):
+        content = "foo\n  bar\n\n    baz"
+        line_index = LineIndex(content)
+        self.assertEqual(line_index.offset(1, 2), content.index("bar"))
+        self.assertEqual(line_index.offset(3), content.index("    baz"))
+
+    def test_matches_get_indentation_level(self):
+        content = """
+        <div>
+            <div  x-data='{"hide":false}'>
+            <span x-show="open" @click="open = !open"></span>
+        </div>
+        """
+        line_index = LineIndex(content)
+        for match in RE_PATTERN.finditer(content):
+            self.assertEqual(
+                get_indentation_level(match, line_index), get_indentation_level(match)
+            )
+
+
+class TestSnippetCache(TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = SnippetCache(maxsize=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a")
+        cache.put("c", "C")
+        self.assertEqual(cache.get("a"), "A")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "C")
+
+    def test_counts_hits_and_misses(self):
+        cache = SnippetCache()
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "A")
+        cache.get("a")
+        cache.get("a")
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_resize_evicts_oldest(self):
+        cache = SnippetCache(maxsize=3)
+        for key in "abc":
+            cache.put(key, key.upper())
+        cache.resize(1)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get("c"), "C")
+
+    def test_zero_size_disables_cache(self):
+        cache = SnippetCache(maxsize=0)
+        cache.put("a", "A")
+        self.assertIsNone(cache.get("a"))
+
+    def test_repeated_snippets_hit_shared_cache(self):
+        SNIPPET_CACHE.clear()
+        content = """
+        <button @click="open = !open"></button>
+        <button @click="open = !open"></button>
+        """
+        format_alpine(content, batch=False)
+        format_alpine(content, batch=False)
+        self.assertEqual(SNIPPET_CACHE.misses, 1)
+        self.assertEqual(SNIPPET_CACHE.hits, 3)
+
+    def test_batch_looks_up_each_snippet_once_per_file(self):
+        SNIPPET_CACHE.clear()
+        content = """
+        <button @click="open = !open"></button>
+        <button @click="open = !open"></button>
+        """
+        format_alpine(content)
+        format_alpine(content)
+        self.assertEqual(SNIPPET_CACHE.misses, 1)
+        self.assertEqual(SNIPPET_CACHE.hits, 1)
+
+
+class TestBatch(TestCase):
+    def setUp(self):
+        SNIPPET_CACHE.clear()
+
+    def assertSameAsPerSnippet(self, content):
+        expected = format_alpine(content, batch=False)
+        SNIPPET_CACHE.clear()
+        self.assertEqual(format_alpine(content), expected)
+
+    def test_same_output_as_per_snippet(self):
+        self.assertSameAsPerSnippet("""
+        <div x-data="{ open: false, toggle() { this.open = !this.open } }">
+            <button @click.prevent="toggle()" :class="{ 'active': open }">
+            <span x-show="open" x-text=" label "></span>
+            <template x-for="item in items"><li x-text="item"></li></template>
+        </div>
+        """)
+
+    def test_same_line_endings_as_per_snippet(self):
+        self.assertSameAsPerSnippet(
+            '<div>\r\n  <div x-data="{a: 1,\r\nb: 2}"></div>\n'
+            '  <div x-data="{c: 3,\nd: 4}"></div>\r\n</div>'
+        )
+
+    def test_no_directives(self):
+        content = "<div class='x'></div>"
+        self.assertIs(format_alpine(content), content)
+
+
+class TestFormatAlpineStream(TestCase):
+    content = """<div x-data="{ a: 1, b: [1, 2] }" @click="a++">
+    <div>
+        <span   :class="{ 'active': tab === 1 }"   x-show="open">
+        <div x-init="
+            load()
+        " x-text=" label "></div>
+        <p x-data='{"unterminated": true}></p>
+        <div x-model.lazy = "  value  " x-on:click.prevent.stop="x = 1; y = 2">
+    </div>
+</div>
+"""
+
+    def assertSameAsFormatAlpine(self, content, chunk_sizes=(1, 2, 3, 7, 16, 64)):
+        expected = format_alpine(content)
+        for chunk_size in chunk_sizes:
+            output = StringIO()
+            format_alpine_stream(StringIO(content), output, chunk_size=chunk_size)
+            self.assertEqual(output.getvalue(), expected, chunk_size)
+
+    def test_same_output_as_format_alpine(self):
+        self.assertSameAsFormatAlpine(self.content)
+
+    def test_directives_on_first_line(self):
+        self.assertSameAsFormatAlpine("""<div x-data="{a: 1, b: 2}"></div>""")
+
+    def test_unterminated_quote(self):
+        self.assertSameAsFormatAlpine(
+            """<div x-data="{a: 1}>\n  <span x-show="open"></span>\n</div>"""
+        )
+
+    def test_crlf(self):
+        self.assertSameAsFormatAlpine(self.content.replace("\n", "\r\n"))
+
+    def test_skipped_regions(self):
+        self.assertSameAsFormatAlpine(
+            '<div x-show=" a "></div>\n<script>\n  el.innerHTML = \' :b="c "\'\n'
+            '</script>\n<!-- <p x-text=" d "> -->{{ e }} {% if f %}\n'
+            '<p @click=" g "></p>\n<style> .h :first-child { } </style>'
+        )
+
+    def test_directives_in_region_opening_tag(self):
+        content = (
+            '<p x-text=" a "></p>\n<script :nonce=" nonce ">\nconsole.log(1)\n'
+            '</script>\n<style x-data=" b ">x</style>\n<div x-data="{a:1}"></div>\n'
+        )
+        self.assertSameAsFormatAlpine(content, range(1, len(content) + 2))
+
+    def test_random_region_openings(self):
+        # region openings anywhere, in directive values too
+        parts = [
+            "<script>", "</script>", "<style x-data=' a '>", "</style>",
+            "<!--", "-->", "{{", "}}", "{%", "%}", "<scr", "{",
+            ' x-text=" b "', " :class=\"'<script'\"", " @click=\"'<!--'\"",
+            " x-html=\"'<style'\"", ' x-show="{{ c }}"', "<div", ">", "\n", '"',
+        ]  # fmt: skip
+        generator = random.Random(0)
+        for _ in range(100):
+            content = "".join(generator.choices(parts, k=generator.randint(1, 12)))
+            self.assertSameAsFormatAlpine(content, range(1, len(content) + 2))
+
+    def test_passes_open_regions_through(self):
+        for opening, closing in (("<script>", "</SCRIPT>"), ("<!--", "-->")):
+            content = (
+                f'<p x-text=" a "></p>{opening}\n'
+                + ' x-show=" b "\n' * 100
+                + f'{closing}<p x-text=" c "></p>'
+            )
+            chunks = list(format_alpine_chunks(StringIO(content), chunk_size=64))
+            self.assertEqual("".join(chunks), format_alpine(content))
+            self.assertLessEqual(max(map(len, chunks)), 2 * 64)
+        content = '<style x-data=" a ">' + " x-show=' b '" * 10
+        self.assertSameAsFormatAlpine(content)
+
+    def test_holds_back_at_most_max_value_size(self):
+        content = '<div x-data="{a: 1}\n' + '<p x-text=" a "></p>\n' * 100
+        with (
+            mock.patch("alpine_formatter.scanner.MAX_VALUE_SIZE", 256),
+            mock.patch("alpine_formatter.formatter.MAX_VALUE_SIZE", 256),
+        ):
+            chunks = list(format_alpine_chunks(StringIO(content), chunk_size=64))
+            self.assertEqual("".join(chunks), format_alpine(content))
+        self.assertGreater(len(chunks), 4)
+        self.assertLessEqual(max(map(len, chunks)), 2 * 256 + 64)
+
+    def test_holds_only_unfinished_directive(self):
+        content = "<p>text</p>\n" * 100 + '<div x-data="{a: 1}"></div>'
+        chunks = list(format_alpine_chunks(StringIO(content), chunk_size=64))
+        self.assertGreater(len(chunks), 10)
+        self.assertLessEqual(max(map(len, chunks)), 64 + len("<p>text</p>\n"))
+
+
+class TestPrefilter(TestCase):
+    def setUp(self):
+        PREFILTER_STATS.reset()
+
+    def test_skips_content_without_directive_markers(self):
+        content = "<div class='card'>\n  <p>Hello</p>\n</div>"
+        self.assertIs(format_alpine(content), content)
+        self.assertEqual(PREFILTER_STATS.files_scanned, 1)
+        self.assertEqual(PREFILTER_STATS.files_skipped, 1)
+        self.assertEqual(PREFILTER_STATS.chars_skipped, len(content))
+
+    def test_scans_content_with_directive_markers(self):
+        for content in ('<a X-SHOW="a">', '<a @click="a">', '<a :id="a">'):
+            format_alpine(content)
+        self.assertEqual(PREFILTER_STATS.files_scanned, 3)
+        self.assertEqual(PREFILTER_STATS.files_skipped, 0)
+
+    def test_counts_files_checks_and_edits(self):
+        formatter = AlpineFormatter()
+        with tempfile.TemporaryDirectory() as tmp:
+            plain = Path(tmp, "plain.html")
+            plain.write_text("<p>\u00e9</p>")
+            alpine = Path(tmp, "alpine.html")
+            alpine.write_text('<p x-show="a"></p>')
+            formatter.format_file(plain)
+            formatter.format_file(alpine)
+        self.assertEqual(PREFILTER_STATS.files_scanned, 2)
+        self.assertEqual(PREFILTER_STATS.files_skipped, 1)
+        # in bytes for files
+        self.assertEqual(PREFILTER_STATS.chars_skipped, 9)
+
+        PREFILTER_STATS.reset()
+        self.assertTrue(check_alpine("<p></p>"))
+        self.assertEqual(formatter.get_edits("<b></b>"), [])
+        self.assertTrue(check_alpine('<p x-show="a"></p>'))
+        self.assertEqual(PREFILTER_STATS.files_scanned, 3)
+        self.assertEqual(PREFILTER_STATS.files_skipped, 2)
+        self.assertEqual(PREFILTER_STATS.chars_skipped, 14)
+
+    def test_iter_matches_same_as_pattern(self):
+        content = (
+            TestFormatAlpineStream.content
+            + """
+        <a href="http://x"  X-On:Click.Prevent="go()"\t:class="c" x-data:foo="no">
+        <div x-data="a"x-show="b" @@click="c" x-bind:value="v" x-bind="w">
+        """
+        )
+        self.assertEqual(
+            [m.span() for m in iter_matches(content)],
+            [m.span() for m in RE_PATTERN.finditer(content)],
+        )
+
+
+class TestCheckAlpine(TestCase):
+    def test_formatted_content(self):
+        content = """
+        <div x-data="
+             {
+                 open: false
+             }
+             " :class="open && 'open'">
+        """
+        self.assertEqual(format_alpine(content), content)
+        self.assertTrue(check_alpine(content))
+
+    def test_unformatted_content(self):
+        self.assertFalse(check_alpine("""<div :class="open&&'open'">"""))
+        self.assertFalse(check_alpine("""<div x-data="{open: false}">"""))
+
+    def test_content_without_directives(self):
+        self.assertTrue(check_alpine("<div class='a'></div>"))
+
+    def test_stops_at_first_unformatted_directive(self):
+        SNIPPET_CACHE.clear()
+        content = """<a x-show="a+1"></a>\n""" + """<a x-show="b + 1"></a>\n""" * 10
+        self.assertFalse(check_alpine(content))
+        self.assertEqual(SNIPPET_CACHE.misses, 1)
+
+
+class TestFormatAlpineRanges(TestCase):
+    content = """<div>
+    <a x-show=" one "></a>
+    <a x-show=" two "
+       x-text=" three "></a>
+    <a x-data="{four: 4}"></a>
+</div>
+"""
+
+    def test_offset_range(self):
+        start = self.content.index("two")
+        edits = format_alpine_ranges(self.content, [(start, start + 3)])
+        self.assertEqual(
+            edits,
+            [TextEdit(self.content.index('x-show=" two "'), 14, 'x-show="two"')],
+        )
+
+    def test_empty_range_selects_surrounding_directive(self):
+        start = self.content.index("three")
+        edits = format_alpine_ranges(self.content, [(start, start)])
+        self.assertEqual([edit.replacement for edit in edits], ['x-text="three"'])
+
+    def test_line_ranges(self):
+        edits = format_alpine_ranges(self.content, [(2, 4)], lines=True)
+        self.assertEqual(
+            [edit.replacement for edit in edits],
+            ['x-show="two"', 'x-text="three"'],
+        )
+
+    def test_all_ranges_same_as_format_alpine(self):
+        edits = format_alpine_ranges(self.content, [(0, len(self.content))])
+        self.assertEqual(len(edits), 4)
+        self.assertEqual(apply_edits(self.content, edits), format_alpine(self.content))
+
+    def test_formatted_directives_have_no_edits(self):
+        content = format_alpine(self.content)
+        self.assertEqual(format_alpine_ranges(content, [(0, len(content))]), [])
+
+
+class TestAlpineFormatter(TestCase):
+    content = """<div x-data="{ open: false, toggle() { this.open = !this.open } }">
+    <button @click=" toggle() "></button>
+</div>
+"""
+
+    def test_same_output_as_format_alpine(self):
+        formatter = AlpineFormatter()
+        self.assertEqual(formatter.format(self.content), format_alpine(self.content))
+        self.assertEqual(formatter.check(self.content), check_alpine(self.content))
+
+    def test_options(self):
+        formatter = AlpineFormatter(indent_size=2, brace_style="expand")
+        self.assertEqual(
+            formatter.format('<div x-data="{ a() { return 1 } }"></div>'),
+            '<div x-data="\n{\n  a()\n  {\n    return 1\n  }\n}\n"></div>',
+        )
+        self.assertEqual(
+            formatter.format(self.content),
+            format_alpine(self.content, {"indent_size": 2, "brace_style": "expand"}),
+        )
+
+    def test_own_snippet_cache(self):
+        formatter = AlpineFormatter()
+        formatter.format(self.content)
+        formatter.format(self.content)
+        self.assertEqual(len(formatter.cache), 2)
+        self.assertEqual(formatter.cache.hits, 2)
+
+    def test_format_file(self):
+        formatter = AlpineFormatter()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, "template.html")
+            path.write_text(self.content)
+            self.assertTrue(formatter.format_file(path, check=True))
+            self.assertEqual(path.read_text(), self.content)
+            self.assertTrue(formatter.format_file(path))
+            self.assertEqual(path.read_text(), format_alpine(self.content))
+            self.assertFalse(formatter.format_file(path))
+
+    def test_format_to(self):
+        for content in (self.content, "<p></p>", "<p x-text='a'></p>"):
+            output = StringIO()
+            format_alpine_to(content, output)
+            self.assertEqual(output.getvalue(), format_alpine(content))
+
+    def test_render_directive(self):
+        self.assertEqual(render_directive("x-text", "'", "a", 4), "x-text='a'")
+        self.assertEqual(
+            render_directive("x-data", '"', "{\n    a: 1\n}", 2),
+            'x-data="\n  {\n      a: 1\n  }\n  "',
+        )
+
+    def test_format_bytes(self):
+        formatter = AlpineFormatter()
+        # a multibyte character before a multiline directive on its line
+        content = '<p>\u00e9</p>\n<p title="\u00e9" x-data="{ a() { return 1 } }">'
+        self.assertEqual(
+            formatter.format_bytes(content.encode()), format_alpine(content).encode()
+        )
+        formatted = format_alpine(content).encode()
+        self.assertIs(formatter.format_bytes(formatted), formatted)
+        self.assertEqual(formatter.format_bytes(b""), b"")
+
+    def test_format_file_keeps_bytes_that_are_not_utf8(self):
+        data = b"<p>\xff</p>\n<p>\xe9 <a x-data=\"{ a() { return '\xe9' } }\">"
+        formatted = (
+            b'<p>\xff</p>\n<p>\xe9 <a x-data="\n'
+            b"        {\n"
+            b"            a() {\n"
+            b"                return '\xe9'\n"
+            b"            }\n"
+            b"        }\n"
+            b'        ">'
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, "template.html")
+            for formatter, lines in (
+                (AlpineFormatter(), None),
+                (AlpineFormatter(stats=FormatStats()), None),
+                (AlpineFormatter(), [(0, 2)]),
+            ):
+                path.write_bytes(data)
+                self.assertTrue(formatter.format_file(path, lines=lines))
+                self.assertEqual(path.read_bytes(), formatted)
+
+    def test_format_file_does_not_rewrite_unchanged_files(self):
+        formatter = AlpineFormatter()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, "template.html")
+            path.write_text(format_alpine(self.content))
+            inode = path.stat().st_ino
+            self.assertFalse(formatter.format_file(path))
+            self.assertFalse(formatter.format_file(path, check=True))
+            self.assertEqual(path.stat().st_ino, inode)
+
+            empty = Path(tmp, "empty.html")
+            empty.write_text("")
+            self.assertFalse(formatter.format_file(empty))
@@ -0,0 +1,182 @@
+import os
+import subprocess
+import tempfile
+from contextlib import redirect_stderr
+from io import StringIO
+from pathlib import Path
+from unittest import TestCase, mock
+
+from alpine_formatter import cli
+from alpine_formatter.git import GitError, get_changed_files, parse_diff
+
+DIFF = """diff --git a/a.html b/a.html
+index 1111111..2222222 100644
+--- a/a.html
++++ b/a.html
+@@ -2 +2 @@ <div>
+-old
++new
+@@ -5,2 +5,3 @@
+-x
+-y
+++++ not a header
++b
++c
+@@ -9 +9,0 @@
+-removed
+diff --git a/gone.html b/gone.html
+deleted file mode 100644
+--- a/gone.html
++++ /dev/null
+@@ -1 +0,0 @@
+-gone
+diff --git "a/tab\\there.html" "b/tab\\there.html"
+--- "a/tab\\there.html"
++++ "b/tab\\there.html"
+@@ -0,0 +1,2 @@
++one
++two
+diff --git a/my page.html b/my page.html
+--- a/my page.html\t
++++ b/my page.html\t
+@@ -3 +3 @@
+-old
++new
+"""
+
+UNFORMATTED = '<div x-show=" open "></div>\n'
+FORMATTED = '<div x-show="open"></div>\n'
+
+
+class TestParseDiff(TestCase):
+    def test_ranges(self):
+        root = Path("/repo")
+        self.assertEqual(
+            parse_diff(DIFF, root),
+            {
+                root / "a.html": [(1, 2), (4, 7), (9, 9)],
+                root / "tab\there.html": [(0, 2)],
+                root / "my page.html": [(2, 3)],
+            },
+        )
+
+
+class TestGit(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, cwd)
+        env = {
+            "GIT_AUTHOR_NAME": "test",
+            "GIT_AUTHOR_EMAIL": "test@example.com",
+            "GIT_COMMITTER_NAME": "test",
+            "GIT_COMMITTER_EMAIL": "test@example.com",
+            "GIT_CONFIG_GLOBAL": os.devnull,
+            "ALPINE_FORMATTER_SOCKET": str(self.root / "no-daemon.sock"),
+        }
+        self.env = mock.patch.dict(os.environ, env)
+        self.env.start()
+        self.git("init", "-q")
+
+        self.template = Path("template.html")
+        self.template.write_text(UNFORMATTED * 4)
+        self.git("add", ".")
+        self.git("commit", "-q", "-m", "initial")
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def git(self, *args: str) -> None:
+        subprocess.run(["git", *args], check=True)
+
+    def main(self, *args: str) -> int:
+        with redirect_stderr(StringIO()) as stderr:
+            code = cli.main([*args, "-j", "1"])
+        self.stderr = stderr.getvalue()
+        return code
+
+    def test_changed_files(self):
+        lines = self.template.read_text().split("\n")
+        lines[2] = '<p x-text=" a "></p>'
+        self.template.write_text("\n".join(lines))
+        Path("new.html").write_text(UNFORMATTED)
+
+        self.assertEqual(
+            get_changed_files(),
+            {self.template: [(2, 3)], Path("new.html"): None},
+        )
+        self.assertEqual(get_changed_files(staged=True), {})
+        self.git("add", ".")
+        self.assertEqual(get_changed_files(staged=True)[Path("new.html")], [(0, 1)])
+
+    def test_name_with_space(self):
+        template = Path("my page.html")
+        template.write_text(UNFORMATTED)
+        self.git("add", ".")
+        self.git("commit", "-q", "-m", "space")
+        template.write_text(UNFORMATTED * 2)
+
+        self.assertEqual(get_changed_files(), {template: [(1, 2)]})
+        self.assertEqual(self.main("--changed"), cli.EXIT_OK)
+        self.assertEqual(template.read_text(), UNFORMATTED + FORMATTED)
+
+    def test_ignores_diff_prefix_settings(self):
+        self.template.write_text(UNFORMATTED * 5)
+        for setting in ("diff.noprefix", "diff.mnemonicPrefix"):
+            self.git("config", setting, "true")
+            self.assertEqual(get_changed_files(), {self.template: [(4, 5)]})
+
+    def test_staged_with_unstaged_changes(self):
+        self.template.write_text(UNFORMATTED * 5)
+        self.git("add", ".")
+        self.template.write_text('<p x-text=" a "></p>\n' + UNFORMATTED * 5)
+        with self.assertRaisesRegex(GitError, "template.html"):
+            get_changed_files(staged=True)
+        self.assertEqual(self.main("--staged"), cli.EXIT_ERROR)
+        self.assertEqual(
+            self.template.read_text(), '<p x-text=" a "></p>\n' + UNFORMATTED * 5
+        )
+
+    def test_not_a_repository(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(GitError):
+                get_changed_files(cwd=Path(tmp))
+
+    def test_formats_changed_lines_only(self):
+        lines = self.template.read_text().split("\n")
+        lines[1] = '<p x-text=" a "></p>'
+        self.template.write_text("\n".join(lines))
+        Path("new.html").write_text(UNFORMATTED)
+        Path("script.js").write_text(UNFORMATTED)
+
+        self.assertEqual(self.main("--changed", "--check"), cli.EXIT_CHANGED)
+        self.assertEqual(self.main("--changed"), cli.EXIT_OK)
+        self.assertEqual(
+            self.template.read_text(),
+            UNFORMATTED + '<p x-text="a"></p>\n' + UNFORMATTED * 2,
+        )
+        self.assertEqual(Path("new.html").read_text(), FORMATTED)
+        self.assertEqual(Path("script.js").read_text(), UNFORMATTED)
+
+    def test_staged_and_base(self):
+        self.template.write_text(UNFORMATTED * 5)
+        self.assertEqual(self.main("--staged"), cli.EXIT_OK)
+        self.assertEqual(self.template.read_text(), UNFORMATTED * 5)
+
+        self.git("add", ".")
+        self.git("commit", "-q", "-m", "second")
+        self.assertEqual(self.main("--changed"), cli.EXIT_OK)
+        self.assertEqual(self.template.read_text(), UNFORMATTED * 5)
+
+        self.assertEqual(self.main("--changed", "--base", "HEAD~1"), cli.EXIT_OK)
+        self.assertEqual(self.template.read_text(), UNFORMATTED * 4 + FORMATTED)
+
+    def test_errors(self):
+        self.assertEqual(self.main("--changed", "--base", "missing"), cli.EXIT_ERROR)
+        with self.assertRaises(SystemExit):
+            self.main("--base", "HEAD", "template.html")
+        with self.assertRaises(SystemExit):
+            self.main("--changed", "--cache")
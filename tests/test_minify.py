@@ -0,0 +1,97 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from alpine_formatter.formatter import format_alpine
+from alpine_formatter.minify import minify_alpine, minify_code, minify_file
+
+
+class TestMinifyCode(TestCase):
+    def test_drops_whitespace_and_comments(self):
+        for code, expected in (
+            (
+                "{\n    open: false,\n    toggle() {\n"
+                "        this.open = !this.open\n    }\n}",
+                "{open:false,toggle(){this.open=!this.open}}",
+            ),
+            ("$watch('query', value => page = 0)", "$watch('query',value=>page=0)"),
+            ("/* a */ open // b\n  && ready", "open&&ready"),
+            ("typeof  x === 'undefined'", "typeof x==='undefined'"),
+            ("items.map( i => `${ i }  px` )", "items.map(i=>`${ i }  px`)"),
+            ('s = \'a  b\' ;  t = "c \\" d"', 's=\'a  b\';t="c \\" d"'),
+            ("let re = /a b/g; re.test( c )", "let re=/a b/g;re.test(c)"),
+        ):
+            self.assertEqual(minify_code(code), expected, code)
+
+    def test_keeps_what_changes_the_meaning(self):
+        for code, expected in (
+            ("a + +b", "a+ +b"),
+            ("a - -b", "a- -b"),
+            ("1 .toString()", "1 .toString()"),
+            ("a / /re/.test(b)", "a/ /re/.test(b)"),
+            # `<!--` and `-->` start comments in scripts
+            ("x < !--y", "x< !--y"),
+            ("x<! --y", "x<! --y"),
+            ("x < ! --y", "x< !--y"),
+            ("x < !y", "x<!y"),
+            ("x-- > y", "x-- >y"),
+            # automatic semicolon insertion
+            ("a = 1\nb = 2", "a=1\nb=2"),
+            ("return\nvalue", "return\nvalue"),
+            ("a\n++b", "a\n++b"),
+            ("done = true\n!open", "done=true\n!open"),
+            ("a = b\n(c)", "a=b(c)"),
+        ):
+            self.assertEqual(minify_code(code), expected, code)
+
+    def test_code_it_cannot_read_is_only_stripped(self):
+        self.assertEqual(minify_code("  a \\ b  "), "a \\ b")
+        self.assertEqual(minify_code(" 'unterminated "), "'unterminated")
+        self.assertEqual(minify_code(" `a ${ b ` "), "`a ${ b `")
+
+    def test_idempotent(self):
+        code = (
+            "{\n  a: [1, 2],\n  go() {\n    if (a) {\n      b()\n    }\n"
+            "    else c()\n  }\n}"
+        )
+        minified = minify_code(code)
+        self.assertEqual(minify_code(minified), minified)
+
+
+class TestMinifyAlpine(TestCase):
+    content = (
+        '<div x-data="{\n    open: false,\n    toggle() { this.open = !this.open }\n}"'
+        " @click = ' open = ! open '>\n"
+        "<script> var a = '<p x-show=\" b \">' </script>\n"
+        '<p class="a  b" x-text=" label + \' items\' "></p>\n'
+    )
+
+    def test_minifies_the_directives(self):
+        self.assertEqual(
+            minify_alpine(self.content),
+            '<div x-data="{open:false,toggle(){this.open=!this.open}}"'
+            " @click='open=!open'>\n"
+            "<script> var a = '<p x-show=\" b \">' </script>\n"
+            '<p class="a  b" x-text="label+\' items\'"></p>\n',
+        )
+        self.assertEqual(
+            format_alpine(self.content, minify=True), minify_alpine(self.content)
+        )
+
+    def test_undoes_format_alpine(self):
+        self.assertEqual(
+            minify_alpine(format_alpine(self.content)), minify_alpine(self.content)
+        )
+
+    def test_minify_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, "a.html")
+            path.write_text(self.content)
+            minified = minify_alpine(self.content)
+            saved = len(self.content.encode()) - len(minified.encode())
+
+            self.assertEqual(minify_file(path, check=True), saved)
+            self.assertEqual(path.read_text(), self.content)
+            self.assertEqual(minify_file(path), saved)
+            self.assertEqual(path.read_text(), minified)
+            self.assertEqual(minify_file(path), 0)
@@ -0,0 +1,153 @@
+from unittest import TestCase, mock
+
+from alpine_formatter.formatter import RE_PATTERN
+from alpine_formatter.scanner import DirectiveScanner, is_directive
+
+
+def groups(matches):
+    return [
+        (m.span(), m.group("directive"), m.group("quote"), m.group("code"))
+        for m in matches
+    ]
+
+
+class TestIsDirective(TestCase):
+    def test_directives(self):
+        for name in (
+            "x-data",
+            "X-DATA",
+            "x-show.important",
+            "x-model.lazy.debounce.500ms",
+            "x-modelable",
+            ":class",
+            "x-bind:class",
+            "@click",
+            "@keydown.enter.prevent",
+            "x-on:click.outside",
+            "x-model..",
+        ):
+            self.assertTrue(is_directive(name), name)
+
+    def test_not_directives(self):
+        for name in (
+            "x-cloak",
+            "x-transition",
+            "x-datas",
+            "x-show.",
+            "x-bind",
+            ":",
+            ":class.camel",
+            "@",
+            "@.prevent",
+            "x-on:click:foo",
+            "x-modelx",
+        ):
+            self.assertFalse(is_directive(name), name)
+
+
+class TestDirectiveScanner(TestCase):
+    def assertSameAsPattern(self, content):
+        self.assertEqual(
+            groups(DirectiveScanner(content).scan()),
+            groups(RE_PATTERN.finditer(content)),
+        )
+
+    def test_same_as_pattern(self):
+        self.assertSameAsPattern("""
+        <div x-data='{"key": "value"}' X-On:Click.Prevent = "go()"
+            :class="{ 'active': tab === 1 }"\t@input="a"x-show="b">
+        <div x-data="{\\"key\\": \\"value\\"}" x-model.lazy='it\\'s'>
+        <div x-data=
+        "
+            {'key': 'value'}">
+        <div x-data='"> <div x-bind:value="v" x-bind="w" x-cloak="c">
+        """)
+
+    def test_unterminated_quote_does_not_hide_later_directives(self):
+        content = """
+        <div x-data="{ open: false }>
+        <span x-show='open' @click='open = !open'></span>
+        """
+        self.assertSameAsPattern(content)
+        self.assertEqual(len(list(DirectiveScanner(content).scan())), 2)
+
+    def test_stops_at_unterminated_directive(self):
+        content = '<a x-show="a"> <b x-text="b'
+        scanner = DirectiveScanner(content)
+        matches = list(scanner.scan(stop_at_unterminated=True))
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(scanner.unterminated, content.index("x-text"))
+
+    def test_scan_from_position(self):
+        content = '<a x-show="a" x-text="b">'
+        matches = list(DirectiveScanner(content).scan(content.index("x-text")))
+        self.assertEqual([m.group("directive") for m in matches], ["x-text"])
+
+    def test_bytes_same_as_str(self):
+        content = (
+            "<p x-show='a'> x-text=\"b\" àx-text=\"c\" 　:class = 'd'"
+            ' é@click="e"\n x-html="fü">'
+        )
+        data = content.encode()
+        matches = list(DirectiveScanner(data).scan())
+        self.assertEqual(
+            [
+                (m.group("directive").decode(), m.group("code").decode())
+                for m in matches
+            ],
+            [
+                (m.group("directive"), m.group("code"))
+                for m in RE_PATTERN.finditer(content)
+            ],
+        )
+        self.assertEqual(
+            [data[: m.start()].decode() for m in matches],
+            [content[: m.start()] for m in RE_PATTERN.finditer(content)],
+        )
+
+    def test_skips_regions(self):
+        content = (
+            '<script> :a="1" </script> :b="2" <!-- :c="3" --> :d="4"'
+            ' {{ :e="5" }} {% :f="6" %} {# :g="7" #} <STYLE> :h="8" </STYLE> :i="9"'
+        )
+        scanner = DirectiveScanner(content)
+        self.assertEqual(
+            [m.group("directive") for m in scanner.scan()], [":b", ":d", ":i"]
+        )
+        self.assertEqual(len(scanner.regions), 6)
+        self.assertEqual(
+            [
+                m.group("directive").decode()
+                for m in DirectiveScanner(content.encode()).scan()
+            ],
+            [":b", ":d", ":i"],
+        )
+        self.assertEqual(len(list(DirectiveScanner(content, skip=False).scan())), 9)
+
+    def test_stops_at_unterminated_region(self):
+        content = '<a x-show="a"> <script> :b="c"'
+        scanner = DirectiveScanner(content)
+        matches = list(scanner.scan(stop_at_unterminated=True))
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(scanner.unterminated, content.index("<script"))
+
+    def test_ignores_region_openings_in_values(self):
+        content = (
+            '<div x-html="\'<script\'"></div> <p x-text="a"></p> </script>'
+            " <b :title=\"'<!--'\"></b>"
+        )
+        scanner = DirectiveScanner(content)
+        matches = list(scanner.scan(stop_at_unterminated=True))
+        self.assertEqual(
+            [m.group("directive") for m in matches], ["x-html", "x-text", ":title"]
+        )
+        self.assertIsNone(scanner.unterminated)
+
+    @mock.patch("alpine_formatter.scanner.MAX_VALUE_SIZE", 16)
+    def test_gives_up_on_long_values(self):
+        content = '<p x-text="' + "a" * 16 + '"> <p x-show="b"> {{ ' + "c" * 16 + " }}"
+        scanner = DirectiveScanner(content)
+        matches = list(scanner.scan(stop_at_unterminated=True))
+        self.assertEqual([m.group("directive") for m in matches], ["x-show"])
+        self.assertIsNone(scanner.unterminated)
+        self.assertEqual(scanner.regions, [])
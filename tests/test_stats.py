@@ -0,0 +1,91 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from alpine_formatter.formatter import AlpineFormatter, format_alpine, format_file
+from alpine_formatter.stats import FormatStats, get_directive_type
+
+CONTENT = """<div x-data="{ open: false, toggle() { this.open = !this.open } }">
+    <button @click.prevent=" toggle() " :class="{ 'active': open }"></button>
+    <span x-text="label"></span>
+</div>
+"""
+
+
+class TestGetDirectiveType(TestCase):
+    def test_types(self):
+        self.assertEqual(get_directive_type("x-data"), "x-data")
+        self.assertEqual(get_directive_type("X-Show.Important"), "x-show")
+        self.assertEqual(get_directive_type("@click.prevent"), "x-on")
+        self.assertEqual(get_directive_type("x-on:keydown.enter"), "x-on")
+        self.assertEqual(get_directive_type(":class"), "x-bind")
+        self.assertEqual(get_directive_type("x-bind:disabled"), "x-bind")
+
+
+class TestFormatStats(TestCase):
+    def test_same_output(self):
+        stats = FormatStats()
+        self.assertEqual(format_alpine(CONTENT, stats=stats), format_alpine(CONTENT))
+        self.assertEqual(AlpineFormatter(stats=stats).format("<p></p>"), "<p></p>")
+
+    def test_phases_and_directives(self):
+        stats = FormatStats()
+        format_alpine(CONTENT, stats=stats)
+
+        self.assertEqual(stats.files.count, 1)
+        self.assertEqual(stats.files.chars, len(CONTENT))
+        for phase in ("prefilter", "scan", "line_index", "join"):
+            self.assertEqual(stats.phases[phase].count, 1)
+        for phase in ("beautify", "indentation", "render"):
+            self.assertEqual(stats.phases[phase].count, 4)
+        self.assertEqual(
+            {name: timing.count for name, timing in stats.directives.items()},
+            {"x-data": 1, "x-on": 1, "x-bind": 1, "x-text": 1},
+        )
+        self.assertEqual(stats.directives["x-text"].chars, len("label"))
+
+    def test_slowest(self):
+        stats = FormatStats(top=2)
+        for i in range(3):
+            stats.add_file(f"{i}.html", 10, i)
+            stats.add_snippet("x-show", f"a{i}", i, 0, 0)
+        self.assertEqual(stats.slowest_files, [(2, "2.html"), (1, "1.html")])
+        self.assertEqual(
+            stats.slowest_snippets, [(2, "x-show", "a2"), (1, "x-show", "a1")]
+        )
+
+    def test_merge(self):
+        first = FormatStats()
+        second = FormatStats()
+        format_alpine(CONTENT, stats=first)
+        format_alpine(CONTENT, stats=second)
+        first.merge(second.to_dict())
+
+        self.assertEqual(first.files.count, 2)
+        self.assertEqual(first.phases["scan"].count, 2)
+        self.assertEqual(first.directives["x-on"].count, 2)
+        self.assertEqual(len(first.slowest_files), 2)
+        self.assertEqual(len(first.slowest_snippets), 8)
+
+    def test_format_file(self):
+        stats = FormatStats()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, "template.html")
+            path.write_text(CONTENT)
+            self.assertTrue(format_file(path, check=True, stats=stats))
+            self.assertTrue(format_file(path, stats=stats))
+            self.assertEqual(path.read_text(), format_alpine(CONTENT))
+
+        self.assertEqual(stats.files.count, 2)
+        self.assertEqual(stats.phases["read"].count, 2)
+        self.assertEqual(stats.phases["check"].count, 1)
+        self.assertEqual(stats.phases["write"].count, 1)
+        self.assertEqual(stats.slowest_files[0][1], str(path))
+
+    def test_report(self):
+        stats = FormatStats()
+        format_alpine(CONTENT, stats=stats)
+        report = stats.report()
+        self.assertIn("files: 1", report)
+        self.assertIn("x-bind", report)
+        self.assertIn("slowest snippets", report)
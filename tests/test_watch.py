@@ -0,0 +1,94 @@
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import TestCase, mock
+
+from alpine_formatter.discovery import SourceFinder
+from alpine_formatter.watch import InotifyBackend, PollingBackend, Watcher
+
+UNFORMATTED = '<div x-show=" open "></div>\n'
+FORMATTED = '<div x-show="open"></div>\n'
+
+
+class WatcherTests:
+    poll = False
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / "nested").mkdir()
+        self.first = self.root / "first.html"
+        self.second = self.root / "nested" / "second.html"
+        self.first.write_text(UNFORMATTED)
+        self.second.write_text(FORMATTED)
+        self.watcher = Watcher([str(self.root)], debounce=0.05, poll=self.poll)
+        if self.poll:
+            self.watcher.backend.interval = 0.05
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmp.cleanup()
+
+    def test_formats_changed_files(self):
+        self.assertEqual(
+            self.watcher.start(),
+            [(str(self.first), True, None), (str(self.second), False, None)],
+        )
+        self.assertEqual(self.first.read_text(), FORMATTED)
+        # the file just written is not formatted again
+        self.assertEqual(self.watcher.wait(0.3), [])
+
+        self.second.write_text(UNFORMATTED)
+        self.assertEqual(self.watcher.wait(5), [(str(self.second), True, None)])
+        self.assertEqual(self.second.read_text(), FORMATTED)
+
+    def test_skips_files_with_the_same_content(self):
+        self.watcher.start()
+        with mock.patch.object(self.watcher.formatter, "format") as format:
+            self.first.write_text(FORMATTED)
+            self.assertEqual(self.watcher.wait(0.5), [])
+        format.assert_not_called()
+
+    def test_new_directories_and_files(self):
+        self.watcher.start()
+        (self.root / "new").mkdir()
+        time.sleep(0.1)
+        path = self.root / "new" / "third.html"
+        path.write_text(UNFORMATTED)
+        results = []
+        deadline = time.monotonic() + 5
+        while not results and time.monotonic() < deadline:
+            results = self.watcher.wait(0.5)
+        self.assertEqual(results, [(str(path), True, None)])
+
+    def test_ignored_files(self):
+        self.watcher = Watcher(
+            [str(self.root)],
+            SourceFinder(excludes=["nested"]),
+            debounce=0.05,
+            poll=self.poll,
+        )
+        self.assertEqual(self.watcher.start(), [(str(self.first), True, None)])
+        self.second.write_text(UNFORMATTED)
+        self.assertEqual(self.watcher.wait(0.3), [])
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is linux only")
+class TestInotifyWatcher(WatcherTests, TestCase):
+    def test_uses_inotify(self):
+        self.assertIsInstance(self.watcher.backend, InotifyBackend)
+
+    def test_idle_wait_does_not_spin(self):
+        self.watcher.start()
+        start = time.process_time()
+        self.assertEqual(self.watcher.wait(0.3), [])
+        self.assertLess(time.process_time() - start, 0.05)
+
+
+class TestPollingWatcher(WatcherTests, TestCase):
+    poll = True
+
+    def test_uses_polling(self):
+        self.assertIsInstance(self.watcher.backend, PollingBackend)